@@ -10,6 +10,7 @@ Este script es el responsable de iniciar la aplicación. Realiza las siguientes
 3.  Instancia y lanza la ventana principal de la aplicación (`gui.main.App`).
 """
 import ctypes
+import multiprocessing
 import sys
 import os
 import tkinter as tk
@@ -62,4 +63,7 @@ def main():
     app.mainloop()
 
 if __name__ == "__main__":
+    # Necesario para que los procesos de disección en paralelo funcionen en el
+    # ejecutable generado por PyInstaller en Windows.
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Benchmark del clasificador de paquetes.
+
+Genera una mezcla de tramas típica (TCP con datos, consultas DNS sobre UDP,
+respuestas ARP, ICMP y errores ICMP que citan una cabecera TCP), las
+disecciona una vez y mide cuántos resúmenes por segundo produce
+`core.clasificador`:
+
+- "haslayer": la antigua cadena de `haslayer` que repetían las vistas, como
+  referencia.
+- "clasificar": el clasificador con la tabla de despacho por firma de capas.
+- "clasificar_lote (crudo)": el lote completo desde tramas en crudo
+  (`PaqueteCrudo`), incluida la disección, que es lo que hacen las vistas y
+  los procesos de `core.diseccion`.
+
+Comprueba además que la antigua cadena y el clasificador dan el mismo
+resultado; termina con código 1 si no es así.
+
+Uso:
+    python benchmarks/bench_clasificador.py [--paquetes 20000] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_PROYECTO)
+
+from scapy.layers.dns import DNS, DNSQR
+from scapy.layers.inet import IP, TCP, UDP, ICMP, IPerror, TCPerror
+from scapy.layers.l2 import Ether, ARP
+from scapy.packet import Raw
+from core.clasificador import ResumenPaquete, clasificar, clasificar_lote
+from core.paquetes import PaqueteCrudo
+
+# DLT_EN10MB: las tramas generadas son Ethernet.
+LINKTYPE_ETHERNET = 1
+
+def generar_tramas(cantidad):
+    """
+    Genera tramas en crudo con una mezcla de protocolos.
+
+    Args:
+        cantidad (int): Número de tramas.
+
+    Returns:
+        list[PaqueteCrudo]: Las tramas, con marcas de tiempo crecientes.
+    """
+    modelos = [
+        Ether() / IP(src="192.168.1.10", dst="93.184.216.34") / TCP(sport=51000, dport=443, flags="PA") / Raw(b"x" * 512),
+        Ether() / IP(src="192.168.1.10", dst="8.8.8.8") / UDP(sport=53000, dport=53) / DNS(qd=DNSQR(qname="example.com")),
+        Ether(dst="ff:ff:ff:ff:ff:ff") / ARP(op=2, psrc="192.168.1.1", pdst="192.168.1.10"),
+        Ether() / IP(src="192.168.1.10", dst="1.1.1.1") / ICMP(),
+        # Las cabeceras citadas en el error (IPerror, TCPerror) no son IP ni TCP.
+        Ether() / IP(src="192.168.1.1", dst="192.168.1.10") / ICMP(type=3, code=3)
+        / IPerror(src="192.168.1.10", dst="93.184.216.34") / TCPerror(sport=51000, dport=443),
+    ]
+    datos = [bytes(modelo) for modelo in modelos]
+    return [PaqueteCrudo(datos[i % len(datos)], 1700000000.0 + i / 1000, LINKTYPE_ETHERNET) for i in range(cantidad)]
+
+def clasificar_haslayer(packet):
+    """Antigua cadena de `haslayer` de las vistas, como referencia."""
+    proto, src, dst, info = "N/A", "N/A", "N/A", packet.summary()
+    sport = dport = None
+    if packet.haslayer(IP):
+        src = packet[IP].src
+        dst = packet[IP].dst
+        if packet.haslayer(TCP):
+            proto = "TCP"
+            sport, dport = packet[TCP].sport, packet[TCP].dport
+        elif packet.haslayer(UDP):
+            proto = "UDP"
+            sport, dport = packet[UDP].sport, packet[UDP].dport
+        else:
+            proto = "IP"
+    elif packet.haslayer(ARP):
+        proto = "ARP"
+        src = packet[ARP].psrc
+        dst = packet[ARP].pdst
+    length = getattr(packet, "wirelen", None) or len(packet)
+    return ResumenPaquete(float(packet.time), src, dst, proto, length, info, sport, dport)
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta `funcion` varias veces.
+
+    Args:
+        funcion (function): Sin argumentos; devuelve la lista de resúmenes.
+        repeticiones (int): Número de ejecuciones.
+
+    Returns:
+        tuple[float, list]: El mejor tiempo en segundos y el resultado de la última ejecución.
+    """
+    mejor, resultado = None, None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        if mejor is None or duracion < mejor:
+            mejor = duracion
+    return mejor, resultado
+
+def main():
+    """Ejecuta el benchmark y devuelve el código de salida."""
+    parser = argparse.ArgumentParser(description="Mide los resúmenes por segundo del clasificador de paquetes.")
+    parser.add_argument("--paquetes", type=int, default=20000, help="Número de paquetes (por defecto, 20000).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Número de mediciones; se usa la mejor.")
+    args = parser.parse_args()
+
+    tramas = generar_tramas(args.paquetes)
+    paquetes = [trama.decodificar() for trama in tramas]
+
+    pruebas = [
+        ("haslayer", lambda: [clasificar_haslayer(p) for p in paquetes]),
+        ("clasificar", lambda: [clasificar(p) for p in paquetes]),
+        ("clasificar_lote (crudo)", lambda: clasificar_lote(tramas)),
+    ]
+    print(f"Clasificación de {args.paquetes} paquetes (mejor de {args.repeticiones}):")
+    resultados = {}
+    for nombre, funcion in pruebas:
+        segundos, resultados[nombre] = medir(funcion, args.repeticiones)
+        print(f"  {nombre:<24} {args.paquetes / segundos:>12,.0f} resúmenes/s  "
+              f"({segundos / args.paquetes * 1e6:6.1f} µs/paquete)")
+
+    if not resultados["haslayer"] == resultados["clasificar"] == resultados["clasificar_lote (crudo)"]:
+        print("\nFALLO: el clasificador no coincide con la cadena de haslayer.", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
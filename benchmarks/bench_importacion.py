@@ -0,0 +1,92 @@
+"""
+Benchmark del tiempo de importación en frío de la aplicación.
+
+Ejecuta `python -X importtime -c "import <módulo>"` en procesos nuevos (sin
+módulos ya cargados), lee el informe que Python escribe en stderr y muestra
+el tiempo acumulado del módulo y los módulos que más tardan en cargarse.
+
+Sirve como presupuesto de regresión: termina con código 1 si el tiempo supera
+el presupuesto o si la importación arrastra Scapy, que debe cargarse solo
+cuando se abre una vista que lo necesita.
+
+Uso:
+    python benchmarks/bench_importacion.py [--modulo gui.main] [--presupuesto 400] [--repeticiones 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def medir_importacion(modulo):
+    """
+    Importa `modulo` en un intérprete nuevo con `-X importtime`.
+
+    Args:
+        modulo (str): Nombre del módulo a importar (ej. "gui.main").
+
+    Returns:
+        list[tuple[str, int, int]]: Para cada módulo cargado, su nombre, su
+                                    tiempo propio y su tiempo acumulado en µs.
+
+    Raises:
+        RuntimeError: Si la importación falla.
+    """
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                             cwd=RAIZ_PROYECTO, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{proceso.stderr.strip().splitlines()[-1]}")
+    registros = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        registros.append((nombre.strip(), int(propio), int(acumulado)))
+    return registros
+
+def main():
+    """Ejecuta el benchmark y devuelve el código de salida."""
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación en frío de la aplicación.")
+    parser.add_argument("--modulo", default="gui.main", help="Módulo a importar (por defecto, gui.main).")
+    parser.add_argument("--presupuesto", type=float, default=400.0,
+                        help="Tiempo máximo de importación en milisegundos (por defecto, 400).")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Número de mediciones; se usa la mejor.")
+    parser.add_argument("--top", type=int, default=10, help="Número de módulos más lentos que se muestran.")
+    parser.add_argument("--permitir-scapy", action="store_true",
+                        help="No considerar un fallo que la importación cargue Scapy.")
+    args = parser.parse_args()
+
+    mejor = None
+    for _ in range(args.repeticiones):
+        try:
+            registros = medir_importacion(args.modulo)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+        total = next(acumulado for nombre, _, acumulado in registros if nombre == args.modulo)
+        if mejor is None or total < mejor[0]:
+            mejor = (total, registros)
+    total_us, registros = mejor
+
+    print(f"Importación de {args.modulo}: {total_us / 1000:.1f} ms "
+          f"({len(registros)} módulos, mejor de {args.repeticiones})")
+    print("\nMódulos con mayor tiempo propio:")
+    for nombre, propio, acumulado in sorted(registros, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {propio / 1000:8.1f} ms  (acum. {acumulado / 1000:8.1f} ms)  {nombre}")
+
+    fallo = False
+    modulos_scapy = [nombre for nombre, _, _ in registros if nombre == "scapy" or nombre.startswith("scapy.")]
+    if modulos_scapy and not args.permitir_scapy:
+        print(f"\nFALLO: la importación carga Scapy ({len(modulos_scapy)} módulos).")
+        fallo = True
+    if total_us / 1000 > args.presupuesto:
+        print(f"\nFALLO: {total_us / 1000:.1f} ms supera el presupuesto de {args.presupuesto:.0f} ms.")
+        fallo = True
+    if not fallo:
+        print(f"\nOK: dentro del presupuesto de {args.presupuesto:.0f} ms.")
+    return 1 if fallo else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Módulo del almacén de paquetes en disco.
+
+Las vistas guardaban todos los paquetes de la sesión en una lista en memoria,
+que en una captura larga (por ejemplo, durante toda una noche) crece sin
+límite. Este archivo define `PacketStore`, una secuencia de solo añadido que
+escribe las tramas en crudo en archivos de segmento temporales y conserva en
+memoria solo la posición de cada una y una caché LRU con los últimos paquetes
+diseccionados, de modo que el consumo de memoria se mantiene casi constante.
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+from array import array
+from scapy.packet import Packet
+from core.paquetes import CacheLRU, PaqueteCrudo
+
+# Cabecera de cada registro: marca de tiempo, longitud capturada, longitud
+# original (0 si coincide), tipo de enlace e índice del nombre de la interfaz.
+CABECERA_REGISTRO = struct.Struct("<dIIHH")
+# Las posiciones se codifican como (segmento << BITS_DESPLAZAMIENTO) | desplazamiento.
+BITS_DESPLAZAMIENTO = 40
+
+def _borrar_directorio(segmentos, directorio):
+    """Cierra los segmentos y borra el directorio temporal (también al salir del programa)."""
+    for f in segmentos:
+        f.close()
+    shutil.rmtree(directorio, ignore_errors=True)
+
+class PacketStore:
+    """
+    Secuencia de paquetes respaldada por disco, con una ventana LRU en memoria.
+
+    Se usa como una lista de solo añadido: `append(paquete)`, `len(store)`,
+    `store[i]` (que devuelve la trama como `PaqueteCrudo`) e iteración en
+    orden. `decodificado(i)` devuelve el paquete diseccionado por Scapy,
+    guardándolo en la caché LRU. Los registros se acumulan en un búfer y se
+    escriben al segmento actual por bloques; al llenarse un segmento se
+    empieza otro. Los archivos se borran con `close()` o al salir del programa.
+
+    No es thread-safe: está pensado para usarse desde el hilo de la GUI.
+    """
+    def __init__(self, directorio=None, tamano_segmento=64 * 1024 * 1024, capacidad_cache=256,
+                 tamano_bufer=1024 * 1024):
+        """
+        Args:
+            directorio (str, optional): Carpeta donde crear los segmentos. Por
+                                        defecto, la carpeta temporal del sistema.
+            tamano_segmento (int): Tamaño a partir del cual se empieza un segmento nuevo.
+            capacidad_cache (int): Paquetes diseccionados que se conservan en memoria.
+            tamano_bufer (int): Bytes que se acumulan antes de escribir a disco.
+
+        Raises:
+            ValueError: Si el tamaño de segmento no es válido.
+        """
+        if not 0 < tamano_segmento < 1 << BITS_DESPLAZAMIENTO:
+            raise ValueError("tamano_segmento fuera de rango.")
+        self.tamano_segmento = tamano_segmento
+        self.tamano_bufer = tamano_bufer
+        self.cache = CacheLRU(capacidad_cache)
+        self._directorio = tempfile.mkdtemp(prefix="cybertrainer-", dir=directorio)
+        self._segmentos = []  # Archivos de segmento, abiertos para lectura y escritura.
+        self._posiciones = array("Q")
+        self._interfaces = [None]  # Nombres de interfaz; el índice 0 es "desconocida".
+        self._id_interfaz = {None: 0}
+        self._bufer = bytearray()
+        self._escrito = 0  # Bytes del segmento actual que ya están en disco.
+        self._finalizador = weakref.finalize(self, _borrar_directorio, self._segmentos, self._directorio)
+
+    def append(self, paquete):
+        """
+        Añade un paquete al final del almacén.
+
+        Args:
+            paquete (PaqueteCrudo | scapy.packet.Packet): El paquete. Si ya está
+                diseccionado (por ejemplo, uno simulado), se guarda además en
+                la caché para no tener que volver a diseccionarlo.
+        """
+        indice = len(self._posiciones)
+        if isinstance(paquete, Packet):
+            self.cache.guardar(indice, paquete)
+            paquete = PaqueteCrudo.desde_paquete(paquete)
+        id_interfaz = self._id_interfaz.get(paquete.sniffed_on)
+        if id_interfaz is None:
+            id_interfaz = self._id_interfaz[paquete.sniffed_on] = len(self._interfaces)
+            self._interfaces.append(paquete.sniffed_on)
+        datos = paquete.datos
+        tamano = CABECERA_REGISTRO.size + len(datos)
+        if not self._segmentos or (self._escrito + len(self._bufer) + tamano > self.tamano_segmento
+                                   and self._escrito + len(self._bufer) > 0):
+            self._nuevo_segmento()
+        desplazamiento = self._escrito + len(self._bufer)
+        self._posiciones.append(((len(self._segmentos) - 1) << BITS_DESPLAZAMIENTO) | desplazamiento)
+        self._bufer += CABECERA_REGISTRO.pack(paquete.time, len(datos), paquete.wirelen or 0,
+                                              paquete.linktype, id_interfaz)
+        self._bufer += datos
+        if len(self._bufer) >= self.tamano_bufer:
+            self._vaciar()
+
+    def _vaciar(self):
+        """Escribe el búfer pendiente al final del segmento actual."""
+        if self._bufer:
+            f = self._segmentos[-1]
+            f.seek(self._escrito)
+            f.write(self._bufer)
+            self._escrito += len(self._bufer)
+            self._bufer.clear()
+
+    def _nuevo_segmento(self):
+        """Cierra el segmento en curso (volcando su búfer) y crea el siguiente."""
+        if self._segmentos:
+            self._vaciar()
+        ruta = os.path.join(self._directorio, f"segmento_{len(self._segmentos):05d}.bin")
+        self._segmentos.append(open(ruta, "w+b", buffering=0))
+        self._escrito = 0
+
+    def _leer(self, segmento, desplazamiento, tamano):
+        """Lee bytes de un segmento, incluida la parte que aún está en el búfer."""
+        if segmento == len(self._segmentos) - 1 and desplazamiento >= self._escrito:
+            inicio = desplazamiento - self._escrito
+            return bytes(self._bufer[inicio:inicio + tamano])
+        f = self._segmentos[segmento]
+        f.seek(desplazamiento)
+        return f.read(tamano)
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    def __getitem__(self, i):
+        """
+        Devuelve la trama i como `PaqueteCrudo`, leyéndola del disco.
+
+        Raises:
+            IndexError: Si `i` está fuera de rango.
+        """
+        posicion = self._posiciones[i]
+        segmento = posicion >> BITS_DESPLAZAMIENTO
+        desplazamiento = posicion & ((1 << BITS_DESPLAZAMIENTO) - 1)
+        cabecera = self._leer(segmento, desplazamiento, CABECERA_REGISTRO.size)
+        marca, caplen, wirelen, linktype, id_interfaz = CABECERA_REGISTRO.unpack(cabecera)
+        datos = self._leer(segmento, desplazamiento + CABECERA_REGISTRO.size, caplen)
+        return PaqueteCrudo(datos, marca, linktype, self._interfaces[id_interfaz], wirelen or None)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def decodificado(self, i):
+        """
+        Devuelve el paquete i diseccionado por Scapy, usando la caché LRU.
+
+        Args:
+            i (int): Índice del paquete (admite índices negativos).
+
+        Returns:
+            scapy.packet.Packet: El paquete diseccionado.
+
+        Raises:
+            IndexError: Si `i` está fuera de rango.
+        """
+        if i < 0:
+            i += len(self)
+        packet = self.cache.obtener(i)
+        if packet is None:
+            packet = self[i].decodificar()
+            self.cache.guardar(i, packet)
+        return packet
+
+    def clear(self):
+        """Elimina todos los paquetes y sus segmentos en disco."""
+        for f in self._segmentos:
+            f.close()
+            os.remove(f.name)
+        self._segmentos.clear()
+        self._posiciones = array("Q")
+        self._interfaces[1:] = []
+        self._id_interfaz = {None: 0}
+        self._bufer.clear()
+        self._escrito = 0
+        self.cache.clear()
+
+    def close(self):
+        """Elimina los paquetes y el directorio temporal. El almacén no se puede volver a usar."""
+        self._finalizador()
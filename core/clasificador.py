@@ -0,0 +1,141 @@
+"""
+Módulo de clasificación de paquetes.
+
+Este archivo extrae de un paquete los campos que se muestran en la lista de
+paquetes de las vistas (hora, origen, destino, protocolo, longitud y resumen)
+(y los puertos, si los hay) y los devuelve como un registro compacto
+`ResumenPaquete`. Es el único punto de la aplicación que hace esta extracción:
+lo usan la captura en vivo, la importación de archivos, el simulador y los
+procesos de `core.diseccion`. Al trabajar también sobre tramas en crudo, puede
+ejecutarse en procesos separados sin tener que enviar objetos de Scapy entre
+procesos.
+
+Como se ejecuta una vez por paquete, en lugar de la cadena de `haslayer` (que
+recorre el paquete desde el principio por cada capa buscada) se recorre el
+paquete una sola vez para obtener su "firma" (la tupla de clases de sus capas)
+y se consulta una tabla de despacho memoizada con la forma de extraer los
+campos para esa firma.
+"""
+
+from collections import namedtuple
+from scapy.packet import NoPayload
+from scapy.layers.inet import IP, TCP, UDP
+from scapy.layers.l2 import ARP
+from core.paquetes import PaqueteCrudo
+
+# Los puertos solo existen en TCP y UDP; en el resto de paquetes son None.
+ResumenPaquete = namedtuple("ResumenPaquete", ["time", "src", "dst", "proto", "length", "info", "sport", "dport"],
+                            defaults=(None, None))
+
+# Máximo de firmas distintas en la tabla de despacho. El tráfico normal tiene
+# unas pocas decenas; el límite solo evita que crezca sin fin con tráfico raro.
+MAX_FIRMAS = 1024
+
+# Tabla de despacho: firma de capas -> función que extrae (proto, src, dst,
+# sport, dport) de la lista de capas del paquete.
+_extractores = {}
+
+def _primera(firma, clase):
+    """
+    Devuelve la posición de la primera capa de la clase `clase`, o None.
+
+    Como `haslayer`, compara la clase exacta: las subclases como `IPerror` o
+    `TCPerror` (la cabecera original citada dentro de un error ICMP) no cuentan.
+    """
+    return next((i for i, capa in enumerate(firma) if capa is clase), None)
+
+def _sin_direcciones(capas):
+    return "N/A", "N/A", "N/A", None, None
+
+def _crear_extractor(firma):
+    """
+    Construye la función de extracción para una firma de capas.
+
+    Sigue la misma cadena IP -> TCP/UDP -> ARP que las comprobaciones con
+    `haslayer`, pero las posiciones de las capas se resuelven una sola vez por
+    firma.
+
+    Args:
+        firma (tuple[type]): Las clases de las capas del paquete, en orden.
+
+    Returns:
+        function: Recibe la lista de capas y devuelve (proto, src, dst, sport, dport).
+    """
+    i_ip = _primera(firma, IP)
+    if i_ip is not None:
+        i_tcp, i_udp = _primera(firma, TCP), _primera(firma, UDP)
+        i_puertos = i_tcp if i_tcp is not None else i_udp
+        if i_puertos is None:
+            def extraer(capas):
+                ip = capas[i_ip]
+                return "IP", ip.src, ip.dst, None, None
+            return extraer
+        proto = "TCP" if i_tcp is not None else "UDP"
+        def extraer(capas):
+            ip, transporte = capas[i_ip], capas[i_puertos]
+            return proto, ip.src, ip.dst, transporte.sport, transporte.dport
+        return extraer
+    i_arp = _primera(firma, ARP)
+    if i_arp is not None:
+        def extraer(capas):
+            arp = capas[i_arp]
+            return "ARP", arp.psrc, arp.pdst, None, None
+        return extraer
+    return _sin_direcciones
+
+def clasificar(packet):
+    """
+    Obtiene el resumen de un paquete de Scapy.
+
+    Args:
+        packet (scapy.packet.Packet): El paquete a clasificar.
+
+    Returns:
+        ResumenPaquete: Los campos que se muestran en la lista de paquetes.
+    """
+    # Recorrer las capas una sola vez.
+    capas = []
+    capa = packet
+    while not isinstance(capa, NoPayload):
+        capas.append(capa)
+        capa = capa.payload
+    firma = tuple(type(capa) for capa in capas)
+    extraer = _extractores.get(firma)
+    if extraer is None:
+        if len(_extractores) >= MAX_FIRMAS:
+            _extractores.clear()
+        extraer = _extractores[firma] = _crear_extractor(firma)
+    proto, src, dst, sport, dport = extraer(capas)
+    # Si la trama se capturó truncada (snaplen), se muestra su longitud original.
+    # Un paquete diseccionado conserva sus bytes en `original`; medirlos evita
+    # reconstruir el paquete entero, que es lo que hace len(packet).
+    length = getattr(packet, "wirelen", None) or len(getattr(packet, "original", None) or packet)
+    return ResumenPaquete(float(packet.time), src, dst, proto, length, packet.summary(), sport, dport)
+
+def clasificar_lote(paquetes):
+    """
+    Clasifica varios paquetes de una vez.
+
+    Args:
+        paquetes (list): Paquetes de Scapy o tramas en crudo (`PaqueteCrudo`),
+                         que se diseccionan antes de clasificarlas.
+
+    Returns:
+        list[ResumenPaquete]: El resumen de cada paquete, en el mismo orden.
+    """
+    return [clasificar(p.decodificar() if isinstance(p, PaqueteCrudo) else p) for p in paquetes]
+
+def clasificar_trama(datos, time, linktype, wirelen=None):
+    """
+    Disecciona una trama en crudo y devuelve su resumen.
+
+    Args:
+        datos (bytes): Los bytes de la trama.
+        time (float): Marca de tiempo de la captura.
+        linktype (int): Tipo de enlace (DLT) de la trama.
+        wirelen (int, optional): Longitud original si la trama está truncada.
+
+    Returns:
+        ResumenPaquete: Los campos que se muestran en la lista de paquetes.
+    """
+    return clasificar(PaqueteCrudo(datos, time, linktype, wirelen=wirelen).decodificar())
@@ -0,0 +1,190 @@
+"""
+Módulo de la cola acotada entre la captura y la interfaz gráfica.
+
+Un `queue.Queue` sin límite crece indefinidamente si la GUI no consigue
+mostrar los paquetes al ritmo al que llegan, hasta agotar la memoria del
+proceso. `ColaAcotada` limita el número de paquetes en espera y aplica una
+política configurable cuando se llena:
+
+- "descartar_nuevo": se descartan los paquetes que llegan.
+- "descartar_antiguo": se descartan los paquetes más antiguos de la cola.
+- "bloquear": el productor espera a que haya hueco (como máximo
+  `max_block_time` segundos, tras lo cual el lote se descarta).
+
+Lleva además la cuenta de paquetes encolados, descartados y de la ocupación
+máxima alcanzada, para mostrarla en la vista del monitor. Opcionalmente avisa
+al consumidor cuando la cola pasa de vacía a tener elementos, de modo que la
+GUI no necesita consultarla periódicamente.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+POLITICA_DESCARTAR_NUEVO = "descartar_nuevo"
+POLITICA_DESCARTAR_ANTIGUO = "descartar_antiguo"
+POLITICA_BLOQUEAR = "bloquear"
+POLITICAS = (POLITICA_DESCARTAR_NUEVO, POLITICA_DESCARTAR_ANTIGUO, POLITICA_BLOQUEAR)
+
+class ColaAcotada:
+    """
+    Cola thread-safe con capacidad máxima medida en paquetes.
+
+    Los elementos pueden ser paquetes sueltos o listas (lotes) de paquetes;
+    un lote ocupa tantas plazas como paquetes contiene. Expone el mismo
+    subconjunto de métodos de `queue.Queue` que usan las vistas (`put`,
+    `get_nowait`, `empty`, `qsize`), de modo que puede sustituirla directamente.
+    """
+    def __init__(self, maxsize, policy=POLITICA_DESCARTAR_NUEVO, max_block_time=1.0, aviso=None):
+        """
+        Args:
+            maxsize (int): Número máximo de paquetes en espera.
+            policy (str): Una de las políticas de `POLITICAS`.
+            max_block_time (float): Con la política "bloquear", tiempo máximo
+                                    que espera el productor antes de descartar.
+            aviso (function, optional): Se llama sin argumentos cada vez que la
+                cola pasa de vacía a tener elementos. Se ejecuta en el hilo
+                productor y sin el candado tomado, y debe volver enseguida: si
+                espera al consumidor (por ejemplo, en `event_generate` mientras
+                la GUI hace `join` del productor), los dos quedan bloqueados.
+
+        Raises:
+            ValueError: Si la capacidad o la política no son válidas.
+        """
+        if maxsize < 1:
+            raise ValueError("La capacidad de la cola debe ser al menos 1.")
+        if policy not in POLITICAS:
+            raise ValueError(f"Política de desbordamiento desconocida: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_block_time = max_block_time
+        self.aviso = aviso
+        self._items = deque()
+        self._ocupacion = 0
+        self._cond = threading.Condition()
+        self.encolados = 0
+        self.descartados = 0
+        self.maximo = 0  # Máxima ocupación alcanzada (high-water mark).
+
+    @staticmethod
+    def _peso(item):
+        """Número de paquetes que representa un elemento."""
+        return len(item) if isinstance(item, list) else 1
+
+    def put(self, item, forzar=False):
+        """
+        Añade un paquete o un lote a la cola aplicando la política de desbordamiento.
+
+        Args:
+            item (object | list): Un paquete o una lista de paquetes.
+            forzar (bool): Añadir el elemento aunque la cola esté llena, sin
+                           esperar ni descartar nada. Es para los mensajes que
+                           no pueden perderse (ej. el fin de una simulación);
+                           la ocupación puede superar la capacidad por ellos.
+        """
+        peso = self._peso(item)
+        if not peso:
+            return
+        with self._cond:
+            libre = self.maxsize - self._ocupacion
+            if peso > libre and not forzar:
+                if self.policy == POLITICA_BLOQUEAR:
+                    limite = time.monotonic() + self.max_block_time
+                    while peso > self.maxsize - self._ocupacion:
+                        restante = limite - time.monotonic()
+                        if restante <= 0:
+                            break
+                        self._cond.wait(restante)
+                    libre = self.maxsize - self._ocupacion
+                elif self.policy == POLITICA_DESCARTAR_ANTIGUO:
+                    libre = self._descartar_antiguos(peso - libre)
+                if peso > libre:
+                    # Descartar lo que no cabe del elemento entrante.
+                    if not isinstance(item, list) or libre <= 0:
+                        self.descartados += peso
+                        return
+                    self.descartados += peso - libre
+                    item = item[:libre]
+                    peso = libre
+            # Se comprueba justo antes de añadir: durante la espera de la política
+            # "bloquear" el consumidor puede haber vaciado la cola y dejado de
+            # consultarla, y entonces necesita un aviso nuevo.
+            estaba_vacia = not self._items
+            self._items.append(item)
+            self._ocupacion += peso
+            self.encolados += peso
+            if self._ocupacion > self.maximo:
+                self.maximo = self._ocupacion
+        if estaba_vacia and self.aviso is not None:
+            self.aviso()
+
+    def _descartar_antiguos(self, necesarios):
+        """
+        Libera al menos `necesarios` plazas descartando los paquetes más antiguos.
+
+        Debe llamarse con el candado tomado.
+
+        Returns:
+            int: Plazas libres tras el descarte.
+        """
+        while necesarios > 0 and self._items:
+            antiguo = self._items[0]
+            peso = self._peso(antiguo)
+            if isinstance(antiguo, list) and peso > necesarios:
+                del antiguo[:necesarios]
+                self._ocupacion -= necesarios
+                self.descartados += necesarios
+                break
+            self._items.popleft()
+            self._ocupacion -= peso
+            self.descartados += peso
+            necesarios -= peso
+        return self.maxsize - self._ocupacion
+
+    def get_nowait(self):
+        """
+        Extrae el elemento más antiguo sin esperar.
+
+        Raises:
+            queue.Empty: Si la cola está vacía.
+        """
+        with self._cond:
+            if not self._items:
+                raise queue.Empty
+            item = self._items.popleft()
+            self._ocupacion -= self._peso(item)
+            self._cond.notify_all()
+            return item
+
+    def empty(self):
+        """Indica si la cola está vacía."""
+        with self._cond:
+            return not self._items
+
+    def qsize(self):
+        """Devuelve el número de paquetes en espera."""
+        with self._cond:
+            return self._ocupacion
+
+    def clear(self):
+        """Vacía la cola y reinicia los contadores."""
+        with self._cond:
+            self._items.clear()
+            self._ocupacion = 0
+            self.encolados = 0
+            self.descartados = 0
+            self.maximo = 0
+            self._cond.notify_all()
+
+    def estadisticas(self):
+        """
+        Devuelve una instantánea de los contadores de la cola.
+
+        Returns:
+            dict: Con las claves "encolados", "descartados", "maximo",
+                  "ocupacion" y "capacidad".
+        """
+        with self._cond:
+            return {"encolados": self.encolados, "descartados": self.descartados, "maximo": self.maximo,
+                    "ocupacion": self._ocupacion, "capacidad": self.maxsize}
@@ -0,0 +1,113 @@
+"""
+Módulo de disección en paralelo.
+
+La disección de paquetes con Scapy y la extracción de su resumen se ejecutan
+bajo el GIL, por lo que en un único proceso no escalan con el número de
+núcleos. Este archivo define `EtapaDiseccion`, una etapa opcional del
+pipeline de captura que envía las tramas en crudo, por trozos, a un
+`multiprocessing.Pool`. Los procesos trabajadores devuelven registros
+`ResumenPaquete` compactos y la etapa los entrega en el mismo orden en que
+llegaron las tramas.
+"""
+
+import multiprocessing
+import threading
+from collections import deque
+from core.clasificador import clasificar_trama
+
+def _resumir_trozo(trozo):
+    """
+    Función ejecutada en los procesos trabajadores.
+
+    Args:
+        trozo (list[tuple]): Tuplas (datos, time, linktype, wirelen) de cada trama.
+
+    Returns:
+        list[ResumenPaquete]: El resumen de cada trama, en el mismo orden.
+    """
+    return [clasificar_trama(datos, ts, linktype, wirelen) for datos, ts, linktype, wirelen in trozo]
+
+class EtapaDiseccion:
+    """
+    Etapa del pipeline que resume tramas en crudo usando varios procesos.
+
+    Recibe lotes de `PaqueteCrudo` con `enviar()` y llama a `callback` con
+    listas de tuplas (paquete, resumen) en el orden original. El número de
+    trozos en vuelo está acotado: si los trabajadores no dan abasto, `enviar`
+    bloquea al productor en lugar de acumular memoria sin límite.
+    """
+    def __init__(self, callback, processes=None, chunk_size=256, max_in_flight=None):
+        """
+        Crea el pool de procesos y el hilo que recoge los resultados.
+
+        Args:
+            callback (function): Recibe cada lista de tuplas (paquete, resumen).
+            processes (int, optional): Número de procesos trabajadores. Por
+                                       defecto, uno por núcleo.
+            chunk_size (int): Número de tramas que se envían en cada trozo.
+            max_in_flight (int, optional): Máximo de trozos pendientes. Por
+                                           defecto, el doble de procesos.
+        """
+        self.callback = callback
+        self.chunk_size = chunk_size
+        self.processes = processes or multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(self.processes)
+        self._pendientes = deque()
+        self._hay_pendientes = threading.Condition()
+        self._huecos = threading.BoundedSemaphore(max_in_flight or 2 * self.processes)
+        self._cerrando = False
+        self._thread = threading.Thread(target=self._recoger, daemon=True)
+        self._thread.start()
+
+    def enviar(self, paquetes):
+        """
+        Envía un lote de tramas a los trabajadores, dividido en trozos.
+
+        Las tramas que llegan después de `close()` (por ejemplo, el último lote
+        de un captor que se está deteniendo) se descartan.
+
+        Args:
+            paquetes (list[PaqueteCrudo]): Las tramas a resumir.
+        """
+        for i in range(0, len(paquetes), self.chunk_size):
+            trozo = paquetes[i:i + self.chunk_size]
+            self._huecos.acquire()
+            if self._cerrando:
+                self._huecos.release()
+                return
+            resultado = self._pool.apply_async(_resumir_trozo, ([(p.datos, p.time, p.linktype, p.wirelen) for p in trozo],))
+            with self._hay_pendientes:
+                self._pendientes.append((trozo, resultado))
+                self._hay_pendientes.notify()
+
+    def _recoger(self):
+        """
+        Bucle del hilo recolector: espera los resultados en orden de envío.
+
+        Como los trozos se encolan en el orden en que llegan, esperar siempre
+        al primero garantiza que el callback los reciba en orden aunque los
+        trabajadores terminen en otro orden.
+        """
+        while True:
+            with self._hay_pendientes:
+                while not self._pendientes and not self._cerrando:
+                    self._hay_pendientes.wait()
+                if not self._pendientes:
+                    return
+                trozo, resultado = self._pendientes.popleft()
+            try:
+                resumenes = resultado.get()
+                self.callback(list(zip(trozo, resumenes)))
+            except Exception as e:
+                print(f"Error al diseccionar un trozo de {len(trozo)} paquetes: {e}")
+            finally:
+                self._huecos.release()
+
+    def close(self):
+        """Entrega los trozos pendientes y cierra el pool de procesos."""
+        with self._hay_pendientes:
+            self._cerrando = True
+            self._hay_pendientes.notify()
+        self._thread.join()
+        self._pool.close()
+        self._pool.join()
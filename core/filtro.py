@@ -0,0 +1,369 @@
+"""
+Módulo de filtros de visualización.
+
+Implementa un pequeño lenguaje de filtros al estilo de Wireshark para la
+lista de paquetes, por ejemplo:
+
+    ip.src == 10.0.0.5 and tcp.dport in {80, 443}
+    not arp and frame.len > 1000
+    ip.addr == 192.168.1.0/24 or info contains "SYN"
+
+La expresión se analiza una sola vez y se compila a dos formas equivalentes:
+una máscara vectorizada sobre las columnas de una `TablaResumen` (para
+filtrar de golpe millones de filas) y un predicado de Python sobre un
+`ResumenPaquete` (para decidir, uno a uno, si se muestran los paquetes que
+van llegando).
+"""
+
+import ipaddress
+import operator
+import re
+import numpy as np
+from core.tabla_resumen import CODIGO_PROTOCOLO, ip_a_entero
+
+# Protocolos que tienen cabecera IP (y, por tanto, ip.src/ip.dst).
+_NOMBRES_IP = ("IP", "TCP", "UDP")
+
+# Campos del lenguaje: (columnas de la tabla, atributos del resumen, tipo,
+# protocolos en los que existe el campo). Si un campo tiene dos columnas
+# (ej. ip.addr), `==` se cumple si coincide cualquiera de ellas.
+_CAMPOS = {
+    "ip.src": (("origen",), ("src",), "ip", _NOMBRES_IP),
+    "ip.dst": (("destino",), ("dst",), "ip", _NOMBRES_IP),
+    "ip.addr": (("origen", "destino"), ("src", "dst"), "ip", _NOMBRES_IP),
+    "arp.src": (("origen",), ("src",), "ip", ("ARP",)),
+    "arp.dst": (("destino",), ("dst",), "ip", ("ARP",)),
+    "tcp.srcport": (("puerto_origen",), ("sport",), "int", ("TCP",)),
+    "tcp.dstport": (("puerto_destino",), ("dport",), "int", ("TCP",)),
+    "tcp.port": (("puerto_origen", "puerto_destino"), ("sport", "dport"), "int", ("TCP",)),
+    "udp.srcport": (("puerto_origen",), ("sport",), "int", ("UDP",)),
+    "udp.dstport": (("puerto_destino",), ("dport",), "int", ("UDP",)),
+    "udp.port": (("puerto_origen", "puerto_destino"), ("sport", "dport"), "int", ("UDP",)),
+    "frame.len": (("longitud",), ("length",), "int", None),
+    "frame.time_epoch": (("tiempo",), ("time",), "float", None),
+    "info": (("info",), ("info",), "str", None),
+}
+# Nombres alternativos de algunos campos.
+_ALIAS = {"tcp.sport": "tcp.srcport", "tcp.dport": "tcp.dstport", "udp.sport": "udp.srcport",
+          "udp.dport": "udp.dstport", "len": "frame.len", "frame.info": "info"}
+# Nombres de protocolo que, solos, filtran por su presencia.
+_PROTOCOLOS = {"ip": _NOMBRES_IP, "tcp": ("TCP",), "udp": ("UDP",), "arp": ("ARP",)}
+
+_OPERADORES = {
+    "==": operator.eq, "eq": operator.eq, "!=": operator.ne, "ne": operator.ne,
+    ">": operator.gt, "gt": operator.gt, "<": operator.lt, "lt": operator.lt,
+    ">=": operator.ge, "ge": operator.ge, "<=": operator.le, "le": operator.le,
+}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<cadena>"(?:[^"\\]|\\.)*")
+      | (?P<simbolo>==|!=|>=|<=|&&|\|\||[<>!(){},])
+      | (?P<palabra>[A-Za-z0-9_.:/-]+)
+    )""", re.VERBOSE)
+
+def _tokenizar(texto):
+    """Divide la expresión en tokens (tipo, valor, posición)."""
+    tokens = []
+    pos = 0
+    texto = texto.rstrip()
+    while pos < len(texto):
+        m = _TOKEN.match(texto, pos)
+        if not m or m.end() == pos:
+            pos += len(texto[pos:]) - len(texto[pos:].lstrip())
+            raise ValueError(f"Carácter inesperado en la posición {pos + 1}: {texto[pos]!r}")
+        tipo = m.lastgroup
+        valor = m.group(tipo)
+        if tipo == "cadena":
+            valor = re.sub(r"\\(.)", r"\1", valor[1:-1])
+        tokens.append((tipo, valor, m.start(tipo)))
+        pos = m.end()
+    return tokens
+
+class _Columnas:
+    """Acceso perezoso a las columnas de una tabla a partir de una fila."""
+    def __init__(self, tabla, desde):
+        self.tabla = tabla
+        self.desde = desde
+        self._cache = {}
+
+    def __getitem__(self, nombre):
+        if nombre not in self._cache:
+            self._cache[nombre] = self.tabla.columna(nombre)[self.desde:]
+        return self._cache[nombre]
+
+    def presente(self, protocolos):
+        """Máscara de las filas cuyo protocolo está en `protocolos` (None: todas)."""
+        codigos = self["protocolo"]
+        if protocolos is None:
+            return np.ones(len(codigos), dtype=bool)
+        return np.isin(codigos, [CODIGO_PROTOCOLO[p] for p in protocolos])
+
+class _Presencia:
+    """Nodo `tcp`, `udp`, `arp`, `ip`: el paquete es de ese protocolo."""
+    def __init__(self, protocolos):
+        self.protocolos = protocolos
+
+    def mascara(self, cols):
+        return cols.presente(self.protocolos)
+
+    def predicado(self):
+        protocolos = frozenset(self.protocolos)
+        return lambda r: r.proto in protocolos
+
+class _Comparacion:
+    """Nodo `campo <op> valor`, `campo contains "texto"` o `campo in {...}`."""
+    def __init__(self, campo, operador, valores):
+        self.columnas, self.atributos, self.tipo, self.protocolos = _CAMPOS[campo]
+        self.operador = operador
+        self.valores = valores  # Lista de valores ya convertidos; más de uno solo con `in`.
+
+    def _mascara_columna(self, cols, columna):
+        datos = cols[columna]
+        if self.tipo == "str":
+            # Se evalúa una vez por cadena distinta y se reparte con la columna de identificadores.
+            textos = cols.tabla.textos
+            if self.operador == "contains":
+                por_texto = np.fromiter((self.valores[0] in t for t in textos), dtype=bool, count=len(textos))
+            else:
+                por_texto = np.fromiter((t in self.valores for t in textos), dtype=bool, count=len(textos))
+            return por_texto[datos] if len(textos) else np.zeros(len(datos), dtype=bool)
+        # La negación de `!=` se aplica después, sobre todas las columnas del campo.
+        op = operator.eq if self.operador in ("==", "eq", "!=", "ne", "in") else _OPERADORES[self.operador]
+        mascara = np.zeros(len(datos), dtype=bool)
+        for valor in self.valores:
+            if self.tipo == "ip" and isinstance(valor, tuple):
+                red, bits = valor
+                mascara |= (datos & np.uint32(bits)) == np.uint32(red)
+            else:
+                mascara |= op(datos, valor)
+        return mascara
+
+    def mascara(self, cols):
+        negado = self.operador in ("!=", "ne")
+        mascara = np.zeros(len(cols["protocolo"]), dtype=bool)
+        for columna in self.columnas:
+            mascara |= self._mascara_columna(cols, columna)
+        if negado:
+            # `a != x` equivale a `not a == x`, pero solo en los paquetes que tienen el campo.
+            mascara = ~mascara
+        return mascara & cols.presente(self.protocolos)
+
+    def predicado(self):
+        atributos, protocolos, valores = self.atributos, self.protocolos, self.valores
+        negado = self.operador in ("!=", "ne")
+        if self.tipo == "str":
+            if self.operador == "contains":
+                texto = valores[0]
+                comparar = lambda v: texto in v
+            else:
+                conjunto = frozenset(valores)
+                comparar = lambda v: v in conjunto
+        elif self.tipo == "ip":
+            exactos = frozenset(v for v in valores if not isinstance(v, tuple))
+            redes = [v for v in valores if isinstance(v, tuple)]
+            if self.operador in ("==", "eq", "!=", "ne", "in"):
+                def comparar(v):
+                    n = ip_a_entero(v)
+                    return n in exactos or any(n & bits == red for red, bits in redes)
+            else:
+                op, valor = _OPERADORES[self.operador], valores[0]
+                comparar = lambda v: op(ip_a_entero(v), valor)
+        elif self.operador in ("==", "eq", "!=", "ne", "in"):
+            conjunto = frozenset(valores)
+            comparar = lambda v: v in conjunto
+        else:
+            op, valor = _OPERADORES[self.operador], valores[0]
+            comparar = lambda v: op(v, valor)
+
+        def predicado(r):
+            if protocolos is not None and r.proto not in protocolos:
+                return False
+            coincide = any(comparar(getattr(r, a)) for a in atributos)
+            return not coincide if negado else coincide
+        return predicado
+
+class _Logico:
+    """Nodos `and`, `or` y `not`."""
+    def __init__(self, tipo, hijos):
+        self.tipo = tipo
+        self.hijos = hijos
+
+    def mascara(self, cols):
+        if self.tipo == "not":
+            return ~self.hijos[0].mascara(cols)
+        mascara = self.hijos[0].mascara(cols)
+        for hijo in self.hijos[1:]:
+            if self.tipo == "and":
+                mascara &= hijo.mascara(cols)
+            else:
+                mascara |= hijo.mascara(cols)
+        return mascara
+
+    def predicado(self):
+        predicados = [h.predicado() for h in self.hijos]
+        if self.tipo == "not":
+            p = predicados[0]
+            return lambda r: not p(r)
+        if self.tipo == "and":
+            return lambda r: all(p(r) for p in predicados)
+        return lambda r: any(p(r) for p in predicados)
+
+class _Analizador:
+    """Analizador descendente recursivo del lenguaje de filtros."""
+    def __init__(self, texto):
+        self.texto = texto
+        self.tokens = _tokenizar(texto)
+        self.pos = 0
+
+    def _actual(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None, len(self.texto))
+
+    def _error(self, mensaje):
+        raise ValueError(f"{mensaje} (posición {self._actual()[2] + 1})")
+
+    def _aceptar(self, *valores):
+        tipo, valor, _ = self._actual()
+        if tipo in ("simbolo", "palabra") and (valor.lower() if tipo == "palabra" else valor) in valores:
+            self.pos += 1
+            return True
+        return False
+
+    def analizar(self):
+        if not self.tokens:
+            raise ValueError("El filtro está vacío.")
+        arbol = self._o()
+        if self.pos < len(self.tokens):
+            self._error(f"Sobra '{self._actual()[1]}'")
+        return arbol
+
+    def _o(self):
+        hijos = [self._y()]
+        while self._aceptar("or", "||"):
+            hijos.append(self._y())
+        return hijos[0] if len(hijos) == 1 else _Logico("or", hijos)
+
+    def _y(self):
+        hijos = [self._no()]
+        while self._aceptar("and", "&&"):
+            hijos.append(self._no())
+        return hijos[0] if len(hijos) == 1 else _Logico("and", hijos)
+
+    def _no(self):
+        if self._aceptar("not", "!"):
+            return _Logico("not", [self._no()])
+        return self._primario()
+
+    def _primario(self):
+        if self._aceptar("("):
+            arbol = self._o()
+            if not self._aceptar(")"):
+                self._error("Falta ')'")
+            return arbol
+        tipo, nombre, _ = self._actual()
+        if tipo != "palabra":
+            self._error("Se esperaba un campo o un protocolo")
+        nombre = nombre.lower()
+        nombre = _ALIAS.get(nombre, nombre)
+        self.pos += 1
+        if nombre not in _CAMPOS:
+            if nombre in _PROTOCOLOS:
+                return _Presencia(_PROTOCOLOS[nombre])
+            self.pos -= 1
+            self._error(f"Campo desconocido '{nombre}'")
+        tipo_campo = _CAMPOS[nombre][2]
+        if self._aceptar("in"):
+            if not self._aceptar("{"):
+                self._error("Se esperaba '{' después de 'in'")
+            valores = [self._valor(tipo_campo)]
+            while self._aceptar(","):
+                valores.append(self._valor(tipo_campo))
+            if not self._aceptar("}"):
+                self._error("Falta '}'")
+            return _Comparacion(nombre, "in", valores)
+        if self._aceptar("contains"):
+            if tipo_campo != "str":
+                self._error(f"'contains' solo se puede usar con campos de texto, no con '{nombre}'")
+            return _Comparacion(nombre, "contains", [self._valor("str")])
+        tipo_op, operador, _ = self._actual()
+        if operador is None or operador.lower() not in _OPERADORES:
+            self._error(f"Se esperaba un operador después de '{nombre}'")
+        self.pos += 1
+        operador = operador.lower()
+        valor = self._valor(tipo_campo)
+        if isinstance(valor, tuple) and operador not in ("==", "eq", "!=", "ne"):
+            self._error("Una red solo se puede comparar con '==' o '!='")
+        if tipo_campo == "str" and operador not in ("==", "eq", "!=", "ne"):
+            self._error("Los campos de texto solo admiten '==', '!=' y 'contains'")
+        return _Comparacion(nombre, operador, [valor])
+
+    def _valor(self, tipo_campo):
+        """Lee y convierte un valor según el tipo del campo."""
+        tipo, valor, _ = self._actual()
+        if tipo not in ("palabra", "cadena"):
+            self._error("Se esperaba un valor")
+        try:
+            if tipo_campo == "str":
+                convertido = valor
+            elif tipo_campo == "ip":
+                if "/" in valor:
+                    red = ipaddress.IPv4Network(valor, strict=False)
+                    convertido = (int(red.network_address), int(red.netmask))
+                else:
+                    convertido = int(ipaddress.IPv4Address(valor))
+            elif tipo_campo == "int":
+                convertido = int(valor, 0)
+            else:
+                convertido = float(valor)
+        except ValueError:
+            self._error(f"Valor no válido: '{valor}'")
+        self.pos += 1
+        return convertido
+
+class FiltroVisualizacion:
+    """
+    Filtro de visualización compilado.
+
+    `coincide(resumen)` evalúa el filtro sobre un `ResumenPaquete` y
+    `filtrar(tabla, desde)` devuelve las filas de una `TablaResumen` que lo
+    cumplen, evaluando todas a la vez con NumPy.
+    """
+    def __init__(self, expresion):
+        """
+        Analiza y compila la expresión.
+
+        Args:
+            expresion (str): El filtro (ej. "ip.src == 10.0.0.5 and tcp.dport in {80,443}").
+
+        Raises:
+            ValueError: Si la expresión no es válida; el mensaje indica la posición.
+        """
+        self.expresion = expresion.strip()
+        self._arbol = _Analizador(self.expresion).analizar()
+        self.coincide = self._arbol.predicado()
+
+    def mascara(self, tabla, desde=0):
+        """
+        Evalúa el filtro sobre las filas de una tabla a partir de `desde`.
+
+        Args:
+            tabla (TablaResumen): La tabla de resúmenes.
+            desde (int): Primera fila a evaluar (para filtrar solo las nuevas).
+
+        Returns:
+            numpy.ndarray: Máscara booleana de las filas `desde..len(tabla)-1`.
+        """
+        return self._arbol.mascara(_Columnas(tabla, desde))
+
+    def filtrar(self, tabla, desde=0):
+        """
+        Devuelve los índices de las filas que cumplen el filtro.
+
+        Args:
+            tabla (TablaResumen): La tabla de resúmenes.
+            desde (int): Primera fila a evaluar.
+
+        Returns:
+            numpy.ndarray: Índices (absolutos) de las filas que coinciden.
+        """
+        return np.flatnonzero(self.mascara(tabla, desde)) + desde
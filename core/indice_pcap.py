@@ -0,0 +1,204 @@
+"""
+Módulo de acceso aleatorio a archivos pcap mediante un índice de posiciones.
+
+Para mostrar los detalles de la fila N de una captura importada hace falta la
+trama N. Guardarlas todas en memoria limita el tamaño de los archivos que se
+pueden abrir; este archivo define `IndicePcap`, que recorre el pcap una sola
+vez, guarda la posición de cada registro en un archivo auxiliar compacto (un
+`array` de enteros de 64 bits) y proyecta en memoria (`mmap`) tanto el pcap
+como el índice. Así cualquier paquete se obtiene en tiempo y memoria
+constantes, y las siguientes aperturas del mismo archivo no repiten el
+recorrido.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from core.paquetes import PaqueteCrudo
+
+# Cabecera global de pcap: número mágico según resolución y orden de bytes.
+MAGIA_PCAP_USEC = 0xA1B2C3D4
+MAGIA_PCAP_NSEC = 0xA1B23C4D
+TAM_CABECERA_PCAP = 24
+TAM_CABECERA_REGISTRO = 16
+
+# Cabecera del archivo de índice: firma, versión (en el orden de bytes nativo,
+# para detectar un índice creado en otra arquitectura), tamaño y fecha de
+# modificación del pcap, y número de paquetes. Le siguen las posiciones.
+FIRMA_INDICE = b"CTPCAPIX"
+VERSION_INDICE = 1
+FORMATO_CABECERA_INDICE = "=8sIIQQQ"
+TAM_CABECERA_INDICE = struct.calcsize(FORMATO_CABECERA_INDICE)
+EXTENSION_INDICE = ".idx"
+
+def _ruta_indice_en_cache(ruta):
+    """Ruta alternativa del índice, en la caché del usuario, si junto al pcap no se puede escribir."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    nombre = hashlib.sha1(os.path.abspath(ruta).encode("utf-8")).hexdigest() + EXTENSION_INDICE
+    return os.path.join(base, "cybertrainer", "indices", nombre)
+
+class IndicePcap:
+    """
+    Acceso aleatorio de solo lectura a los paquetes de un archivo pcap.
+
+    Se comporta como una secuencia: `len(indice)` es el número de paquetes e
+    `indice[i]` devuelve el paquete i como `PaqueteCrudo`. Solo admite pcap
+    clásico (con marcas de tiempo en micro o nanosegundos); los archivos
+    pcapng se leen de forma secuencial con `core.pcapng.LectorPcapNg`.
+    """
+    def __init__(self, ruta, progreso=None):
+        """
+        Abre el pcap y carga su índice, creándolo si no existe o está desactualizado.
+
+        Args:
+            ruta (str): Ruta del archivo pcap.
+            progreso (function, optional): Se llama con la fracción recorrida
+                                           (0.0-1.0) mientras se crea el índice.
+
+        Raises:
+            ValueError: Si el archivo no es un pcap válido.
+            OSError: Si no se puede leer el archivo.
+        """
+        self.ruta = ruta
+        self._f = open(ruta, "rb")
+        try:
+            estado = os.fstat(self._f.fileno())
+            if estado.st_size < TAM_CABECERA_PCAP:
+                raise ValueError("El archivo no tiene formato pcap.")
+            self._datos = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._f.close()
+            raise
+        self._tamano, self._mtime = estado.st_size, estado.st_mtime_ns
+        self._indice_f = self._indice_mmap = None
+        try:
+            self._leer_cabecera_global()
+            self._posiciones = self._cargar_indice() or self._crear_indice(progreso)
+        except Exception:
+            self.close()
+            raise
+
+    def _leer_cabecera_global(self):
+        """Detecta el orden de bytes, la resolución temporal y el tipo de enlace."""
+        for orden in ("<", ">"):
+            magia = struct.unpack_from(orden + "I", self._datos)[0]
+            if magia in (MAGIA_PCAP_USEC, MAGIA_PCAP_NSEC):
+                self._orden = orden
+                self._resolucion = 1e-6 if magia == MAGIA_PCAP_USEC else 1e-9
+                break
+        else:
+            raise ValueError("El archivo no tiene formato pcap.")
+        self.linktype = struct.unpack_from(self._orden + "I", self._datos, 20)[0] & 0xFFFF
+        self._formato_registro = struct.Struct(self._orden + "IIII")
+
+    def _cargar_indice(self):
+        """
+        Proyecta en memoria un índice guardado si corresponde al pcap actual.
+
+        Returns:
+            memoryview or None: Las posiciones (enteros sin signo de 64 bits),
+                                o None si no hay un índice válido.
+        """
+        for ruta in (self.ruta + EXTENSION_INDICE, _ruta_indice_en_cache(self.ruta)):
+            try:
+                f = open(ruta, "rb")
+            except OSError:
+                continue
+            try:
+                datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                f.close()
+                continue
+            valido = False
+            if len(datos) >= TAM_CABECERA_INDICE:
+                firma, version, _, tamano, mtime, cantidad = struct.unpack_from(FORMATO_CABECERA_INDICE, datos)
+                valido = (firma == FIRMA_INDICE and version == VERSION_INDICE and tamano == self._tamano
+                          and mtime == self._mtime and len(datos) == TAM_CABECERA_INDICE + 8 * cantidad)
+            if not valido:
+                datos.close()
+                f.close()
+                continue
+            self._indice_f, self._indice_mmap = f, datos
+            return memoryview(datos)[TAM_CABECERA_INDICE:].cast("Q")
+        return None
+
+    def _crear_indice(self, progreso=None):
+        """
+        Recorre las cabeceras de registro del pcap y guarda sus posiciones.
+
+        Un último registro incompleto (captura cortada) se ignora. El índice
+        se guarda junto al pcap o, si no se puede, en la caché del usuario;
+        si tampoco se puede guardar, se usa solo en memoria.
+
+        Returns:
+            array: Las posiciones de los registros.
+        """
+        posiciones = array("Q")
+        pos, fin = TAM_CABECERA_PCAP, self._tamano
+        siguiente_aviso = 0
+        while pos + TAM_CABECERA_REGISTRO <= fin:
+            caplen = self._formato_registro.unpack_from(self._datos, pos)[2]
+            if pos + TAM_CABECERA_REGISTRO + caplen > fin:
+                break
+            posiciones.append(pos)
+            pos += TAM_CABECERA_REGISTRO + caplen
+            if progreso and pos >= siguiente_aviso:
+                progreso(pos / fin)
+                siguiente_aviso = pos + fin // 100
+        cabecera = struct.pack(FORMATO_CABECERA_INDICE, FIRMA_INDICE, VERSION_INDICE, 0,
+                               self._tamano, self._mtime, len(posiciones))
+        for ruta in (self.ruta + EXTENSION_INDICE, _ruta_indice_en_cache(self.ruta)):
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+                temporal = ruta + ".tmp"
+                with open(temporal, "wb") as f:
+                    f.write(cabecera)
+                    posiciones.tofile(f)
+                os.replace(temporal, ruta)
+                break
+            except OSError:
+                continue
+        return posiciones
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    def __getitem__(self, i):
+        """
+        Devuelve el paquete i (empezando en 0) leyéndolo del archivo proyectado.
+
+        Raises:
+            IndexError: Si `i` está fuera de rango.
+        """
+        pos = self._posiciones[i]
+        segundos, fraccion, caplen, longitud_original = self._formato_registro.unpack_from(self._datos, pos)
+        inicio = pos + TAM_CABECERA_REGISTRO
+        wirelen = longitud_original if longitud_original != caplen else None
+        return PaqueteCrudo(self._datos[inicio:inicio + caplen], segundos + fraccion * self._resolucion,
+                            self.linktype, None, wirelen)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        """Libera las proyecciones en memoria y cierra los archivos."""
+        if isinstance(getattr(self, "_posiciones", None), memoryview):
+            self._posiciones.release()
+        self._posiciones = array("Q")
+        for recurso in (self._indice_mmap, self._indice_f, self._datos, self._f):
+            if recurso is not None:
+                recurso.close()
+        self._indice_mmap = self._indice_f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
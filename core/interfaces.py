@@ -0,0 +1,241 @@
+"""
+Módulo del registro compartido de interfaces de red.
+
+Enumerar las interfaces puede tardar varios segundos en equipos con muchos
+adaptadores virtuales (en Windows, `get_windows_if_list` consulta el sistema
+cada vez). Este archivo define `RegistroInterfaces`, que hace esa enumeración
+una sola vez en segundo plano y guarda una instantánea con un tiempo de vida
+(TTL). Todos los módulos que necesitan la lista de interfaces la leen de aquí,
+y las vistas se suscriben para enterarse cuando aparece o desaparece alguna
+(por ejemplo, al conectar una VPN o un adaptador USB).
+"""
+
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+InfoInterfaz = namedtuple("InfoInterfaz", ["name", "description", "ips"])
+
+# ioctl de Linux que devuelve la dirección IPv4 de una interfaz (<linux/sockios.h>).
+SIOCGIFADDR = 0x8915
+
+def ipv4_de_interfaz(nombre):
+    """
+    Devuelve la dirección IPv4 principal de una interfaz.
+
+    En Linux se pregunta directamente al kernel con el ioctl `SIOCGIFADDR`,
+    sin cargar Scapy; en el resto de sistemas se usa `get_if_addr` de Scapy.
+
+    Args:
+        nombre (str): El nombre de la interfaz (ej. 'eth0').
+
+    Returns:
+        str or None: La dirección IPv4, o None si la interfaz no tiene ninguna.
+    """
+    if sys.platform.startswith("linux"):
+        import fcntl
+        peticion = struct.pack("256s", nombre.encode()[:15])
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            try:
+                respuesta = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, peticion)
+            except OSError:
+                return None
+        # struct ifreq: 16 bytes de nombre y una sockaddr_in (la IP empieza en el byte 20).
+        return socket.inet_ntoa(respuesta[20:24])
+    from scapy.arch import get_if_addr
+    ip = get_if_addr(nombre)
+    return ip if ip and ip != "0.0.0.0" else None
+
+def _enumerar_interfaces():
+    """
+    Consulta al sistema operativo la lista de interfaces de red.
+
+    Returns:
+        list[InfoInterfaz]: Las interfaces con su descripción y sus IPv4.
+    """
+    if sys.platform == "win32":
+        from scapy.arch.windows import get_windows_if_list
+        interfaces = []
+        for iface in get_windows_if_list():
+            if not iface.get('name'):
+                continue
+            ips = iface.get('ips') or ([iface['ip']] if iface.get('ip') else [])
+            ipv4 = tuple(ip for ip in ips if ip.count('.') == 3)
+            interfaces.append(InfoInterfaz(iface['name'], iface.get('description', ''), ipv4))
+        return interfaces
+    interfaces = []
+    for _, nombre in socket.if_nameindex():
+        ip = ipv4_de_interfaz(nombre)
+        interfaces.append(InfoInterfaz(nombre, nombre, (ip,) if ip else ()))
+    return interfaces
+
+class RegistroInterfaces:
+    """
+    Instantánea compartida de las interfaces de red, con caché y avisos de cambios.
+
+    La instantánea se refresca en un hilo en segundo plano cada `ttl`
+    segundos. Si no hay hilo en marcha, se refresca bajo demanda al leerla
+    cuando ha caducado. Los suscriptores reciben la nueva lista y las
+    interfaces añadidas y eliminadas cada vez que cambia el conjunto de
+    interfaces; se les llama desde el hilo del registro.
+    """
+    TTL = 30.0
+
+    def __init__(self, ttl=TTL, enumerador=_enumerar_interfaces):
+        """
+        Args:
+            ttl (float): Segundos durante los que la instantánea se considera válida.
+            enumerador (function): Función que devuelve la lista de `InfoInterfaz`.
+        """
+        self.ttl = ttl
+        self._enumerador = enumerador
+        self._interfaces = None
+        self._marca = 0.0
+        self._error = None
+        self._lista = threading.Event()  # Se activa tras la primera enumeración.
+        self._lock = threading.Lock()
+        self._refresco_lock = threading.Lock()  # Evita enumeraciones simultáneas.
+        self._suscriptores = []
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Lanza (una sola vez) el hilo que enumera y refresca las interfaces."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._refrescar_periodicamente, daemon=True)
+        self._thread.start()
+
+    def detener(self):
+        """Detiene el hilo de refresco."""
+        self._parar.set()
+
+    def _refrescar_periodicamente(self):
+        """Bucle del hilo de refresco."""
+        self.refrescar()
+        while not self._parar.wait(self.ttl):
+            self.refrescar()
+
+    def refrescar(self):
+        """
+        Vuelve a enumerar las interfaces y avisa a los suscriptores si han cambiado.
+
+        Si la enumeración falla, se conserva la instantánea anterior y el error
+        queda guardado para `obtener_interfaces`.
+        """
+        with self._refresco_lock:
+            try:
+                nuevas = list(self._enumerador())
+            except Exception as e:
+                print(f"Error al enumerar las interfaces de red: {e}", file=sys.stderr)
+                with self._lock:
+                    self._error = e
+                self._lista.set()
+                return
+            with self._lock:
+                anteriores = self._interfaces
+                self._interfaces = nuevas
+                self._marca = time.monotonic()
+                self._error = None
+                suscriptores = list(self._suscriptores)
+            self._lista.set()
+        if anteriores is None:
+            return
+        nombres_antes = {i.name for i in anteriores}
+        nombres_ahora = {i.name for i in nuevas}
+        anadidas = sorted(nombres_ahora - nombres_antes)
+        eliminadas = sorted(nombres_antes - nombres_ahora)
+        if not anadidas and not eliminadas:
+            return
+        for callback in suscriptores:
+            try:
+                callback(nuevas, anadidas, eliminadas)
+            except Exception as e:
+                print(f"Error en un suscriptor del registro de interfaces: {e}", file=sys.stderr)
+
+    def obtener_interfaces(self, timeout=None):
+        """
+        Devuelve la instantánea de interfaces, esperando a la primera si aún no existe.
+
+        Args:
+            timeout (float, optional): Tiempo máximo que se espera a la primera
+                                       enumeración si el hilo está en marcha.
+
+        Returns:
+            list[InfoInterfaz]: Las interfaces conocidas.
+
+        Raises:
+            RuntimeError: Si nunca se ha podido enumerar las interfaces o no
+                          se ha terminado a tiempo.
+        """
+        if self._thread is not None:
+            self._lista.wait(timeout)
+        with self._lock:
+            caducada = self._interfaces is None or time.monotonic() - self._marca > self.ttl
+            activo = self._thread is not None and self._thread.is_alive()
+        if caducada and not activo:
+            self.refrescar()
+        with self._lock:
+            if self._interfaces is None:
+                raise RuntimeError(f"No se pudieron enumerar las interfaces de red: {self._error or 'tiempo agotado'}")
+            return list(self._interfaces)
+
+    def nombres(self):
+        """Devuelve los nombres de las interfaces conocidas."""
+        return [i.name for i in self.obtener_interfaces()]
+
+    def loopback(self):
+        """
+        Devuelve el nombre de la interfaz de loopback.
+
+        En Windows es el adaptador de loopback de Npcap (None si no está
+        instalado); en el resto de sistemas, 'lo'.
+        """
+        if sys.platform != "win32":
+            return "lo"
+        for iface in self.obtener_interfaces():
+            if iface.description.lower().startswith('npcap loopback adapter'):
+                return iface.name
+        return None
+
+    def suscribir(self, callback):
+        """
+        Registra una función que se llamará cuando cambie el conjunto de interfaces.
+
+        Args:
+            callback (function): Recibe (interfaces, añadidas, eliminadas): la
+                                 lista completa de `InfoInterfaz` y los nombres
+                                 de las interfaces que han aparecido y
+                                 desaparecido. Se ejecuta en el hilo del registro.
+        """
+        with self._lock:
+            self._suscriptores.append(callback)
+
+    def cancelar_suscripcion(self, callback):
+        """Elimina una función registrada con `suscribir`."""
+        with self._lock:
+            if callback in self._suscriptores:
+                self._suscriptores.remove(callback)
+
+_registro = None
+_registro_lock = threading.Lock()
+
+def obtener_registro():
+    """
+    Devuelve el registro de interfaces compartido por toda la aplicación.
+
+    La primera llamada crea el registro y lanza su hilo de refresco.
+
+    Returns:
+        RegistroInterfaces: La instancia única del registro.
+    """
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroInterfaces()
+            _registro.iniciar()
+        return _registro
@@ -0,0 +1,241 @@
+"""
+Módulo de métricas del pipeline de captura.
+
+Este archivo permite medir cómo se comporta el recorrido de un paquete desde
+que lo entrega el capturador (`PacketCaptor`) hasta que aparece en la lista de
+la GUI: paquetes y bytes por segundo en cada etapa, profundidad de la cola,
+descartes del kernel y del espacio de usuario, un histograma de la latencia
+entre la captura y su visualización, y el tiempo que se dedica a cada paquete
+en la disección y en la inserción en la lista. Con estos datos se puede saber
+si un cuello de botella está en la captura, en el análisis o en la GUI.
+
+`MetricasPipeline` no depende de Tkinter, por lo que puede usarse también sin
+interfaz gráfica, por ejemplo para dimensionar el hardware de un sensor:
+
+    metricas = MetricasPipeline()
+    captor = PacketCaptor("eth0", procesar, batch_size=256, metrics=metricas)
+    ...
+    print(metricas.instantanea())
+"""
+
+import bisect
+import threading
+import time
+
+# Etapas del pipeline, en el orden en que las atraviesa un paquete.
+ETAPA_CAPTURA = "captura"
+ETAPA_DISECCION = "diseccion"
+ETAPA_VISUALIZACION = "visualizacion"
+ETAPAS = (ETAPA_CAPTURA, ETAPA_DISECCION, ETAPA_VISUALIZACION)
+
+# Límites (ms) para latencias de extremo a extremo y para el coste por paquete
+# de una etapa, que suele estar muy por debajo del milisegundo.
+LIMITES_LATENCIA_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+LIMITES_DURACION_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50)
+
+class HistogramaLatencia:
+    """
+    Histograma de latencias con cubetas de límites fijos (en milisegundos).
+
+    Registrar una muestra es O(log n) sobre un número pequeño de cubetas y no
+    guarda las muestras, por lo que el coste en memoria es constante.
+    """
+    def __init__(self, limites_ms=LIMITES_LATENCIA_MS):
+        """
+        Args:
+            limites_ms (tuple[float]): Límites superiores de las cubetas, en
+                                       orden creciente. Por encima del último
+                                       hay una cubeta de desbordamiento.
+        """
+        self.limites_ms = tuple(limites_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Borra todas las muestras."""
+        with self._lock:
+            self.cubetas = [0] * (len(self.limites_ms) + 1)
+            self.total = 0
+            self.suma_ms = 0.0
+            self.maximo_ms = 0.0
+
+    def registrar(self, segundos):
+        """
+        Añade una muestra de latencia.
+
+        Args:
+            segundos (float): La latencia medida, en segundos.
+        """
+        ms = max(0.0, segundos * 1000.0)
+        with self._lock:
+            self.cubetas[bisect.bisect_left(self.limites_ms, ms)] += 1
+            self.total += 1
+            self.suma_ms += ms
+            if ms > self.maximo_ms:
+                self.maximo_ms = ms
+
+    def percentil(self, p):
+        """
+        Devuelve una cota superior del percentil `p` (0-100), en milisegundos.
+
+        El valor es el límite de la cubeta en la que cae el percentil (o el
+        máximo observado, si es menor), por lo que tiene la resolución de las
+        cubetas.
+
+        Returns:
+            float or None: El límite de la cubeta, o None si no hay muestras.
+        """
+        with self._lock:
+            if not self.total:
+                return None
+            objetivo = self.total * p / 100.0
+            acumulado = 0
+            for i, cuenta in enumerate(self.cubetas):
+                acumulado += cuenta
+                if acumulado >= objetivo:
+                    if i < len(self.limites_ms):
+                        return min(float(self.limites_ms[i]), self.maximo_ms)
+                    return self.maximo_ms
+            return self.maximo_ms
+
+    def resumen(self):
+        """
+        Returns:
+            dict: "muestras", "media_ms", "p50_ms", "p90_ms", "p99_ms" y "max_ms".
+        """
+        media = self.suma_ms / self.total if self.total else None
+        return {"muestras": self.total, "media_ms": media, "p50_ms": self.percentil(50),
+                "p90_ms": self.percentil(90), "p99_ms": self.percentil(99), "max_ms": self.maximo_ms}
+
+class MetricasPipeline:
+    """
+    Contadores y histogramas de todo el pipeline de captura.
+
+    Las etapas registran los paquetes y bytes que procesan con `registrar`.
+    La cola y el capturador se consultan al pedir la instantánea a través de
+    las funciones `fuente_cola` y `fuente_kernel`, que devuelven sus propios
+    diccionarios de estadísticas.
+    """
+    def __init__(self, fuente_cola=None, fuente_kernel=None):
+        """
+        Args:
+            fuente_cola (function, optional): Devuelve las estadísticas de la
+                                              cola (ver `ColaAcotada.estadisticas`).
+            fuente_kernel (function, optional): Devuelve las estadísticas del
+                                                kernel (ver `PacketCaptor.estadisticas`).
+        """
+        self.fuente_cola = fuente_cola
+        self.fuente_kernel = fuente_kernel
+        self.latencia = HistogramaLatencia()
+        self.duraciones = {etapa: HistogramaLatencia(LIMITES_DURACION_MS)
+                           for etapa in (ETAPA_DISECCION, ETAPA_VISUALIZACION)}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Pone a cero todos los contadores (por ejemplo, al iniciar una captura)."""
+        with self._lock:
+            self._paquetes = dict.fromkeys(ETAPAS, 0)
+            self._bytes = dict.fromkeys(ETAPAS, 0)
+            self._anterior = (time.monotonic(), dict(self._paquetes), dict(self._bytes))
+        self.latencia.reset()
+        for histograma in self.duraciones.values():
+            histograma.reset()
+
+    def registrar(self, etapa, paquetes, num_bytes=0):
+        """
+        Suma paquetes y bytes a una etapa.
+
+        Args:
+            etapa (str): Una de las etapas de `ETAPAS`.
+            paquetes (int): Número de paquetes procesados.
+            num_bytes (int): Bytes (longitud original) de esos paquetes.
+        """
+        with self._lock:
+            self._paquetes[etapa] += paquetes
+            self._bytes[etapa] += num_bytes
+
+    def registrar_lote(self, etapa, lote):
+        """Registra una lista de paquetes en una etapa, sumando su longitud."""
+        self.registrar(etapa, len(lote), sum(len(p) for p in lote))
+
+    def registrar_duracion(self, etapa, segundos):
+        """
+        Registra el tiempo que una etapa ha dedicado a un paquete.
+
+        Args:
+            etapa (str): ETAPA_DISECCION o ETAPA_VISUALIZACION.
+            segundos (float): Tiempo medido con `time.perf_counter()`.
+        """
+        self.duraciones[etapa].registrar(segundos)
+
+    def instantanea(self):
+        """
+        Devuelve el estado actual del pipeline.
+
+        Las tasas por segundo se calculan respecto a la instantánea anterior,
+        así que conviene pedirlas a intervalos regulares (por ejemplo, cada
+        segundo) desde un único consumidor.
+
+        Returns:
+            dict: Con las claves "etapas" (totales y tasas de cada etapa),
+                  "cola", "kernel", "descartes", "latencia" (captura →
+                  visualización) y "duraciones" (coste por paquete de la
+                  disección y de la inserción en la lista).
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            t_prev, paquetes_prev, bytes_prev = self._anterior
+            paquetes, num_bytes = dict(self._paquetes), dict(self._bytes)
+            self._anterior = (ahora, paquetes, num_bytes)
+        intervalo = max(ahora - t_prev, 1e-6)
+        etapas = {
+            etapa: {
+                "paquetes": paquetes[etapa],
+                "bytes": num_bytes[etapa],
+                "pps": (paquetes[etapa] - paquetes_prev[etapa]) / intervalo,
+                "bps": (num_bytes[etapa] - bytes_prev[etapa]) / intervalo,
+            }
+            for etapa in ETAPAS
+        }
+        cola = self.fuente_cola() if self.fuente_cola else None
+        kernel = self.fuente_kernel() if self.fuente_kernel else None
+        descartes = {
+            "kernel": kernel.get("descartados", 0) if kernel else None,
+            "usuario": cola.get("descartados", 0) if cola else 0,
+        }
+        return {"etapas": etapas, "cola": cola, "kernel": kernel, "descartes": descartes,
+                "latencia": self.latencia.resumen(),
+                "duraciones": {etapa: h.resumen() for etapa, h in self.duraciones.items()}}
+
+def formatear_instantanea(datos):
+    """
+    Convierte una instantánea de `MetricasPipeline` en texto legible.
+
+    Args:
+        datos (dict): El resultado de `MetricasPipeline.instantanea()`.
+
+    Returns:
+        str: Una tabla de texto con una línea por etapa y los descartes.
+    """
+    lineas = [f"{'Etapa':<14}{'Paquetes':>12}{'paq/s':>10}{'KB/s':>10}"]
+    for etapa, valores in datos["etapas"].items():
+        lineas.append(f"{etapa:<14}{valores['paquetes']:>12}{valores['pps']:>10.1f}{valores['bps'] / 1024:>10.1f}")
+    cola = datos["cola"]
+    if cola:
+        lineas.append("")
+        lineas.append(f"Cola: {cola['ocupacion']}/{cola['capacidad']} (máx. {cola['maximo']})")
+    descartes = datos["descartes"]
+    kernel = "n/d" if descartes["kernel"] is None else descartes["kernel"]
+    lineas.append(f"Descartes: kernel {kernel} · espacio de usuario {descartes['usuario']}")
+    lat = datos["latencia"]
+    if lat["muestras"]:
+        lineas.append("")
+        lineas.append(f"Latencia captura → visualización ({lat['muestras']} muestras):")
+        lineas.append(f"  media {lat['media_ms']:.1f} ms · p50 ≤ {lat['p50_ms']:.0f} ms · "
+                      f"p90 ≤ {lat['p90_ms']:.0f} ms · p99 ≤ {lat['p99_ms']:.0f} ms · máx. {lat['max_ms']:.1f} ms")
+    for etapa, dur in datos["duraciones"].items():
+        if dur["muestras"]:
+            lineas.append(f"Coste por paquete en {etapa}: media {dur['media_ms']:.3f} ms · "
+                          f"p99 ≤ {dur['p99_ms']:g} ms · máx. {dur['max_ms']:.3f} ms")
+    return "\n".join(lineas)
@@ -6,11 +6,62 @@ Utiliza la librería Scapy para realizar el sniffing de tráfico en una interfaz
 de red específica. Proporciona una clase `PacketCaptor` que encapsula la
 captura en un hilo separado para no bloquear la interfaz gráfica, y funciones
 auxiliares para listar las interfaces de red disponibles.
+
+En Linux, la captura puede hacerse además con un anillo TPACKET_V3 mapeado en
+memoria (ver `core.tpacket`), que lee las tramas por bloques en lugar de hacer
+una llamada al sistema por paquete.
 """
 
-from scapy.all import sniff
-from scapy.arch.windows import get_windows_if_list
+from scapy.config import conf
+from scapy.error import Scapy_Exception
+from core.paquetes import PaqueteCrudo, estimar_longitud_original
+from core.metricas import ETAPA_CAPTURA
+from scapy.data import MTU
+from core.interfaces import obtener_registro
+import sys
 import threading
+import time
+
+# Tipo de enlace usado para validar filtros BPF sin necesidad de abrir una
+# interfaz real (DLT_EN10MB, Ethernet).
+DLT_ETHERNET = 1
+
+# Tiempo máximo (en segundos) que los bucles de captura esperan datos antes de
+# volver a comprobar si se ha pedido detener la captura. Acota el tiempo que
+# tarda en terminar el hilo tras llamar a `stop()`.
+INTERVALO_SONDEO = 0.2
+
+# Tiempo máximo (en segundos) que `stop()` espera a que terminen los hilos.
+TIEMPO_PARADA = 2.0
+
+# Snaplen del modo "solo cabeceras": suficiente para Ethernet + VLAN + IPv6 +
+# TCP con opciones, que es lo que se muestra en la lista de paquetes.
+SNAPLEN_CABECERAS = 128
+
+def validar_filtro_bpf(expresion):
+    """
+    Comprueba que una expresión de filtro BPF sea sintácticamente válida.
+
+    El filtro se compila con libpcap sobre un enlace Ethernet "muerto", por lo
+    que no hace falta abrir ninguna interfaz ni tener privilegios. Si libpcap
+    no está disponible no es posible validar de antemano y la expresión se da
+    por buena: el socket de captura informará del error al aplicarla.
+
+    Args:
+        expresion (str): La expresión BPF (ej. "host 10.0.0.5 and tcp port 80").
+
+    Raises:
+        ValueError: Si libpcap rechaza la expresión.
+    """
+    if not expresion or not expresion.strip():
+        return
+    try:
+        from scapy.arch.common import compile_filter
+        compile_filter(expresion.strip(), linktype=DLT_ETHERNET)
+    except ImportError:
+        pass
+    except Scapy_Exception as e:
+        raise ValueError(str(e))
 
 class PacketCaptor:
     """
@@ -20,8 +71,41 @@ class PacketCaptor:
     lo que es esencial para no congelar la interfaz de usuario de la aplicación.
     Cada paquete capturado se pasa a una función `packet_callback` para su
     procesamiento.
+
+    Opcionalmente acepta un filtro BPF que se aplica en el kernel (o en
+    libpcap/Npcap), de modo que los paquetes descartados nunca llegan a
+    copiarse al espacio de usuario ni a convertirse en objetos de Scapy.
+
+    En modo por lotes (`batch_size`), los paquetes se acumulan y se entregan
+    al callback como una lista cuando se alcanza el tamaño del lote o cuando
+    vence `batch_timeout`, lo que reduce las llamadas y operaciones de cola
+    por paquete en los consumidores.
+
+    En modo crudo (`raw=True`), los paquetes no se diseccionan: el callback
+    recibe objetos `PaqueteCrudo` con los bytes de la trama, la marca de tiempo
+    y el tipo de enlace, y la disección se hace más tarde solo si se necesita.
+
+    El parámetro `backend` elige cómo se leen las tramas: "scapy" usa los
+    sockets de Scapy (Npcap en Windows), "tpacket" usa el anillo TPACKET_V3 de
+    Linux y "auto" elige "tpacket" en Linux y "scapy" en el resto.
+
+    Con `snaplen` solo se conservan los primeros bytes de cada trama. La
+    longitud original se guarda en el atributo `wirelen` del paquete, de modo
+    que la columna de longitud y las exportaciones siguen siendo correctas.
+
+    Si se pasa un `MetricasPipeline` en `metrics`, cada entrega al callback se
+    contabiliza en la etapa de captura (paquetes y bytes).
+
+    Los destinos de `sinks` (por ejemplo, un `EscritorRotativo`) reciben
+    cada lote antes que el callback, con su método `escribir(paquetes)`.
+
+    Todos los backends leen con un tiempo de espera (`INTERVALO_SONDEO`), por
+    lo que el hilo comprueba la orden de parada aunque no llegue tráfico y
+    `stop()` puede esperar a que termine de verdad.
     """
-    def __init__(self, interface, packet_callback):
+    def __init__(self, interface, packet_callback, bpf_filter=None, batch_size=None, batch_timeout=0.05,
+                 raw=False, backend="auto", ring_size=None, snaplen=None, metrics=None,
+                 stop_timeout=TIEMPO_PARADA, sinks=None):
         """
         Inicializa el capturador de paquetes.
 
@@ -31,49 +115,261 @@ class PacketCaptor:
             packet_callback (function): La función que se llamará por cada paquete
                                         capturado. Esta función recibirá el paquete
                                         como único argumento.
+            bpf_filter (str, optional): Expresión BPF para filtrar el tráfico
+                                        antes de que llegue a Python. Si es
+                                        None o vacía, se captura todo.
+            batch_size (int, optional): Si se indica, activa el modo por lotes:
+                                        `packet_callback` recibirá listas de
+                                        hasta `batch_size` paquetes.
+            batch_timeout (float): Tiempo máximo (en segundos) que un paquete
+                                   puede esperar en un lote incompleto antes
+                                   de entregarse. Solo aplica en modo por lotes.
+            raw (bool): Si es True, se entregan `PaqueteCrudo` en lugar de
+                        paquetes de Scapy ya diseccionados.
+            backend (str): "auto", "scapy" o "tpacket".
+            ring_size (int, optional): Tamaño en bytes del anillo TPACKET_V3.
+                                       Si es None se usa el valor por defecto
+                                       de `core.tpacket`.
+            snaplen (int, optional): Bytes máximos que se capturan de cada
+                                     trama (ej. `SNAPLEN_CABECERAS`). None
+                                     captura la trama completa.
+            metrics (MetricasPipeline, optional): Métricas en las que se
+                                                  registran los paquetes entregados.
+            stop_timeout (float): Tiempo máximo (en segundos) que `stop()`
+                                  espera a que terminen los hilos.
+            sinks (list, optional): Destinos adicionales de los paquetes
+                                    (objetos con un método `escribir(paquetes)`).
+
+        Raises:
+            ValueError: Si la expresión BPF, el backend o el snaplen no son válidos.
         """
+        if backend == "auto":
+            backend = "tpacket" if sys.platform.startswith("linux") else "scapy"
+        if backend not in ("scapy", "tpacket"):
+            raise ValueError(f"Backend de captura desconocido: {backend}")
+        validar_filtro_bpf(bpf_filter)
         self.interface = interface
         self.packet_callback = packet_callback
+        self.bpf_filter = bpf_filter.strip() if bpf_filter and bpf_filter.strip() else None
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size debe ser un entero positivo.")
+        if snaplen is not None and snaplen < 14:
+            raise ValueError("El snaplen debe ser de al menos 14 bytes (una cabecera Ethernet).")
+        self.snaplen = snaplen
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.raw = raw
+        self.backend = backend
+        self.ring_size = ring_size
+        self.metrics = metrics
+        self.stop_timeout = stop_timeout
+        self.sinks = list(sinks or [])
+        self._anillo = None
         self.stop_event = threading.Event()
         self.thread = None
+        self._flush_thread = None
+        self._lote = []
+        self._lote_lock = threading.Lock()
 
     def start(self):
         """
         Inicia la captura de paquetes en un nuevo hilo (demonio).
         
         El hilo se configura como demonio para que no impida que el programa
-        principal finalice.
+        principal finalice. En modo por lotes se lanza además un hilo que
+        entrega periódicamente los lotes incompletos.
         """
         self.stop_event.clear()
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
+        if self.batch_size:
+            self._flush_thread = threading.Thread(target=self._vaciar_periodicamente, daemon=True)
+            self._flush_thread.start()
+
+    def _acumular(self, packet):
+        """
+        Añade un paquete al lote en curso y lo entrega si está completo.
+
+        Se ejecuta en el hilo de captura. La entrega se hace fuera del candado
+        para que el callback no bloquee al hilo de vaciado periódico.
+        """
+        with self._lote_lock:
+            self._lote.append(packet)
+            if len(self._lote) < self.batch_size:
+                return
+            lote, self._lote = self._lote, []
+        self._entregar(lote)
+
+    def _vaciar_lote(self):
+        """Entrega al callback los paquetes pendientes del lote actual, si los hay."""
+        with self._lote_lock:
+            if not self._lote:
+                return
+            lote, self._lote = self._lote, []
+        self._entregar(lote)
+
+    def _entregar(self, item):
+        """
+        Entrega un paquete o un lote al callback.
+
+        Antes lo registra en las métricas y lo pasa a los destinos adicionales
+        (`sinks`), si los hay. Un error de escritura en un destino no detiene
+        la captura.
+        """
+        if self.metrics is not None:
+            if self.batch_size:
+                self.metrics.registrar_lote(ETAPA_CAPTURA, item)
+            else:
+                self.metrics.registrar(ETAPA_CAPTURA, 1, len(item))
+        for sink in self.sinks:
+            try:
+                sink.escribir(item if self.batch_size else [item])
+            except OSError as e:
+                print(f"Error al escribir los paquetes capturados en disco: {e}")
+        self.packet_callback(item)
+
+    def _vaciar_periodicamente(self):
+        """Entrega los lotes incompletos cada `batch_timeout` segundos hasta que se detenga la captura."""
+        while not self.stop_event.wait(self.batch_timeout):
+            self._vaciar_lote()
 
     def _run(self):
         """
         Método privado que se ejecuta en el hilo de captura.
-        
-        Llama a la función `sniff` de Scapy, que es bloqueante. El sniffing se
-        detendrá cuando el `stop_event` sea activado.
+
+        Ejecuta el bucle de captura del backend elegido hasta que se active el
+        `stop_event`. Si se configuró un filtro BPF, se aplica al abrir el
+        socket para que lo evalúe el kernel o libpcap.
+        """
+        if self.batch_size:
+            prn = self._acumular
+        else:
+            prn = self._entregar if self.metrics is not None or self.sinks else self.packet_callback
+        try:
+            if self.backend == "tpacket":
+                self._capturar_tpacket(prn)
+            else:
+                self._capturar_scapy(prn)
+        finally:
+            if self.batch_size:
+                self._vaciar_lote()
+
+    def _capturar_scapy(self, prn):
+        """
+        Bucle de captura sobre los sockets de Scapy (Npcap en Windows).
+
+        Abre directamente el socket de escucha de Scapy (`conf.L2listen`) y usa
+        `recv_raw`, que devuelve los bytes de la trama sin construir el objeto
+        `Packet`. A diferencia de `sniff`, que solo comprueba la condición de
+        parada cuando llega un paquete, el `select` con tiempo de espera permite
+        comprobar el `stop_event` aunque la interfaz esté en silencio.
+
+        Con snaplen, en Linux la lectura se limita a `snaplen` bytes (el resto
+        no se copia); con libpcap la trama se recorta al recibirla. Como estos
+        sockets no informan de la longitud original, se deduce de las
+        cabeceras IP. Si no se pidió el modo crudo, se disecciona aquí.
+
+        Args:
+            prn (function): Función que recibe cada paquete.
         """
-        sniff(iface=self.interface, prn=self.packet_callback, stop_filter=lambda p: self.stop_event.is_set())
+        sock = conf.L2listen(iface=self.interface, filter=self.bpf_filter)
+        snaplen = self.snaplen
+        try:
+            while not self.stop_event.is_set():
+                if not sock.select([sock], INTERVALO_SONDEO):
+                    continue
+                cls, datos, ts = sock.recv_raw(snaplen or MTU)
+                if datos is None:
+                    continue
+                linktype = conf.l2types.layer2num.get(cls, DLT_ETHERNET)
+                wirelen = None
+                if snaplen and len(datos) >= snaplen:
+                    wirelen = len(datos) if len(datos) > snaplen else estimar_longitud_original(datos, linktype)
+                    datos = datos[:snaplen]
+                paquete = PaqueteCrudo(datos, ts if ts is not None else time.time(), linktype, wirelen=wirelen)
+                prn(paquete if self.raw else paquete.decodificar())
+        finally:
+            sock.close()
+
+    def _capturar_tpacket(self, prn):
+        """
+        Bucle de captura sobre un anillo TPACKET_V3 (solo Linux).
+
+        Cada iteración devuelve todos los paquetes de los bloques que el kernel
+        haya completado. Si no se pidió el modo crudo, los paquetes se
+        diseccionan aquí antes de entregarlos.
 
-    def stop(self):
-        """Señaliza al hilo de captura para que se detenga de forma segura."""
+        Args:
+            prn (function): Función que recibe cada paquete.
+        """
+        from core.tpacket import AnilloTPacketV3
+        kwargs = {"ring_size": self.ring_size} if self.ring_size else {}
+        self._anillo = AnilloTPacketV3(self.interface, bpf_filter=self.bpf_filter, snaplen=self.snaplen,
+                                       promisc=conf.sniff_promisc, **kwargs)
+        try:
+            while not self.stop_event.is_set():
+                for paquete in self._anillo.leer(INTERVALO_SONDEO):
+                    prn(paquete if self.raw else paquete.decodificar())
+        finally:
+            # Al cerrar, el anillo acumula los últimos contadores del kernel, que
+            # `estadisticas()` sigue devolviendo.
+            self._anillo.close()
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores de captura del kernel, si el backend los ofrece.
+
+        Returns:
+            dict or None: Con las claves "recibidos", "descartados" y
+                          "congelaciones" para el backend "tpacket"; None para
+                          el backend "scapy".
+        """
+        if self._anillo is None:
+            return None
+        return self._anillo.estadisticas()
+
+    def stop(self, timeout=None):
+        """
+        Detiene la captura y espera a que terminen sus hilos.
+
+        Como los bucles de captura comprueban el `stop_event` cada
+        `INTERVALO_SONDEO` segundos, la espera está acotada aunque la interfaz
+        no reciba tráfico. Al volver, el último lote ya se ha entregado.
+
+        Args:
+            timeout (float, optional): Tiempo máximo de espera en segundos. Por
+                                       defecto, el `stop_timeout` del captor.
+
+        Returns:
+            bool: True si los hilos han terminado, False si se agotó el tiempo
+                  (por ejemplo, porque el callback está bloqueado).
+        """
         self.stop_event.set()
+        if timeout is None:
+            timeout = self.stop_timeout
+        limite = time.monotonic() + timeout
+        hilos = [h for h in (self.thread, self._flush_thread) if h is not None]
+        for hilo in hilos:
+            if hilo is not threading.current_thread():
+                hilo.join(max(0.0, limite - time.monotonic()))
+        terminado = not any(h.is_alive() for h in hilos if h is not threading.current_thread())
+        if not terminado:
+            print(f"Aviso: la captura en {self.interface} no terminó en {timeout} s.")
+        return terminado
 
 def get_network_interfaces():
     """
     Obtiene y devuelve una lista de nombres de las interfaces de red disponibles.
 
-    Utiliza la función `get_windows_if_list` de Scapy, específica para sistemas
-    Windows, para recuperar todas las interfaces de red.
+    La lista sale del registro compartido de interfaces (`core.interfaces`),
+    que la enumera en segundo plano y la mantiene en caché, en lugar de
+    consultar al sistema operativo en cada llamada.
 
     Returns:
         list[str]: Una lista de strings, donde cada string es el nombre de una
                    interfaz de red válida.
     """
-    interfaces = get_windows_if_list()
-    return [iface['name'] for iface in interfaces if iface.get('name')]
+    return obtener_registro().nombres()
 
 def get_loopback_interface():
     """
@@ -85,9 +381,7 @@ def get_loopback_interface():
 
     Returns:
         str or None: El nombre de la interfaz de loopback de Npcap si se encuentra,
-                     de lo contrario, devuelve None.
+                     de lo contrario, devuelve None. Fuera de Windows devuelve
+                     la interfaz de loopback del sistema ('lo').
     """
-    for iface in get_windows_if_list():
-        if iface.get('description', '').lower().startswith('npcap loopback adapter'):
-            return iface.get('name')
-    return None
\ No newline at end of file
+    return obtener_registro().loopback()
@@ -0,0 +1,210 @@
+"""
+Módulo de captura simultánea en varias interfaces.
+
+Este archivo define `SesionCaptura`, que lanza un `PacketCaptor` (y por tanto
+un hilo) por cada interfaz y combina sus paquetes en un único flujo ordenado
+por marca de tiempo. Como los hilos de captura entregan los paquetes con
+pequeños retrasos distintos, la sesión los retiene durante una ventana de
+reordenación acotada en un montículo (`heapq`) y solo los entrega cuando ya no
+puede llegar ningún paquete anterior de otra interfaz.
+
+Cada interfaz mantiene sus propios contadores de paquetes y bytes, de modo que
+en una pasarela con puertos WAN, LAN y DMZ se puede correlacionar el tráfico
+sin perder la vista por interfaz.
+"""
+
+import heapq
+import threading
+import time
+from core.metricas import ETAPA_CAPTURA
+from core.monitor import PacketCaptor, TIEMPO_PARADA
+
+class SesionCaptura:
+    """
+    Captura en varias interfaces a la vez con un flujo de salida ordenado.
+
+    Ofrece la misma interfaz básica que `PacketCaptor` (`start`, `stop`,
+    `estadisticas`), por lo que las vistas pueden usar una u otra clase.
+    Cada paquete entregado lleva en su atributo `sniffed_on` el nombre de la
+    interfaz en la que se capturó.
+    """
+    # Tamaño de los lotes internos entre cada captor y la sesión.
+    TAMANO_LOTE_INTERNO = 256
+
+    def __init__(self, interfaces, packet_callback, bpf_filter=None, reorder_window=0.25,
+                 batch_size=None, raw=False, backend="auto", snaplen=None, metrics=None, sinks=None):
+        """
+        Inicializa la sesión y un `PacketCaptor` por interfaz.
+
+        Args:
+            interfaces (list[str]): Nombres de las interfaces a capturar.
+            packet_callback (function): Recibe cada paquete (o cada lote si se
+                                        indica `batch_size`) ya ordenado.
+            bpf_filter (str, optional): Filtro BPF aplicado en todas las interfaces.
+            reorder_window (float): Segundos que se retiene cada paquete para
+                                    poder ordenar los que lleguen con retraso
+                                    desde otras interfaces.
+            batch_size (int, optional): Si se indica, el callback recibe listas
+                                        de hasta `batch_size` paquetes.
+            raw (bool): Si es True, se entregan `PaqueteCrudo`.
+            backend (str): Backend de captura de cada `PacketCaptor`.
+            snaplen (int, optional): Bytes máximos capturados de cada trama.
+            metrics (MetricasPipeline, optional): Métricas en las que se
+                                                  registran los paquetes ya
+                                                  mezclados que se entregan.
+            sinks (list, optional): Destinos adicionales del flujo ya ordenado
+                                    (objetos con un método `escribir(paquetes)`).
+
+        Raises:
+            ValueError: Si no se indica ninguna interfaz o el filtro no es válido.
+        """
+        if not interfaces:
+            raise ValueError("Se necesita al menos una interfaz para capturar.")
+        self.interfaces = list(interfaces)
+        self.packet_callback = packet_callback
+        self.reorder_window = reorder_window
+        self.batch_size = batch_size
+        self.metrics = metrics
+        self.sinks = list(sinks or [])
+        self.stop_event = threading.Event()
+        self.thread = None
+        self._heap = []
+        self._secuencia = 0  # Desempata paquetes con la misma marca de tiempo.
+        self._lock = threading.Lock()
+        self._ultimo_entregado = 0.0
+        self.fuera_de_orden = 0  # Paquetes que llegaron después de cerrar su ventana.
+        self.contadores = {iface: {"paquetes": 0, "bytes": 0} for iface in self.interfaces}
+        self.captores = {
+            iface: PacketCaptor(iface, lambda lote, i=iface: self._recibir(i, lote), bpf_filter=bpf_filter,
+                                batch_size=self.TAMANO_LOTE_INTERNO, batch_timeout=reorder_window / 4,
+                                raw=raw, backend=backend, snaplen=snaplen)
+            for iface in self.interfaces
+        }
+
+    def start(self):
+        """Inicia un hilo de captura por interfaz y el hilo de mezcla."""
+        self.stop_event.clear()
+        for captor in self.captores.values():
+            captor.start()
+        self.thread = threading.Thread(target=self._mezclar, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=TIEMPO_PARADA):
+        """
+        Detiene todos los captores y el hilo de mezcla y espera a que terminen.
+
+        Args:
+            timeout (float): Tiempo máximo total de espera, en segundos.
+
+        Returns:
+            bool: True si todos los hilos han terminado dentro del plazo.
+        """
+        limite = time.monotonic() + timeout
+        terminado = True
+        for captor in self.captores.values():
+            terminado &= captor.stop(max(0.0, limite - time.monotonic()))
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(max(0.0, limite - time.monotonic()))
+            terminado &= not self.thread.is_alive()
+        return terminado
+
+    def _recibir(self, iface, lote):
+        """
+        Recibe un lote de un captor y lo añade al montículo de reordenación.
+
+        Se ejecuta en el hilo de captura de la interfaz `iface`.
+        """
+        contador = self.contadores[iface]
+        with self._lock:
+            for packet in lote:
+                packet.sniffed_on = iface
+                contador["paquetes"] += 1
+                contador["bytes"] += len(packet)
+                self._secuencia += 1
+                heapq.heappush(self._heap, (packet.time, self._secuencia, packet))
+
+    def _extraer_listos(self, limite):
+        """
+        Saca del montículo, en orden, los paquetes con marca de tiempo <= `limite`.
+
+        Returns:
+            list: Los paquetes listos para entregar, ordenados por tiempo.
+        """
+        listos = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= limite:
+                listos.append(heapq.heappop(self._heap)[2])
+        if listos:
+            if listos[0].time < self._ultimo_entregado:
+                self.fuera_de_orden += sum(1 for p in listos if p.time < self._ultimo_entregado)
+            self._ultimo_entregado = max(self._ultimo_entregado, listos[-1].time)
+        return listos
+
+    def _entregar(self, paquetes):
+        """Entrega los paquetes al callback, por lotes o de uno en uno."""
+        if not paquetes:
+            return
+        if self.metrics is not None:
+            self.metrics.registrar_lote(ETAPA_CAPTURA, paquetes)
+        for sink in self.sinks:
+            try:
+                sink.escribir(paquetes)
+            except OSError as e:
+                print(f"Error al escribir los paquetes capturados en disco: {e}")
+        if not self.batch_size:
+            for packet in paquetes:
+                self.packet_callback(packet)
+            return
+        for i in range(0, len(paquetes), self.batch_size):
+            self.packet_callback(paquetes[i:i + self.batch_size])
+
+    def _mezclar(self):
+        """
+        Bucle del hilo de mezcla.
+
+        Periódicamente entrega los paquetes cuya ventana de reordenación ya ha
+        vencido. Al detenerse, entrega todo lo que quede en el montículo.
+        """
+        intervalo = self.reorder_window / 2
+        while not self.stop_event.wait(intervalo):
+            self._entregar(self._extraer_listos(time.time() - self.reorder_window))
+        # `stop()` ya ha esperado a que los captores entreguen sus últimos lotes.
+        self._entregar(self._extraer_listos(float("inf")))
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores por interfaz.
+
+        Returns:
+            dict: Para cada interfaz, un diccionario con "paquetes" y "bytes"
+                  recibidos y, si el backend los ofrece, los contadores del
+                  kernel bajo la clave "kernel".
+        """
+        resultado = {}
+        for iface, captor in self.captores.items():
+            datos = dict(self.contadores[iface])
+            kernel = captor.estadisticas()
+            if kernel is not None:
+                datos["kernel"] = kernel
+            resultado[iface] = datos
+        return resultado
+
+    def estadisticas_kernel(self):
+        """
+        Suma los contadores del kernel de todas las interfaces.
+
+        Returns:
+            dict or None: Con las mismas claves que `PacketCaptor.estadisticas`,
+                          o None si ningún captor ofrece contadores del kernel.
+        """
+        total = None
+        for captor in self.captores.values():
+            kernel = captor.estadisticas()
+            if kernel is None:
+                continue
+            if total is None:
+                total = dict.fromkeys(kernel, 0)
+            for clave, valor in kernel.items():
+                total[clave] = total.get(clave, 0) + valor
+        return total
@@ -6,17 +6,91 @@ más adecuada para la captura de paquetes. La lógica está diseñada para ser r
 y priorizar las interfaces físicas locales (como Wi-Fi o Ethernet) sobre
 interfaces virtuales (como VPNs o adaptadores de software) que podrían no
 reflejar el tráfico de red real del usuario.
+
+En Linux, la ruta por defecto se lee directamente de `/proc/net/route` y las
+direcciones se obtienen del kernel, sin construir la tabla de rutas de Scapy.
+El resultado se guarda en una pequeña caché en disco para que los siguientes
+arranques no tengan que repetir la detección.
 """
+import ipaddress
+import json
+import os
 import sys
-from scapy.config import conf
-from scapy.arch import get_if_addr
-from scapy.arch.windows import get_windows_if_list
+import time
+from core.interfaces import obtener_registro, ipv4_de_interfaz
+
+# Rangos de direcciones privadas (RFC 1918), precalculados una sola vez.
+REDES_PRIVADAS = tuple(ipaddress.ip_network(red) for red in ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"))
+
+# Tabla de rutas IPv4 del kernel de Linux y el indicador de ruta activa.
+RUTA_PROC_NET_ROUTE = "/proc/net/route"
+RTF_UP = 0x0001
+# En Linux, solo las interfaces con un dispositivo físico detrás tienen este
+# enlace en sysfs; los puentes (docker0, virbr0, br-*), veth y tun no.
+RUTA_SYS_CLASS_NET = "/sys/class/net"
+
+# Tiempo (en segundos) durante el que se reutiliza la detección guardada en disco.
+TTL_CACHE_RED = 12 * 3600
+
+def _ruta_cache():
+    """Devuelve la ruta del archivo de caché de la detección de red."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cybertrainer", "red.json")
+
+def es_ip_privada(ip_address):
+    """
+    Indica si una dirección IPv4 pertenece a un rango privado (RFC 1918).
+
+    Args:
+        ip_address (str): La dirección a comprobar.
+
+    Returns:
+        bool: True si la dirección es privada; False si no lo es o no es válida.
+    """
+    try:
+        ip = ipaddress.IPv4Address(ip_address)
+    except ValueError:
+        return False
+    return any(ip in red for red in REDES_PRIVADAS)
+
+def _leer_ruta_por_defecto_linux(ruta=RUTA_PROC_NET_ROUTE):
+    """
+    Obtiene la interfaz de la ruta por defecto leyendo la tabla de rutas del kernel.
+
+    Args:
+        ruta (str): Ruta del archivo con la tabla (por defecto, `/proc/net/route`).
+
+    Returns:
+        str or None: El nombre de la interfaz de la ruta por defecto con menor
+                     métrica, o None si no hay ninguna.
+    """
+    mejor = None
+    with open(ruta) as f:
+        next(f, None)  # Cabecera
+        for linea in f:
+            campos = linea.split()
+            if len(campos) < 8:
+                continue
+            iface, destino, flags, metrica, mascara = campos[0], campos[1], int(campos[3], 16), int(campos[6]), campos[7]
+            if destino != "00000000" or mascara != "00000000" or not flags & RTF_UP:
+                continue
+            if mejor is None or metrica < mejor[0]:
+                mejor = (metrica, iface)
+    return mejor[1] if mejor else None
+
+def _es_interfaz_fisica_linux(nombre):
+    """Indica si una interfaz de Linux corresponde a un dispositivo físico (tiene `device` en sysfs)."""
+    return os.path.exists(os.path.join(RUTA_SYS_CLASS_NET, nombre, "device"))
 
 def _get_default_route_info():
     """
     Obtiene la interfaz y la IP a través de la ruta por defecto del sistema.
 
-    Este método sirve como un mecanismo de respaldo. Intenta consultar la tabla de
+    Este método sirve como un mecanismo de respaldo. En Linux lee la ruta por
+    defecto de `/proc/net/route`; en el resto de sistemas consulta la tabla de
     enrutamiento de Scapy para encontrar la interfaz utilizada para el tráfico
     general de Internet (ruta 0.0.0.0/0). Puede ser menos fiable si hay
     múltiples rutas o configuraciones de red complejas.
@@ -26,49 +100,138 @@ def _get_default_route_info():
                                        y su dirección IP, o (None, None) si falla.
     """
     try:
-        # Consulta la tabla de enrutamiento para la ruta por defecto.
-        default_route_info = conf.route.route("0.0.0.0/0")
-        iface_name = default_route_info[0]
+        if sys.platform.startswith("linux"):
+            iface_name = _leer_ruta_por_defecto_linux()
+            if iface_name is None:
+                print("Error al determinar la ruta por defecto: no hay ninguna ruta 0.0.0.0/0.", file=sys.stderr)
+                return None, None
+        else:
+            # Consulta la tabla de enrutamiento de Scapy (se importa solo si hace falta).
+            from scapy.config import conf
+            default_route_info = conf.route.route("0.0.0.0/0")
+            iface_name = default_route_info[0]
         # Una vez que tenemos el nombre, obtenemos su dirección IP.
-        ip_address = get_if_addr(iface_name)
+        ip_address = ipv4_de_interfaz(iface_name)
         if not ip_address:
             # Es posible que una interfaz no tenga una IP v4 asignada.
             print(f"Advertencia: La interfaz de ruta por defecto '{iface_name}' no tiene una dirección IPv4 asignada.", file=sys.stderr)
         return iface_name, ip_address
     except Exception as e:
-        # Esto puede fallar si Scapy no puede determinar la ruta.
+        # Esto puede fallar si no se puede determinar la ruta.
         print(f"Error al determinar la ruta por defecto: {e}", file=sys.stderr)
         return None, None
 
-def get_active_network_info():
+def _leer_cache():
+    """
+    Lee la detección guardada en disco si sigue siendo válida.
+
+    Se descarta si ha caducado, si la interfaz ya no aparece en el registro de
+    interfaces o ya no tiene la misma dirección IP (por ejemplo, porque el
+    equipo ha cambiado de red). En Linux la dirección se pregunta además al
+    kernel, que es barato y no depende de la antigüedad de la instantánea, y
+    también se descarta si no coincide con la detección actual: la interfaz de
+    la ruta por defecto o, si no hay ruta, una interfaz física. Así no
+    sobrevive una detección antigua que eligió un puente como docker0.
+
+    Returns:
+        tuple[str, str] or None: (nombre_interfaz, direccion_ip) o None.
+    """
+    try:
+        with open(_ruta_cache()) as f:
+            datos = json.load(f)
+        iface_name, ip_address = datos["interface"], datos["ip"]
+        if time.time() - datos["timestamp"] > TTL_CACHE_RED:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    try:
+        interfaces = obtener_registro().obtener_interfaces()
+    except RuntimeError:
+        return None
+    if not any(iface.name == iface_name and ip_address in iface.ips for iface in interfaces):
+        return None
+    if sys.platform.startswith("linux"):
+        if ipv4_de_interfaz(iface_name) != ip_address:
+            return None
+        try:
+            ruta_por_defecto = _leer_ruta_por_defecto_linux()
+        except OSError:
+            ruta_por_defecto = None
+        if ruta_por_defecto is not None and ruta_por_defecto != iface_name:
+            return None
+        if ruta_por_defecto is None and not _es_interfaz_fisica_linux(iface_name):
+            return None
+    return iface_name, ip_address
+
+def _guardar_cache(iface_name, ip_address):
+    """Guarda en disco el resultado de la detección (los errores se ignoran)."""
+    ruta = _ruta_cache()
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w") as f:
+            json.dump({"interface": iface_name, "ip": ip_address, "timestamp": time.time()}, f)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar la caché de red: {e}", file=sys.stderr)
+
+def get_active_network_info(usar_cache=True):
     """
     Determina la interfaz de red activa y su dirección IPv4.
 
-    Esta función implementa una estrategia de varias etapas para encontrar la mejor
-    interfaz para monitorear:
+    En Linux, la respuesta es la interfaz de la ruta por defecto (leída de
+    `/proc/net/route`) si tiene una dirección IPv4. Si no la hay, o en el resto
+    de sistemas, se sigue una estrategia de varias etapas:
     1.  Primero, busca interfaces que parezcan ser físicas (no VPN, no loopback)
         y que tengan una dirección IP privada (ej. 192.168.x.x). Esto suele
-        corresponder a la conexión Wi-Fi o Ethernet principal.
+        corresponder a la conexión Wi-Fi o Ethernet principal. En Linux, donde
+        la descripción es el propio nombre, se descartan además las interfaces
+        sin dispositivo físico (puentes de Docker o libvirt, veth, tun).
     2.  Si no encuentra una candidata clara, recurre a la función
         `_get_default_route_info` como plan B.
 
+    Si hay una detección reciente guardada en disco y sigue siendo válida, se
+    devuelve directamente sin repetir el proceso.
+
+    Args:
+        usar_cache (bool): Si es False, se ignora la caché en disco.
+
     Returns:
         tuple[str | None, str | None]: Una tupla de (nombre_interfaz, direccion_ip)
                                        o (None, None) si no se encuentra ninguna
                                        interfaz adecuada.
     """
+    if usar_cache:
+        cacheado = _leer_cache()
+        if cacheado:
+            return cacheado
+
+    es_linux = sys.platform.startswith("linux")
+    if es_linux:
+        # La ruta por defecto indica la interfaz por la que sale el tráfico real,
+        # aunque haya puentes virtuales con IPs privadas (ej. docker0).
+        try:
+            iface_name = _leer_ruta_por_defecto_linux()
+        except OSError:
+            iface_name = None
+        ip_address = ipv4_de_interfaz(iface_name) if iface_name else None
+        if ip_address:
+            _guardar_cache(iface_name, ip_address)
+            return iface_name, ip_address
+
     # Palabras clave para identificar y excluir interfaces virtuales o no deseadas.
     # Esto ayuda a ignorar adaptadores de VPN, VirtualBox, etc.
     EXCLUSION_KEYWORDS = ['loopback', 'vpn', 'tap', 'virtual', 'teredo', 'isatap']
-    
+
     candidate_interfaces = []
-    all_interfaces = get_windows_if_list()
+    # La lista sale del registro compartido, que ya la tiene en caché.
+    all_interfaces = obtener_registro().obtener_interfaces()
 
     # 1. Filtrar para encontrar interfaces físicas con IPs locales
     for iface in all_interfaces:
-        description = iface.get('description', '').lower()
-        ip_address = iface.get('ip')
-        iface_name = iface.get('name')
+        description = iface.description.lower()
+        ip_address = iface.ips[0] if iface.ips else None
+        iface_name = iface.name
 
         # Omitir si la interfaz no tiene IP, nombre, o si su descripción
         # contiene una de las palabras clave de exclusión.
@@ -76,16 +239,19 @@ def get_active_network_info():
             continue
         if any(keyword in description for keyword in EXCLUSION_KEYWORDS):
             continue
+        if es_linux and not _es_interfaz_fisica_linux(iface_name):
+            continue
 
-        # Comprobar si la IP pertenece a los rangos de red privada más comunes.
+        # Comprobar si la IP pertenece a los rangos de red privada.
         # Esto aumenta la probabilidad de que sea una red LAN.
-        if ip_address.startswith(('192.168.', '10.', '172.16.', '172.17.', '172.18.', '172.19.', '172.2', '172.30.', '172.31.')):
+        if es_ip_privada(ip_address):
             candidate_interfaces.append((iface_name, ip_address))
 
     # Si la estrategia 1 tuvo éxito, devolvemos el primer candidato encontrado.
     if candidate_interfaces:
         iface_name, ip_address = candidate_interfaces[0]
         print(f"Interfaz física local encontrada: {iface_name} ({ip_address})")
+        _guardar_cache(iface_name, ip_address)
         return iface_name, ip_address
 
     # --- Estrategia 2: Fallback a la ruta por defecto ---
@@ -95,4 +261,7 @@ def get_active_network_info():
         "Advertencia: No se encontró una interfaz de red local estándar (ej. Wi-Fi con IP 192.168.x.x).\n"
         "Esto puede ocurrir si usas una VPN o una red no estándar. Intentando con la ruta por defecto...",
         file=sys.stderr)
-    return _get_default_route_info()
+    iface_name, ip_address = _get_default_route_info()
+    if iface_name and ip_address:
+        _guardar_cache(iface_name, ip_address)
+    return iface_name, ip_address
@@ -0,0 +1,175 @@
+"""
+Módulo de representación compacta de paquetes.
+
+Este archivo define `PaqueteCrudo`, una representación ligera de un paquete
+capturado que guarda únicamente los bytes de la trama, su marca de tiempo y el
+tipo de enlace. La disección completa con Scapy (que es costosa en CPU y en
+memoria) se realiza solo cuando algo la necesita, por ejemplo al mostrar los
+detalles de un paquete o al exportarlo, y el resultado se conserva en una
+pequeña caché LRU para no repetir el trabajo.
+"""
+
+import struct
+from collections import OrderedDict
+from scapy.config import conf
+from scapy.packet import Packet
+# Registra las capas de enlace (Ether, Loopback...) y las capas IP en
+# `conf.l2types`, necesarias para diseccionar las tramas en crudo.
+import scapy.layers.inet  # noqa: F401
+
+class PaqueteCrudo:
+    """
+    Trama capturada sin diseccionar.
+
+    Usa `__slots__` para que cada instancia ocupe el mínimo de memoria: solo
+    los bytes de la trama y un par de campos escalares.
+    """
+    __slots__ = ("datos", "time", "linktype", "sniffed_on", "wirelen")
+
+    def __init__(self, datos, time, linktype, sniffed_on=None, wirelen=None):
+        """
+        Args:
+            datos (bytes): Los bytes de la trama tal y como se capturaron.
+            time (float): Marca de tiempo de la captura (segundos desde epoch).
+            linktype (int): Tipo de enlace (DLT) de la trama, ej. 1 para Ethernet.
+            sniffed_on (str, optional): Interfaz en la que se capturó. Usa el
+                                        mismo nombre que el atributo de Scapy.
+            wirelen (int, optional): Longitud original de la trama en la red,
+                                     si se capturó truncada (snaplen).
+        """
+        self.datos = datos
+        self.time = time
+        self.linktype = linktype
+        self.sniffed_on = sniffed_on
+        self.wirelen = wirelen
+
+    def __len__(self):
+        """Longitud original de la trama (no la capturada, si se truncó)."""
+        return self.wirelen or len(self.datos)
+
+    @classmethod
+    def desde_paquete(cls, packet, linktype=None):
+        """
+        Convierte un paquete de Scapy ya diseccionado en una trama compacta.
+
+        Se usa, por ejemplo, al importar un pcap: se conserva solo lo necesario
+        para volver a diseccionarlo bajo demanda y el objeto de Scapy se libera.
+
+        Args:
+            packet (scapy.packet.Packet): El paquete a convertir.
+            linktype (int, optional): Tipo de enlace. Si no se indica, se
+                                      deduce de la primera capa del paquete.
+
+        Returns:
+            PaqueteCrudo: La trama con los bytes originales del paquete.
+        """
+        datos = getattr(packet, "original", None) or bytes(packet)
+        if linktype is None:
+            linktype = conf.l2types.layer2num.get(type(packet), 1)  # 1 = Ethernet (DLT_EN10MB)
+        wirelen = getattr(packet, "wirelen", None)
+        return cls(datos, float(packet.time), linktype, getattr(packet, "sniffed_on", None),
+                   wirelen if wirelen and wirelen != len(datos) else None)
+
+    def decodificar(self):
+        """
+        Construye el paquete de Scapy correspondiente a esta trama.
+
+        Returns:
+            scapy.packet.Packet: El paquete diseccionado, con su `time` original.
+        """
+        cls = conf.l2types.num2layer.get(self.linktype, conf.raw_layer)
+        try:
+            packet = cls(self.datos)
+        except Exception:
+            # Una trama malformada no debe impedir mostrarla.
+            packet = conf.raw_layer(self.datos)
+        packet.time = self.time
+        packet.sniffed_on = self.sniffed_on
+        # Scapy usa `wirelen` al exportar a pcap para conservar la longitud original.
+        packet.wirelen = self.wirelen
+        return packet
+
+def estimar_longitud_original(datos, linktype):
+    """
+    Estima la longitud original de una trama truncada a partir de sus cabeceras.
+
+    Se usa cuando el backend de captura no informa de la longitud en la red
+    (por ejemplo, los sockets de Scapy). Para tramas Ethernet con IPv4 o IPv6
+    (con o sin etiqueta VLAN) la longitud se deduce de la cabecera IP.
+
+    Args:
+        datos (bytes): Los bytes capturados (al menos las cabeceras).
+        linktype (int): Tipo de enlace (DLT) de la trama.
+
+    Returns:
+        int or None: La longitud estimada, o None si no se puede deducir.
+    """
+    if linktype != 1 or len(datos) < 14:
+        return None
+    offset = 14
+    ethertype = struct.unpack_from("!H", datos, 12)[0]
+    if ethertype == 0x8100 and len(datos) >= 18:
+        ethertype = struct.unpack_from("!H", datos, 16)[0]
+        offset = 18
+    if ethertype == 0x0800 and len(datos) >= offset + 4:
+        return offset + struct.unpack_from("!H", datos, offset + 2)[0]
+    if ethertype == 0x86DD and len(datos) >= offset + 6:
+        return offset + 40 + struct.unpack_from("!H", datos, offset + 4)[0]
+    return None
+
+class CacheLRU:
+    """
+    Caché de tamaño fijo que descarta el elemento usado hace más tiempo.
+    """
+    def __init__(self, capacidad=256):
+        """
+        Args:
+            capacidad (int): Número máximo de elementos que se conservan.
+        """
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+
+    def obtener(self, clave):
+        """Devuelve el valor asociado a `clave` (o None) y lo marca como reciente."""
+        valor = self._datos.get(clave)
+        if valor is not None:
+            self._datos.move_to_end(clave)
+        return valor
+
+    def guardar(self, clave, valor):
+        """Guarda un valor, descartando el más antiguo si se supera la capacidad."""
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        if len(self._datos) > self.capacidad:
+            self._datos.popitem(last=False)
+
+    def clear(self):
+        """Vacía la caché."""
+        self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+def decodificar(elemento, cache=None):
+    """
+    Devuelve el paquete de Scapy de un elemento capturado.
+
+    Acepta tanto paquetes de Scapy (que se devuelven sin cambios) como
+    `PaqueteCrudo`, que se disecciona bajo demanda.
+
+    Args:
+        elemento (scapy.packet.Packet | PaqueteCrudo): El elemento a decodificar.
+        cache (CacheLRU, optional): Caché donde buscar y guardar la disección.
+
+    Returns:
+        scapy.packet.Packet: El paquete diseccionado.
+    """
+    if isinstance(elemento, Packet):
+        return elemento
+    if cache is None:
+        return elemento.decodificar()
+    packet = cache.obtener(elemento)
+    if packet is None:
+        packet = elemento.decodificar()
+        cache.guardar(elemento, packet)
+    return packet
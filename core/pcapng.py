@@ -0,0 +1,256 @@
+"""
+Módulo de lectura y escritura de archivos pcapng.
+
+El formato pcap clásico solo guarda los bytes y la marca de tiempo de cada
+paquete, así que al exportar se pierde, por ejemplo, qué paquetes generó el
+simulador de ataques. pcapng permite guardar además una descripción de cada
+interfaz y comentarios y flags por paquete, que Wireshark muestra y que esta
+aplicación vuelve a leer al importar.
+
+Este archivo implementa el subconjunto del formato que se necesita (bloques
+SHB, IDB y EPB, y la lectura de SPB) directamente con `struct`, escribiendo y
+leyendo bloque a bloque para no tener que cargar la sesión entera en memoria.
+"""
+
+import struct
+from collections import namedtuple
+from core.paquetes import PaqueteCrudo
+
+# Tipos de bloque (pcapng, sección 11).
+BLOQUE_SHB = 0x0A0D0D0A
+BLOQUE_IDB = 0x00000001
+BLOQUE_SPB = 0x00000003
+BLOQUE_EPB = 0x00000006
+MAGIA_ORDEN_BYTES = 0x1A2B3C4D
+
+# Códigos de opción.
+OPT_FIN = 0
+OPT_COMENTARIO = 1
+OPT_SHB_APLICACION = 4
+OPT_IF_NOMBRE = 2
+OPT_IF_DESCRIPCION = 3
+OPT_IF_TSRESOL = 9
+OPT_EPB_FLAGS = 2
+
+# Flags de EPB (sección 4.3.1): dirección del paquete en los bits 0-1.
+FLAG_ENTRANTE = 0x1
+FLAG_SALIENTE = 0x2
+
+# Comentario con el que se marcan los paquetes del simulador de ataques.
+PREFIJO_SIMULADO = "simulated: "
+
+RegistroPcapNg = namedtuple("RegistroPcapNg", ["paquete", "comentarios", "flags"])
+
+def es_pcapng(ruta):
+    """
+    Indica si un archivo es pcapng mirando su primer bloque.
+
+    Args:
+        ruta (str): Ruta del archivo.
+
+    Returns:
+        bool: True si empieza por un Section Header Block.
+    """
+    with open(ruta, "rb") as f:
+        cabecera = f.read(4)
+    return len(cabecera) == 4 and struct.unpack("<I", cabecera)[0] == BLOQUE_SHB
+
+def _opcion(codigo, valor):
+    """Codifica una opción (código, longitud, valor con relleno a 4 bytes)."""
+    return struct.pack("<HH", codigo, len(valor)) + valor + b"\x00" * (-len(valor) % 4)
+
+def _opciones(lista):
+    """Codifica una lista de opciones (código, bytes) terminada en opt_endofopt."""
+    if not lista:
+        return b""
+    return b"".join(_opcion(codigo, valor) for codigo, valor in lista) + struct.pack("<HH", OPT_FIN, 0)
+
+def _bloque(tipo, cuerpo):
+    """Envuelve un cuerpo con el tipo y la longitud total del bloque (al principio y al final)."""
+    longitud = 12 + len(cuerpo)
+    return struct.pack("<II", tipo, longitud) + cuerpo + struct.pack("<I", longitud)
+
+class EscritorPcapNg:
+    """
+    Escribe paquetes en un archivo pcapng a medida que se le entregan.
+
+    Cada combinación de (tipo de enlace, nombre de interfaz) distinta se
+    declara con su propio Interface Description Block la primera vez que
+    aparece. Las marcas de tiempo se guardan con resolución de microsegundos.
+    """
+    def __init__(self, ruta, aplicacion="CyberTrainer", descripciones=None, buffer_size=1024 * 1024):
+        """
+        Abre el archivo y escribe la cabecera de sección.
+
+        Args:
+            ruta (str): Ruta del archivo a crear.
+            aplicacion (str): Nombre de la aplicación que se guarda en la cabecera.
+            descripciones (dict, optional): Descripción de cada interfaz por nombre.
+            buffer_size (int): Tamaño del búfer de escritura.
+        """
+        self.descripciones = dict(descripciones or {})
+        self._interfaces = {}
+        self._f = open(ruta, "wb", buffering=buffer_size)
+        cuerpo = struct.pack("<IHHq", MAGIA_ORDEN_BYTES, 1, 0, -1)
+        cuerpo += _opciones([(OPT_SHB_APLICACION, aplicacion.encode("utf-8"))])
+        self._f.write(_bloque(BLOQUE_SHB, cuerpo))
+
+    def _id_interfaz(self, linktype, nombre):
+        """Devuelve el identificador de la interfaz, declarándola si es nueva."""
+        clave = (linktype, nombre)
+        if clave not in self._interfaces:
+            opciones = []
+            if nombre:
+                opciones.append((OPT_IF_NOMBRE, nombre.encode("utf-8")))
+                if self.descripciones.get(nombre):
+                    opciones.append((OPT_IF_DESCRIPCION, self.descripciones[nombre].encode("utf-8")))
+            opciones.append((OPT_IF_TSRESOL, b"\x06"))  # Microsegundos.
+            cuerpo = struct.pack("<HHI", linktype, 0, 0) + _opciones(opciones)
+            self._f.write(_bloque(BLOQUE_IDB, cuerpo))
+            self._interfaces[clave] = len(self._interfaces)
+        return self._interfaces[clave]
+
+    def escribir(self, paquete, comentarios=(), flags=None, interfaz=None):
+        """
+        Añade un paquete al archivo.
+
+        Args:
+            paquete (PaqueteCrudo | scapy.packet.Packet): El paquete a escribir.
+            comentarios (list[str]): Comentarios del paquete (ej. "simulated: Escaneo SYN").
+            flags (int, optional): Flags del EPB (ej. `FLAG_ENTRANTE`).
+            interfaz (str, optional): Nombre de la interfaz. Por defecto, el
+                                      atributo `sniffed_on` del paquete.
+        """
+        if not isinstance(paquete, PaqueteCrudo):
+            paquete = PaqueteCrudo.desde_paquete(paquete)
+        id_interfaz = self._id_interfaz(paquete.linktype, interfaz or paquete.sniffed_on)
+        marca = int(round(paquete.time * 1_000_000))
+        datos = paquete.datos
+        opciones = [(OPT_COMENTARIO, c.encode("utf-8")) for c in comentarios]
+        if flags is not None:
+            opciones.append((OPT_EPB_FLAGS, struct.pack("<I", flags)))
+        cuerpo = struct.pack("<IIIII", id_interfaz, marca >> 32, marca & 0xFFFFFFFF, len(datos), len(paquete))
+        cuerpo += datos + b"\x00" * (-len(datos) % 4) + _opciones(opciones)
+        self._f.write(_bloque(BLOQUE_EPB, cuerpo))
+
+    def close(self):
+        """Vuelca el búfer y cierra el archivo."""
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _leer_opciones(datos, orden):
+    """
+    Decodifica las opciones de un bloque.
+
+    Returns:
+        list[tuple[int, bytes]]: Pares (código, valor) en orden de aparición.
+    """
+    opciones = []
+    pos = 0
+    while pos + 4 <= len(datos):
+        codigo, longitud = struct.unpack_from(orden + "HH", datos, pos)
+        pos += 4
+        if codigo == OPT_FIN:
+            break
+        opciones.append((codigo, datos[pos:pos + longitud]))
+        pos += longitud + (-longitud % 4)
+    return opciones
+
+class LectorPcapNg:
+    """
+    Lee un archivo pcapng bloque a bloque.
+
+    Al iterar devuelve un `RegistroPcapNg` por paquete, con la trama como
+    `PaqueteCrudo` (cuyo `sniffed_on` es el nombre de su interfaz), sus
+    comentarios y sus flags. La descripción de cada interfaz queda en
+    `descripciones`. Acepta secciones en ambos órdenes de bytes.
+    """
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta (str): Ruta del archivo.
+
+        Raises:
+            ValueError: Si el archivo no es pcapng.
+        """
+        self.f = open(ruta, "rb")
+        if not es_pcapng(ruta):
+            self.f.close()
+            raise ValueError("El archivo no tiene formato pcapng.")
+        self.descripciones = {}
+        self._orden = "<"
+        self._interfaces = []  # (linktype, nombre, segundos por unidad de tiempo)
+
+    def __iter__(self):
+        while True:
+            cabecera = self.f.read(8)
+            if len(cabecera) < 8:
+                return
+            tipo = struct.unpack("<I", cabecera[:4])[0]
+            if tipo == BLOQUE_SHB:
+                # El orden de bytes de la sección se deduce de su número mágico.
+                magia = self.f.read(4)
+                self._orden = "<" if struct.unpack("<I", magia)[0] == MAGIA_ORDEN_BYTES else ">"
+                longitud = struct.unpack(self._orden + "I", cabecera[4:])[0]
+                self.f.read(longitud - 12)
+                self._interfaces = []
+                continue
+            tipo, longitud = struct.unpack(self._orden + "II", cabecera)
+            cuerpo = self.f.read(longitud - 8)
+            if len(cuerpo) < longitud - 8:
+                return  # Archivo truncado: se descarta el último bloque incompleto.
+            cuerpo = cuerpo[:-4]
+            if tipo == BLOQUE_IDB:
+                self._leer_idb(cuerpo)
+            elif tipo == BLOQUE_EPB:
+                yield self._leer_epb(cuerpo)
+            elif tipo == BLOQUE_SPB and self._interfaces:
+                linktype, nombre, _ = self._interfaces[0]
+                longitud_original = struct.unpack_from(self._orden + "I", cuerpo)[0]
+                datos = cuerpo[4:4 + longitud_original]
+                wirelen = longitud_original if longitud_original != len(datos) else None
+                yield RegistroPcapNg(PaqueteCrudo(datos, 0.0, linktype, nombre, wirelen), [], None)
+
+    def _leer_idb(self, cuerpo):
+        """Registra una interfaz con su tipo de enlace, nombre y resolución temporal."""
+        linktype = struct.unpack_from(self._orden + "H", cuerpo)[0]
+        nombre, resolucion = None, 1e-6
+        for codigo, valor in _leer_opciones(cuerpo[8:], self._orden):
+            if codigo == OPT_IF_NOMBRE:
+                nombre = valor.decode("utf-8", "replace")
+            elif codigo == OPT_IF_DESCRIPCION and nombre:
+                self.descripciones[nombre] = valor.decode("utf-8", "replace")
+            elif codigo == OPT_IF_TSRESOL and valor:
+                exponente = valor[0] & 0x7F
+                resolucion = 2.0 ** -exponente if valor[0] & 0x80 else 10.0 ** -exponente
+        self._interfaces.append((linktype, nombre, resolucion))
+
+    def _leer_epb(self, cuerpo):
+        """Construye el registro de un Enhanced Packet Block."""
+        id_interfaz, alta, baja, caplen, longitud_original = struct.unpack_from(self._orden + "IIIII", cuerpo)
+        linktype, nombre, resolucion = self._interfaces[id_interfaz]
+        datos = cuerpo[20:20 + caplen]
+        comentarios, flags = [], None
+        for codigo, valor in _leer_opciones(cuerpo[20 + caplen + (-caplen % 4):], self._orden):
+            if codigo == OPT_COMENTARIO:
+                comentarios.append(valor.decode("utf-8", "replace"))
+            elif codigo == OPT_EPB_FLAGS and len(valor) == 4:
+                flags = struct.unpack(self._orden + "I", valor)[0]
+        marca = ((alta << 32) | baja) * resolucion
+        wirelen = longitud_original if longitud_original != caplen else None
+        return RegistroPcapNg(PaqueteCrudo(datos, marca, linktype, nombre, wirelen), comentarios, flags)
+
+    def close(self):
+        """Cierra el archivo."""
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
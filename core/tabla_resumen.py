@@ -0,0 +1,267 @@
+"""
+Módulo de la tabla columnar de resúmenes de paquetes.
+
+Las columnas de la lista de paquetes (hora, origen, destino, protocolo,
+longitud e información) solo existían como texto en el Treeview y como
+atributos de objetos de Scapy. Este archivo define `TablaResumen`, que guarda
+esos campos en arrays de NumPy (las direcciones IPv4 como enteros de 32 bits,
+los puertos, un código de protocolo y las longitudes) y los textos de
+información y los nombres de interfaz en tablas de cadenas internadas. La tabla se rellena a medida
+que llegan los paquetes, y el filtrado, la ordenación y las estadísticas se
+hacen con operaciones vectorizadas en lugar de bucles de Python.
+"""
+
+import socket
+import struct
+import numpy as np
+from core.clasificador import ResumenPaquete
+
+# Códigos de protocolo de la columna `protocolo` (el índice en la tupla).
+PROTOCOLOS = ("N/A", "IP", "TCP", "UDP", "ARP")
+CODIGO_PROTOCOLO = {nombre: codigo for codigo, nombre in enumerate(PROTOCOLOS)}
+
+# Tipo de cada columna. Las direcciones y puertos de los paquetes que no los
+# tienen valen 0 (el protocolo indica si son válidos).
+COLUMNAS = {
+    "tiempo": np.float64,
+    "origen": np.uint32,
+    "destino": np.uint32,
+    "puerto_origen": np.uint16,
+    "puerto_destino": np.uint16,
+    "protocolo": np.uint8,
+    "longitud": np.uint32,
+    "info": np.int32,
+    "interfaz": np.uint16,
+}
+
+def ip_a_entero(ip):
+    """
+    Convierte una dirección IPv4 en texto a entero.
+
+    Args:
+        ip (str): La dirección (ej. "192.168.1.1").
+
+    Returns:
+        int: El entero de 32 bits, o 0 si no es una IPv4 válida (ej. "N/A").
+    """
+    try:
+        return struct.unpack("!I", socket.inet_aton(ip))[0]
+    except (OSError, TypeError):
+        return 0
+
+def entero_a_ip(valor):
+    """Convierte un entero de 32 bits en una dirección IPv4 en texto."""
+    return socket.inet_ntoa(struct.pack("!I", int(valor)))
+
+class TablaResumen:
+    """
+    Almacén columnar de los resúmenes de los paquetes, en el orden de la lista.
+
+    La fila i corresponde al paquete i de la lista (empezando en 0). Las
+    columnas se exponen como vistas de NumPy de longitud `len(tabla)` con
+    `tabla.columna(nombre)`; no deben modificarse. Los arrays crecen
+    duplicando su capacidad, de modo que añadir filas una a una cuesta O(1)
+    amortizado.
+    """
+    def __init__(self, capacidad_inicial=1024):
+        """
+        Args:
+            capacidad_inicial (int): Filas reservadas al crear la tabla.
+        """
+        self._capacidad_inicial = capacidad_inicial
+        self.clear()
+
+    def clear(self):
+        """Elimina todas las filas y la tabla de cadenas."""
+        self._n = 0
+        self._columnas = {nombre: np.zeros(self._capacidad_inicial, dtype=tipo) for nombre, tipo in COLUMNAS.items()}
+        self.textos = []  # Tabla de cadenas internadas de la columna `info`.
+        self._id_texto = {}
+        self.interfaces = [None]  # Nombres de la columna `interfaz`; 0 es "desconocida".
+        self._id_interfaz = {None: 0}
+
+    def __len__(self):
+        return self._n
+
+    def _asegurar_capacidad(self, necesaria):
+        """Amplía los arrays (al menos al doble) si no caben `necesaria` filas."""
+        capacidad = len(self._columnas["tiempo"])
+        if necesaria <= capacidad:
+            return
+        nueva = max(necesaria, capacidad * 2)
+        for nombre, array in self._columnas.items():
+            ampliado = np.zeros(nueva, dtype=array.dtype)
+            ampliado[:self._n] = array[:self._n]
+            self._columnas[nombre] = ampliado
+
+    def _internar(self, texto):
+        """Devuelve el identificador de `texto` en la tabla de cadenas, añadiéndolo si es nuevo."""
+        identificador = self._id_texto.get(texto)
+        if identificador is None:
+            identificador = self._id_texto[texto] = len(self.textos)
+            self.textos.append(texto)
+        return identificador
+
+    def agregar(self, resumen, interfaz=None):
+        """
+        Añade una fila al final de la tabla.
+
+        Args:
+            resumen (ResumenPaquete): El resumen del paquete.
+            interfaz (str, optional): La interfaz en la que se capturó.
+        """
+        self._asegurar_capacidad(self._n + 1)
+        i = self._n
+        c = self._columnas
+        c["tiempo"][i] = resumen.time
+        c["origen"][i] = ip_a_entero(resumen.src)
+        c["destino"][i] = ip_a_entero(resumen.dst)
+        c["puerto_origen"][i] = resumen.sport or 0
+        c["puerto_destino"][i] = resumen.dport or 0
+        c["protocolo"][i] = CODIGO_PROTOCOLO.get(resumen.proto, 0)
+        c["longitud"][i] = resumen.length
+        c["info"][i] = self._internar(resumen.info)
+        id_interfaz = self._id_interfaz.get(interfaz)
+        if id_interfaz is None:
+            id_interfaz = self._id_interfaz[interfaz] = len(self.interfaces)
+            self.interfaces.append(interfaz)
+        c["interfaz"][i] = id_interfaz
+        self._n += 1
+
+    def agregar_lote(self, resumenes, interfaces=None):
+        """
+        Añade varias filas de una vez.
+
+        Args:
+            resumenes (list[ResumenPaquete]): Los resúmenes, en orden.
+            interfaces (list[str], optional): La interfaz de cada resumen.
+        """
+        self._asegurar_capacidad(self._n + len(resumenes))
+        for resumen, interfaz in zip(resumenes, interfaces or [None] * len(resumenes)):
+            self.agregar(resumen, interfaz)
+
+    def columna(self, nombre):
+        """
+        Devuelve una columna como vista de NumPy de las filas existentes.
+
+        Args:
+            nombre (str): Una de las claves de `COLUMNAS`.
+
+        Returns:
+            numpy.ndarray: Vista de solo lectura de la columna.
+        """
+        vista = self._columnas[nombre][:self._n]
+        vista.flags.writeable = False
+        return vista
+
+    def fila(self, i):
+        """
+        Reconstruye el resumen de una fila.
+
+        Args:
+            i (int): Índice de la fila.
+
+        Returns:
+            ResumenPaquete: El resumen, con las direcciones otra vez como texto.
+
+        Raises:
+            IndexError: Si `i` está fuera de rango.
+        """
+        if not -self._n <= i < self._n:
+            raise IndexError(i)
+        c = self._columnas
+        proto = PROTOCOLOS[c["protocolo"][i]]
+        con_direcciones = proto != "N/A"
+        con_puertos = proto in ("TCP", "UDP")
+        return ResumenPaquete(
+            float(c["tiempo"][i]),
+            entero_a_ip(c["origen"][i]) if con_direcciones else "N/A",
+            entero_a_ip(c["destino"][i]) if con_direcciones else "N/A",
+            proto, int(c["longitud"][i]), self.textos[c["info"][i]],
+            int(c["puerto_origen"][i]) if con_puertos else None,
+            int(c["puerto_destino"][i]) if con_puertos else None)
+
+    def interfaz(self, i):
+        """Devuelve la interfaz de la fila i (o None si no se indicó)."""
+        if not -self._n <= i < self._n:
+            raise IndexError(i)
+        return self.interfaces[self._columnas["interfaz"][i]]
+
+    def ordenar(self, nombre, descendente=False, indices=None):
+        """
+        Devuelve el orden de las filas según una columna (ordenación estable).
+
+        Args:
+            nombre (str): La columna por la que ordenar.
+            descendente (bool): Si el orden es de mayor a menor.
+            indices (numpy.ndarray, optional): Ordenar solo estas filas (ej. las
+                                               que pasan un filtro).
+
+        Returns:
+            numpy.ndarray: Índices de fila en el orden pedido.
+        """
+        valores = self.columna(nombre)
+        if nombre in ("info", "interfaz"):
+            # Ordenar por el texto, no por su identificador en la tabla de cadenas.
+            cadenas = self.textos if nombre == "info" else [i or "" for i in self.interfaces]
+            rango = np.argsort(np.array(cadenas, dtype=object), kind="stable").argsort()
+            valores = rango[valores]
+        if indices is None:
+            indices = np.arange(self._n)
+        valores = valores[indices]
+        if descendente:
+            # Ordenar al revés y deshacer la inversión mantiene el empate en el orden original.
+            orden = len(valores) - 1 - np.argsort(valores[::-1], kind="stable")[::-1]
+        else:
+            orden = np.argsort(valores, kind="stable")
+        return indices[orden]
+
+    def estadisticas(self, indices=None, top=5):
+        """
+        Calcula estadísticas de las filas (o de un subconjunto de ellas).
+
+        Args:
+            indices (numpy.ndarray, optional): Filas a considerar; por defecto, todas.
+            top (int): Número de direcciones de origen más activas que se devuelven.
+
+        Returns:
+            dict: "paquetes", "bytes", "duracion" (segundos entre el primer y el
+                  último paquete), "protocolos" ({nombre: (paquetes, bytes)}) y
+                  "origenes" (lista de (ip, paquetes) de mayor a menor).
+        """
+        seleccion = slice(None) if indices is None else indices
+        tiempos = self.columna("tiempo")[seleccion]
+        longitudes = self.columna("longitud")[seleccion].astype(np.int64)
+        protocolos = self.columna("protocolo")[seleccion]
+        paquetes_por_proto = np.bincount(protocolos, minlength=len(PROTOCOLOS))
+        bytes_por_proto = np.bincount(protocolos, weights=longitudes, minlength=len(PROTOCOLOS))
+        con_ip = protocolos != CODIGO_PROTOCOLO["N/A"]
+        origenes, cuentas = np.unique(self.columna("origen")[seleccion][con_ip], return_counts=True)
+        mas_activos = np.argsort(cuentas, kind="stable")[::-1][:top]
+        return {
+            "paquetes": int(len(tiempos)),
+            "bytes": int(longitudes.sum()),
+            "duracion": float(tiempos.max() - tiempos.min()) if len(tiempos) else 0.0,
+            "protocolos": {PROTOCOLOS[c]: (int(paquetes_por_proto[c]), int(bytes_por_proto[c]))
+                           for c in range(len(PROTOCOLOS)) if paquetes_por_proto[c]},
+            "origenes": [(entero_a_ip(origenes[i]), int(cuentas[i])) for i in mas_activos],
+        }
+
+def formatear_estadisticas(datos):
+    """
+    Convierte el resultado de `TablaResumen.estadisticas` en texto legible.
+
+    Args:
+        datos (dict): Las estadísticas.
+
+    Returns:
+        str: Un resumen por protocolo y las direcciones de origen más activas.
+    """
+    lineas = [f"Paquetes en la lista: {datos['paquetes']} ({datos['bytes'] / 1024:.1f} KiB "
+              f"en {datos['duracion']:.1f} s)"]
+    for nombre, (paquetes, num_bytes) in sorted(datos["protocolos"].items(), key=lambda p: -p[1][0]):
+        lineas.append(f"  {nombre:<6} {paquetes:>10} paquetes  {num_bytes / 1024:>10.1f} KiB")
+    if datos["origenes"]:
+        lineas.append("Orígenes más activos:")
+        lineas.extend(f"  {ip:<15} {paquetes:>10} paquetes" for ip, paquetes in datos["origenes"])
+    return "\n".join(lineas)
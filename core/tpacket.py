@@ -0,0 +1,244 @@
+"""
+Módulo de captura en Linux mediante un anillo TPACKET_V3 en memoria compartida.
+
+Los sockets `AF_PACKET` normales (los que usa Scapy por defecto) requieren una
+llamada al sistema por cada paquete. Con `PACKET_RX_RING` y `TPACKET_V3`, el
+kernel escribe las tramas directamente en un anillo de bloques mapeado en la
+memoria del proceso (`mmap`), y el espacio de usuario solo tiene que recorrer
+cada bloque lleno y devolvérselo al kernel. Esto permite procesar miles de
+paquetes por cada despertar del hilo de captura.
+
+El anillo también informa, mediante `PACKET_STATISTICS`, de cuántos paquetes
+ha descartado el kernel por no encontrar un bloque libre.
+"""
+
+import mmap
+import select
+import socket
+import struct
+import threading
+from scapy.data import ARPHRD_TO_DLT, SO_ATTACH_FILTER
+from scapy.error import Scapy_Exception
+from core.paquetes import PaqueteCrudo
+
+# --- Constantes de <linux/if_packet.h> ---
+SOL_PACKET = 263
+PACKET_ADD_MEMBERSHIP = 1
+PACKET_MR_PROMISC = 1
+PACKET_RX_RING = 5
+PACKET_STATISTICS = 6
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+ETH_P_ALL = 0x0003
+# Instrucción BPF "ret #k": acepta el paquete copiando como máximo k bytes.
+BPF_RET_K = 0x06
+BPF_ACEPTAR_TODO = 0x40000
+
+# Tamaños por defecto del anillo: bloques de 1 MiB, 64 MiB en total.
+TAMANO_BLOQUE_DEFECTO = 1 << 20
+TAMANO_ANILLO_DEFECTO = 64 << 20
+TAMANO_TRAMA = 1 << 11
+# Tiempo (ms) tras el cual el kernel entrega un bloque aunque no esté lleno.
+TIMEOUT_BLOQUE_MS = 64
+
+# struct tpacket_req3
+_REQ3 = struct.Struct("7I")
+# struct tpacket_block_desc + tpacket_hdr_v1 (campos que se usan):
+# block_status, num_pkts, offset_to_first_pkt
+_BLOQUE_ESTADO = struct.Struct("I")
+_BLOQUE_CABECERA = struct.Struct("III")
+_OFFSET_ESTADO_BLOQUE = 8
+# struct tpacket3_hdr (campos que se usan):
+# tp_next_offset, tp_sec, tp_nsec, tp_snaplen, tp_len, tp_status, tp_mac
+_TRAMA_CABECERA = struct.Struct("IIIIIIH")
+# struct tpacket_stats_v3: tp_packets, tp_drops, tp_freeze_q_cnt
+_ESTADISTICAS = struct.Struct("III")
+# struct packet_mreq: mr_ifindex, mr_type, mr_alen, mr_address
+_MREQ = struct.Struct("iHH8s")
+
+def _adjuntar_filtro(sock, bpf_filter, snaplen, iface):
+    """
+    Adjunta al socket un programa BPF que filtra y, opcionalmente, trunca.
+
+    En los filtros de socket de Linux, el valor devuelto por la instrucción
+    `ret` es el número de bytes del paquete que se copian al espacio de
+    usuario. Para aplicar el snaplen en el kernel basta con limitar a
+    `snaplen` todas las instrucciones `ret #k` que aceptan el paquete.
+
+    Args:
+        sock (socket.socket): El socket `AF_PACKET`.
+        bpf_filter (str or None): Expresión BPF; si es None se acepta todo.
+        snaplen (int or None): Bytes máximos por trama; None para no truncar.
+        iface (str): Interfaz usada para compilar el filtro.
+    """
+    from scapy.libs.structures import bpf_insn, sock_fprog
+    if bpf_filter:
+        from scapy.arch.common import compile_filter, free_filter
+        bp = compile_filter(bpf_filter, iface)
+        instrucciones = [(i.code, i.jt, i.jf, i.k) for i in bp.bf_insns[:bp.bf_len]]
+        free_filter(bp)
+    else:
+        instrucciones = [(BPF_RET_K, 0, 0, BPF_ACEPTAR_TODO)]
+    if snaplen:
+        instrucciones = [(code, jt, jf, min(k, snaplen) if code == BPF_RET_K and k > 0 else k)
+                         for code, jt, jf, k in instrucciones]
+    programa = (bpf_insn * len(instrucciones))(*[bpf_insn(*i) for i in instrucciones])
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, sock_fprog(len(instrucciones), programa))
+
+class AnilloTPacketV3:
+    """
+    Socket `AF_PACKET` con un anillo de recepción TPACKET_V3 mapeado en memoria.
+
+    Las tramas se leen por bloques con `leer()`, que devuelve todos los
+    paquetes de los bloques que el kernel haya terminado de llenar.
+    """
+    def __init__(self, interface, ring_size=TAMANO_ANILLO_DEFECTO, block_size=TAMANO_BLOQUE_DEFECTO,
+                 bpf_filter=None, snaplen=None, promisc=True):
+        """
+        Crea el socket, configura el anillo y lo asocia a la interfaz.
+
+        Args:
+            interface (str): Nombre de la interfaz de red (ej. 'eth0', 'lo').
+            ring_size (int): Tamaño total del anillo en bytes. Se redondea a un
+                             número entero de bloques (al menos uno).
+            block_size (int): Tamaño de cada bloque en bytes. Debe ser múltiplo
+                              del tamaño de página y de `TAMANO_TRAMA`.
+            bpf_filter (str, optional): Filtro BPF que se adjunta al socket.
+            snaplen (int, optional): Bytes máximos que se copian de cada trama.
+                                     El kernel sigue informando de la longitud
+                                     original, que se guarda en `wirelen`.
+            promisc (bool): Si se pone la interfaz en modo promiscuo, como hace
+                            el socket de escucha de Scapy.
+
+        Raises:
+            OSError: Si el kernel no admite TPACKET_V3 o faltan privilegios.
+            Scapy_Exception: Si no se puede compilar o adjuntar el filtro BPF.
+        """
+        self.interface = interface
+        self.block_size = block_size
+        self.block_nr = max(1, ring_size // block_size)
+        self._bloque_actual = 0
+        self._recibidos = 0
+        self._descartados = 0
+        self._congelaciones = 0
+        # Protege la lectura de PACKET_STATISTICS y el cierre: el diagnóstico de
+        # la GUI consulta los contadores mientras el hilo de captura cierra el socket.
+        self._lock = threading.Lock()
+        # El socket se abre con protocolo 0 (no recibe nada) y solo empieza a
+        # recibir tramas al asociarlo a la interfaz con ETH_P_ALL, una vez
+        # configurado el anillo. Así no entran tramas de otras interfaces.
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+        self.anillo = None
+        try:
+            if bpf_filter or snaplen:
+                try:
+                    _adjuntar_filtro(self.sock, bpf_filter, snaplen, interface)
+                except (ImportError, Scapy_Exception) as ex:
+                    raise Scapy_Exception("No se pudo aplicar el filtro: %s" % ex)
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            frame_nr = (block_size // TAMANO_TRAMA) * self.block_nr
+            req = _REQ3.pack(block_size, self.block_nr, TAMANO_TRAMA, frame_nr, TIMEOUT_BLOQUE_MS, 0, 0)
+            self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, req)
+            self.anillo = mmap.mmap(self.sock.fileno(), block_size * self.block_nr,
+                                    mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            self.sock.bind((interface, ETH_P_ALL))
+            if promisc:
+                mreq = _MREQ.pack(socket.if_nametoindex(interface), PACKET_MR_PROMISC, 0, b"")
+                self.sock.setsockopt(SOL_PACKET, PACKET_ADD_MEMBERSHIP, mreq)
+            self.linktype = ARPHRD_TO_DLT.get(self.sock.getsockname()[3], 1)
+        except Exception:
+            self.close()
+            raise
+        self._poll = select.poll()
+        self._poll.register(self.sock.fileno(), select.POLLIN | select.POLLERR)
+
+    def fileno(self):
+        """Devuelve el descriptor del socket (permite usarlo con `select`)."""
+        return self.sock.fileno()
+
+    def leer(self, timeout):
+        """
+        Espera a que haya bloques listos y devuelve sus paquetes.
+
+        Args:
+            timeout (float): Tiempo máximo de espera en segundos si todavía no
+                             hay ningún bloque listo.
+
+        Returns:
+            list[PaqueteCrudo]: Los paquetes de todos los bloques que estaban
+                                listos, en orden de llegada. Puede estar vacía.
+        """
+        if not self._bloque_listo():
+            self._poll.poll(int(timeout * 1000))
+        paquetes = []
+        while self._bloque_listo():
+            self._leer_bloque(self._bloque_actual * self.block_size, paquetes)
+            # Devolver el bloque al kernel para que pueda volver a llenarlo.
+            _BLOQUE_ESTADO.pack_into(self.anillo, self._bloque_actual * self.block_size + _OFFSET_ESTADO_BLOQUE,
+                                     TP_STATUS_KERNEL)
+            self._bloque_actual = (self._bloque_actual + 1) % self.block_nr
+        return paquetes
+
+    def _bloque_listo(self):
+        """Indica si el bloque actual ha sido entregado por el kernel al usuario."""
+        offset = self._bloque_actual * self.block_size + _OFFSET_ESTADO_BLOQUE
+        return _BLOQUE_ESTADO.unpack_from(self.anillo, offset)[0] & TP_STATUS_USER
+
+    def _leer_bloque(self, inicio, paquetes):
+        """
+        Recorre las tramas de un bloque y las añade a `paquetes`.
+
+        Args:
+            inicio (int): Desplazamiento del bloque dentro del anillo.
+            paquetes (list): Lista a la que se añaden los `PaqueteCrudo`.
+        """
+        _, num_pkts, offset = _BLOQUE_CABECERA.unpack_from(self.anillo, inicio + _OFFSET_ESTADO_BLOQUE)
+        offset += inicio
+        linktype = self.linktype
+        for _ in range(num_pkts):
+            siguiente, sec, nsec, snaplen, longitud, _, mac = _TRAMA_CABECERA.unpack_from(self.anillo, offset)
+            datos = self.anillo[offset + mac:offset + mac + snaplen]
+            wirelen = longitud if longitud != snaplen else None
+            paquetes.append(PaqueteCrudo(datos, sec + nsec / 1e9, linktype, wirelen=wirelen))
+            offset += siguiente
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores acumulados del kernel para este socket.
+
+        El kernel reinicia `PACKET_STATISTICS` en cada lectura, por lo que los
+        valores se van sumando en el objeto. Se puede llamar desde cualquier
+        hilo; tras `close()` devuelve los totales acumulados.
+
+        Returns:
+            dict: Con las claves "recibidos", "descartados" y "congelaciones"
+                  (veces que la cola se congeló por falta de bloques libres).
+        """
+        with self._lock:
+            self._acumular_estadisticas()
+            return {"recibidos": self._recibidos, "descartados": self._descartados,
+                    "congelaciones": self._congelaciones}
+
+    def _acumular_estadisticas(self):
+        """Suma los contadores del kernel a los acumulados. Debe llamarse con el candado tomado."""
+        if self.sock.fileno() == -1:
+            return
+        datos = self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, _ESTADISTICAS.size)
+        recibidos, descartados, congelaciones = _ESTADISTICAS.unpack(datos)
+        self._recibidos += recibidos
+        self._descartados += descartados
+        self._congelaciones += congelaciones
+
+    def close(self):
+        """Acumula los últimos contadores del kernel, libera el anillo mapeado y cierra el socket."""
+        with self._lock:
+            try:
+                self._acumular_estadisticas()
+            except OSError:
+                pass  # El socket no llegó a configurarse; no hay contadores que guardar.
+            if self.anillo is not None:
+                self.anillo.close()
+                self.anillo = None
+            self.sock.close()
@@ -7,18 +7,24 @@ centralizar lógica común que no pertenece a un módulo específico como
 `monitor` o `simulador`.
 """
 
+from scapy.packet import Packet
+from core.clasificador import clasificar
+
 def formatear_paquete(pkt):
     """
     Genera una representación de texto simple de un paquete de Scapy.
 
+    Para los paquetes de Scapy es el mismo texto que la columna de información
+    de la lista de paquetes, obtenido con `core.clasificador`.
+
     Args:
         pkt (scapy.packet.Packet): El paquete de Scapy a formatear.
 
     Returns:
-        str: Un resumen del paquete si el método `summary()` está disponible,
-             de lo contrario, la representación de string del paquete.
+        str: El resumen del paquete, o su representación de string si no es
+             un paquete de Scapy.
     """
-    return pkt.summary() if hasattr(pkt, 'summary') else str(pkt)
+    return clasificar(pkt).info if isinstance(pkt, Packet) else str(pkt)
 
 def log_evento(mensaje):
     """
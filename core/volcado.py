@@ -0,0 +1,141 @@
+"""
+Módulo de volcado continuo de la captura a disco.
+
+La exportación de la vista del monitor escribe al final de la sesión los
+paquetes que hay en memoria, así que una captura larga depende de que todo
+quepa en RAM y un cierre inesperado pierde la sesión entera. Este archivo
+define `EscritorRotativo`, un destino opcional del pipeline de captura que
+escribe cada lote en cuanto llega en archivos pcap con búfer, y rota a un
+archivo nuevo por tamaño o por tiempo conservando solo los N más recientes
+(como un búfer circular).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from scapy.utils import RawPcapWriter
+from core.paquetes import PaqueteCrudo
+
+class EscritorRotativo:
+    """
+    Escribe paquetes en una serie de archivos pcap que rotan por tamaño o tiempo.
+
+    Acepta tanto `PaqueteCrudo` (cuyos bytes se escriben sin diseccionar)
+    como paquetes de Scapy. Es thread-safe: puede recibir lotes desde varios
+    hilos de captura. Cada archivo lleva un único tipo de enlace, así que si
+    llega una trama de otro tipo (por ejemplo, de otra interfaz) se empieza
+    un archivo nuevo.
+    """
+    def __init__(self, directorio, prefijo="captura", max_bytes=100 * 1024 * 1024, max_segundos=None,
+                 max_archivos=10, buffer_size=1024 * 1024, intervalo_vaciado=1.0):
+        """
+        Args:
+            directorio (str): Carpeta donde se crean los archivos (se crea si no existe).
+            prefijo (str): Prefijo del nombre de los archivos.
+            max_bytes (int, optional): Tamaño a partir del cual se rota de archivo.
+            max_segundos (float, optional): Antigüedad a partir de la cual se rota.
+            max_archivos (int, optional): Archivos que se conservan; los más
+                                          antiguos se borran. None los conserva todos.
+            buffer_size (int): Tamaño del búfer de escritura de cada archivo.
+            intervalo_vaciado (float): Cada cuántos segundos, como mucho, se
+                                       vuelca el búfer a disco, para limitar lo
+                                       que se perdería si el proceso termina
+                                       de forma inesperada.
+
+        Raises:
+            ValueError: Si los límites de rotación no son válidos.
+        """
+        if max_bytes is not None and max_bytes < 1024:
+            raise ValueError("max_bytes debe ser de al menos 1 KiB.")
+        if max_archivos is not None and max_archivos < 1:
+            raise ValueError("max_archivos debe ser al menos 1.")
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.max_bytes = max_bytes
+        self.max_segundos = max_segundos
+        self.max_archivos = max_archivos
+        self.buffer_size = buffer_size
+        self.intervalo_vaciado = intervalo_vaciado
+        self.archivos = deque()  # Rutas de los archivos conservados, del más antiguo al más nuevo.
+        self.paquetes_escritos = 0
+        self._escritor = None
+        self._linktype = None
+        self._bytes = 0
+        self._inicio = 0.0
+        self._ultimo_vaciado = 0.0
+        self._secuencia = 0
+        self._lock = threading.Lock()
+        self._cerrado = False
+
+    def escribir(self, paquetes):
+        """
+        Escribe un lote de paquetes, rotando de archivo cuando haga falta.
+
+        Args:
+            paquetes (list): `PaqueteCrudo` o paquetes de Scapy.
+        """
+        with self._lock:
+            if self._cerrado:
+                return
+            for paquete in paquetes:
+                if not isinstance(paquete, PaqueteCrudo):
+                    paquete = PaqueteCrudo.desde_paquete(paquete)
+                if self._escritor is None or paquete.linktype != self._linktype or self._debe_rotar():
+                    self._abrir(paquete.linktype)
+                sec = int(paquete.time)
+                usec = int(round((paquete.time - sec) * 1_000_000))
+                caplen = len(paquete.datos)
+                self._escritor.write_packet(paquete.datos, sec=sec, usec=usec, caplen=caplen,
+                                            wirelen=paquete.wirelen or caplen)
+                self._bytes += 16 + caplen  # Cabecera de registro pcap + datos.
+                self.paquetes_escritos += 1
+            ahora = time.monotonic()
+            if self._escritor is not None and ahora - self._ultimo_vaciado >= self.intervalo_vaciado:
+                self._escritor.flush()
+                self._ultimo_vaciado = ahora
+
+    def _debe_rotar(self):
+        """Indica si el archivo actual ha alcanzado su tamaño o antigüedad máxima."""
+        if self.max_bytes is not None and self._bytes >= self.max_bytes:
+            return True
+        return self.max_segundos is not None and time.monotonic() - self._inicio >= self.max_segundos
+
+    def _abrir(self, linktype):
+        """
+        Cierra el archivo actual y abre el siguiente de la serie.
+
+        Debe llamarse con el candado tomado. Si se supera `max_archivos`, se
+        borran los archivos más antiguos.
+        """
+        self._cerrar_actual()
+        self._secuencia += 1
+        nombre = f"{self.prefijo}_{self._secuencia:05d}_{time.strftime('%Y%m%d-%H%M%S')}.pcap"
+        ruta = os.path.join(self.directorio, nombre)
+        self._escritor = RawPcapWriter(ruta, linktype=linktype, bufsz=self.buffer_size)
+        # Scapy ignora `linktype=0` (DLT_NULL, el loopback de Npcap) por ser falso.
+        self._escritor.linktype = linktype
+        self._escritor.write_header(None)  # Escribir la cabecera ya, aunque el archivo quede vacío.
+        self._linktype = linktype
+        self._bytes = 24  # Cabecera global del pcap.
+        self._inicio = self._ultimo_vaciado = time.monotonic()
+        self.archivos.append(ruta)
+        while self.max_archivos is not None and len(self.archivos) > self.max_archivos:
+            antiguo = self.archivos.popleft()
+            try:
+                os.remove(antiguo)
+            except OSError as e:
+                print(f"No se pudo borrar el archivo de captura antiguo {antiguo}: {e}")
+
+    def _cerrar_actual(self):
+        """Cierra el archivo en curso, si lo hay."""
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def close(self):
+        """Vuelca el búfer y cierra el archivo en curso. Los lotes posteriores se ignoran."""
+        with self._lock:
+            self._cerrado = True
+            self._cerrar_actual()
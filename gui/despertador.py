@@ -0,0 +1,50 @@
+"""
+Módulo del despertador del bucle de Tk.
+
+Con Tcl compilado con soporte de hilos, `event_generate` llamado desde otro
+hilo no vuelve hasta que el bucle de Tk atiende la llamada. Si el hilo de la
+GUI está esperando a ese mismo hilo (por ejemplo, en `PacketCaptor.stop()`,
+que hace `join` del hilo de captura), los dos quedan bloqueados hasta que se
+agota el tiempo de parada.
+
+`Despertador` separa las dos cosas: los productores solo marcan que hay algo
+pendiente, lo que nunca bloquea, y un hilo propio del despertador es el único
+que llama a `event_generate`. Si ese hilo tiene que esperar al bucle de Tk,
+no retiene a nadie más.
+"""
+
+import threading
+import tkinter as tk
+
+class Despertador:
+    """
+    Genera un evento virtual en un widget cuando algún hilo lo pide.
+
+    Los avisos que llegan mientras el anterior todavía no se ha entregado se
+    agrupan en un solo evento.
+    """
+    def __init__(self, widget, evento):
+        """
+        Args:
+            widget (tk.Widget): El widget en el que se genera el evento.
+            evento (str): El evento virtual (ej. "<<PaquetesEnCola>>").
+        """
+        self.widget = widget
+        self.evento = evento
+        self._pendiente = threading.Event()
+        self._hilo = threading.Thread(target=self._entregar, daemon=True)
+        self._hilo.start()
+
+    def avisar(self):
+        """Pide que se genere el evento. Se puede llamar desde cualquier hilo y no bloquea."""
+        self._pendiente.set()
+
+    def _entregar(self):
+        """Bucle del hilo del despertador: genera un evento por cada tanda de avisos."""
+        while True:
+            self._pendiente.wait()
+            self._pendiente.clear()
+            try:
+                self.widget.event_generate(self.evento, when="tail")
+            except (RuntimeError, tk.TclError):
+                pass  # La ventana se está cerrando y el bucle de Tk ya no atiende eventos.
@@ -0,0 +1,267 @@
+"""
+Módulo de la lista virtual de paquetes.
+
+Un `ttk.Treeview` con un item por paquete se vuelve muy lento a partir de unas
+100.000 filas, mucho antes de que se agote la memoria. Este archivo define
+`ListaVirtual`, un widget con el mismo aspecto que el Treeview de las vistas
+pero que solo crea como items de Tk las filas que caben en pantalla. Los
+valores de cada fila se piden a una función (el "proveedor") a medida que el
+usuario se desplaza, así que el número de filas puede ser de millones sin que
+Tk lo note. Mantiene la selección, las etiquetas de las filas (ej. 'attack') y
+el desplazamiento automático al final.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+# Evento que genera la lista cuando el usuario selecciona otra fila.
+EVENTO_SELECCION = "<<SeleccionFila>>"
+
+class ListaVirtual(tk.Frame):
+    """
+    Lista de filas virtualizada sobre un `ttk.Treeview`.
+
+    La lista solo conoce su número total de filas (`len(lista)`); el
+    contenido de la fila en la posición p (empezando en 0) lo devuelve
+    `proveedor(p)` como una tupla (iid, valores, tags), donde `iid` es el
+    identificador estable de la fila (ej. el número de paquete). El Treeview
+    interno tiene tantos items como filas visibles y se reutilizan al
+    desplazarse; la barra de desplazamiento vertical la gestiona la lista.
+
+    `heading`, `column` y `tag_configure` se delegan en el Treeview, y
+    `selection()` devuelve el iid de la fila seleccionada como en un Treeview.
+    Al cambiar la selección se genera `EVENTO_SELECCION`.
+    """
+    # Filas que avanza cada paso de la rueda del ratón.
+    FILAS_POR_PASO_RUEDA = 3
+
+    def __init__(self, parent, columns, proveedor, **kwargs):
+        """
+        Args:
+            parent (tk.Widget): El widget padre.
+            columns (tuple[str]): Las columnas del Treeview.
+            proveedor (function): Recibe una posición y devuelve (iid, valores, tags).
+            **kwargs: Opciones del Frame (ej. bg).
+        """
+        super().__init__(parent, **kwargs)
+        self.proveedor = proveedor
+        self._total = 0
+        self._primera = 0  # Posición de la fila que se muestra arriba del todo.
+        self._capacidad = 1  # Filas que caben en el Treeview; se recalcula al redimensionar.
+        self._alto_fila = None  # Altura de una fila y de la cabecera, medidas con el primer item.
+        self._alto_cabecera = 0
+        self._iids = []  # iid de la fila que muestra cada item del Treeview.
+        self._seleccion = None  # iid de la fila seleccionada, aunque no esté a la vista.
+        self._render_job = None
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', selectmode='browse')
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._al_desplazar)
+        hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
+        self.tree.grid(row=0, column=0, sticky='nswe')
+        self.vsb.grid(row=0, column=1, sticky='ns')
+        hsb.grid(row=1, column=0, sticky='ew')
+
+        self.tree.bind("<<TreeviewSelect>>", self._al_seleccionar)
+        self.tree.bind("<Configure>", lambda e: self.after_idle(self._recalcular_capacidad))
+        # Rueda del ratón: <MouseWheel> en Windows y macOS, botones 4 y 5 en X11.
+        self.tree.bind("<MouseWheel>", lambda e: self._desplazar(-self.FILAS_POR_PASO_RUEDA if e.delta > 0
+                                                                 else self.FILAS_POR_PASO_RUEDA))
+        self.tree.bind("<Button-4>", lambda e: self._desplazar(-self.FILAS_POR_PASO_RUEDA))
+        self.tree.bind("<Button-5>", lambda e: self._desplazar(self.FILAS_POR_PASO_RUEDA))
+        # El teclado se mueve por todas las filas, no solo por los items visibles.
+        self.tree.bind("<Up>", lambda e: self._mover_seleccion(-1))
+        self.tree.bind("<Down>", lambda e: self._mover_seleccion(1))
+        self.tree.bind("<Prior>", lambda e: self._mover_seleccion(-self._capacidad))
+        self.tree.bind("<Next>", lambda e: self._mover_seleccion(self._capacidad))
+        self.tree.bind("<Home>", lambda e: self._mover_seleccion(-self._total))
+        self.tree.bind("<End>", lambda e: self._mover_seleccion(self._total))
+
+    # --- Métodos delegados en el Treeview ---
+    def heading(self, column, **kwargs):
+        return self.tree.heading(column, **kwargs)
+
+    def column(self, column, **kwargs):
+        return self.tree.column(column, **kwargs)
+
+    def tag_configure(self, tagname, **kwargs):
+        return self.tree.tag_configure(tagname, **kwargs)
+
+    def __len__(self):
+        return self._total
+
+    def selection(self):
+        """Devuelve una tupla con el iid de la fila seleccionada (o vacía)."""
+        return (self._seleccion,) if self._seleccion is not None else ()
+
+    def agregar(self, cantidad=1):
+        """
+        Añade filas al final de la lista.
+
+        Solo se redibuja (una vez, cuando Tk está libre) si las filas nuevas
+        quedan a la vista.
+
+        Args:
+            cantidad (int): Número de filas añadidas.
+        """
+        visible = self._primera + self._capacidad > self._total
+        self._total += cantidad
+        if visible:
+            self._programar_render()
+        else:
+            self._actualizar_barra()
+
+    def establecer_total(self, total):
+        """
+        Sustituye el contenido de la lista por `total` filas y vuelve al principio.
+
+        Args:
+            total (int): El nuevo número de filas.
+        """
+        self._total = total
+        self._primera = 0
+        self._programar_render()
+
+    def limpiar(self):
+        """Elimina todas las filas y la selección."""
+        self._seleccion = None
+        self.establecer_total(0)
+
+    def ver(self, posicion):
+        """
+        Desplaza la lista lo mínimo para que se vea la fila en `posicion`.
+
+        Args:
+            posicion (int): Posición de la fila (empezando en 0).
+        """
+        if posicion < self._primera:
+            self._ir_a(posicion)
+        elif posicion >= self._primera + self._capacidad:
+            self._ir_a(posicion - self._capacidad + 1)
+
+    def ver_final(self):
+        """Desplaza la lista hasta la última fila (auto-scroll)."""
+        self._ir_a(self._total)
+
+    def _ir_a(self, primera):
+        """Cambia la primera fila visible, ajustándola al rango válido, y redibuja."""
+        primera = max(0, min(primera, self._total - self._capacidad))
+        if primera != self._primera:
+            self._primera = primera
+            self._programar_render()
+
+    def _programar_render(self):
+        """Agrupa los redibujados pedidos hasta que Tk esté libre en uno solo."""
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+
+    def _render(self):
+        """Rellena los items del Treeview con las filas visibles."""
+        self._render_job = None
+        self._primera = max(0, min(self._primera, self._total - self._capacidad))
+        visibles = max(0, min(self._capacidad, self._total - self._primera))
+        items = self.tree.get_children()
+        # Crear o borrar items para que haya uno por fila visible.
+        if len(items) > visibles:
+            self.tree.delete(*items[visibles:])
+            items = items[:visibles]
+        elif len(items) < visibles:
+            items = items + tuple(self.tree.insert('', 'end') for _ in range(visibles - len(items)))
+        self._iids = []
+        seleccionado = None
+        for item, posicion in zip(items, range(self._primera, self._primera + visibles)):
+            iid, valores, tags = self.proveedor(posicion)
+            self.tree.item(item, values=valores, tags=tags)
+            self._iids.append(iid)
+            if iid == self._seleccion:
+                seleccionado = item
+        # La selección sigue a la fila aunque cambie el item que la muestra.
+        if seleccionado is None:
+            if self.tree.selection():
+                self.tree.selection_set(())
+        elif self.tree.selection() != (seleccionado,):
+            self.tree.selection_set(seleccionado)
+            self.tree.focus(seleccionado)
+        self._actualizar_barra()
+        if self._alto_fila is None and visibles:
+            # Medir la altura de fila cuando Tk haya colocado el primer item.
+            self.after_idle(self._recalcular_capacidad)
+
+    def _actualizar_barra(self):
+        """Ajusta la barra de desplazamiento a la parte visible del total."""
+        if self._total:
+            self.vsb.set(self._primera / self._total, min(1.0, (self._primera + self._capacidad) / self._total))
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    def _recalcular_capacidad(self):
+        """Calcula cuántas filas caben en el Treeview a partir de la altura de una fila."""
+        items = self.tree.get_children()
+        if items:
+            caja = self.tree.bbox(items[0])
+            if caja and caja[3]:
+                self._alto_cabecera, self._alto_fila = caja[1], caja[3]
+        if self._alto_fila is None:
+            return
+        capacidad = max(1, (self.tree.winfo_height() - self._alto_cabecera) // self._alto_fila)
+        if capacidad != self._capacidad:
+            self._capacidad = capacidad
+            self._render()
+
+    def _desplazar(self, filas):
+        """Desplaza la lista un número de filas (negativo hacia arriba)."""
+        self._ir_a(self._primera + filas)
+        return "break"
+
+    def _al_desplazar(self, accion, cantidad, unidad=None):
+        """Callback de la barra de desplazamiento ("moveto" o "scroll")."""
+        if accion == "moveto":
+            self._ir_a(int(float(cantidad) * self._total))
+        elif accion == "scroll":
+            paso = self._capacidad if unidad == "pages" else 1
+            self._ir_a(self._primera + int(cantidad) * paso)
+
+    def _posicion_seleccionada(self):
+        """Devuelve la posición de la fila seleccionada si está a la vista, o None."""
+        if self._seleccion in self._iids:
+            return self._primera + self._iids.index(self._seleccion)
+        return None
+
+    def _mover_seleccion(self, filas):
+        """Selecciona la fila que está `filas` posiciones por debajo (o por encima) de la actual."""
+        if not self._total:
+            return "break"
+        actual = self._posicion_seleccionada()
+        posicion = self._primera if actual is None else max(0, min(self._total - 1, actual + filas))
+        self.ver(posicion)
+        if self._render_job is not None:
+            self.after_cancel(self._render_job)
+            self._render()
+        item = self.tree.get_children()[posicion - self._primera]
+        self._seleccionar(self._iids[posicion - self._primera])
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+        return "break"
+
+    def _al_seleccionar(self, event):
+        """
+        Manejador de <<TreeviewSelect>> del Treeview interno.
+
+        Tk también envía este evento cuando la propia lista mueve la selección
+        al redibujar, así que solo se avisa a la vista si la fila seleccionada
+        es otra.
+        """
+        seleccion = self.tree.selection()
+        if not seleccion:
+            return
+        indice = self.tree.index(seleccion[0])
+        if indice < len(self._iids):
+            self._seleccionar(self._iids[indice])
+
+    def _seleccionar(self, iid):
+        """Guarda la fila seleccionada y genera `EVENTO_SELECCION` si ha cambiado."""
+        if iid != self._seleccion:
+            self._seleccion = iid
+            self.event_generate(EVENTO_SELECCION)
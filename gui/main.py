@@ -7,6 +7,12 @@ ventana principal de la aplicación. Es responsable de:
 - Implementar la funcionalidad del menú de navegación lateral colapsable.
 - Instanciar y administrar las diferentes vistas (frames) de la aplicación.
 - Controlar el cambio entre las distintas vistas.
+
+Las vistas que dependen de Scapy (Monitor y Simulador) no se importan al
+cargar este módulo: importar Scapy supone cargar cientos de módulos, y hacerlo
+antes de mostrar la ventana retrasa varios segundos el arranque. Se importan
+en segundo plano una vez visible el Dashboard, o al abrirlas si el usuario se
+adelanta.
 """
 import threading
 from tkinter import messagebox
@@ -14,11 +20,21 @@ import tkinter as tk
 from PIL import Image, ImageTk
 from gui.dashboard import DashboardViewFrame
 from gui.educacion_view import EducacionViewFrame
-from gui.monitor_view import MonitorViewFrame
-from gui.simulador_view import SimuladorViewFrame
 from gui.manual import ManualUsuarioViewFrame
 from gui.info import InfoAdicionalViewFrame
-from core.network_utils import get_active_network_info
+
+# Retraso (ms) tras mostrar la ventana antes de precargar las vistas pesadas.
+RETRASO_PRECARGA_MS = 300
+
+def _importar_monitor_view():
+    """Importa bajo demanda la vista del Monitor (y con ella, Scapy)."""
+    from gui.monitor_view import MonitorViewFrame
+    return MonitorViewFrame
+
+def _importar_simulador_view():
+    """Importa bajo demanda la vista del Simulador (y con ella, Scapy)."""
+    from gui.simulador_view import SimuladorViewFrame
+    return SimuladorViewFrame
 
 class App(tk.Tk):
     """
@@ -93,6 +109,26 @@ class App(tk.Tk):
         # Interceptar el evento de cierre de la ventana para mostrar confirmación.
         self.protocol("WM_DELETE_WINDOW", self._confirmar_salida)
 
+        # Precargar las vistas pesadas cuando la ventana ya esté en pantalla.
+        self.after(RETRASO_PRECARGA_MS, self._precargar_vistas_async)
+
+    def _precargar_vistas_async(self):
+        """
+        Importa en un hilo separado los módulos de las vistas diferidas.
+
+        Solo se importan los módulos (no se crea ningún widget), así que es
+        seguro hacerlo fuera del hilo de la GUI. Si el usuario abre una de
+        estas vistas antes de que termine, la importación del hilo principal
+        simplemente espera a que concluya la del hilo de precarga.
+        """
+        def worker():
+            for importar in self.frame_loaders.values():
+                try:
+                    importar()
+                except Exception as e:
+                    print(f"Error al precargar una vista: {e}")
+        threading.Thread(target=worker, daemon=True).start()
+
     def _cargar_info_red_async(self):
         """
         Carga la información de la red activa en un hilo separado para no
@@ -101,6 +137,8 @@ class App(tk.Tk):
         def worker():
             """Función que se ejecuta en el hilo."""
             try:
+                # Importación diferida: el módulo depende de Scapy.
+                from core.network_utils import get_active_network_info
                 active_interface, local_ip = get_active_network_info()
                 self.active_interface = active_interface
                 self.local_ip = local_ip
@@ -230,6 +268,11 @@ class App(tk.Tk):
     def _confirmar_salida(self):
         """Muestra un diálogo de confirmación antes de cerrar la aplicación."""
         if messagebox.askokcancel("Salir", "¿Estás seguro de que quieres salir de CyberTrainer?"):
+            # Detener las capturas activas para no dejar hilos ni sockets abiertos.
+            for frame in self.frames.values():
+                captor = getattr(frame, "captor", None)
+                if captor:
+                    captor.stop()
             self.destroy()
 
     def _crear_frames(self):
@@ -251,10 +294,14 @@ class App(tk.Tk):
             "Dashboard": DashboardViewFrame,
             "Docs": EducacionViewFrame,
             "Manual": ManualUsuarioViewFrame,
-            "Monitor": MonitorViewFrame,
-            "Simulador": SimuladorViewFrame,
             "Info": InfoAdicionalViewFrame
         }
+        # Las vistas que dependen de Scapy ni siquiera se importan hasta que se
+        # necesitan; en su lugar se guarda la función que las importa.
+        self.frame_loaders = {
+            "Monitor": _importar_monitor_view,
+            "Simulador": _importar_simulador_view,
+        }
 
         # Limpiamos el diccionario de instancias. Se llenará bajo demanda.
         self.frames = {}
@@ -289,8 +336,10 @@ class App(tk.Tk):
         frame = self.frames.get(nombre)
 
         if frame is None:
-            # Si no existe, lo crea por primera vez.
-            FrameClass = self.frame_classes[nombre]
+            # Si no existe, lo crea por primera vez (importando su módulo si es una vista diferida).
+            FrameClass = self.frame_classes.get(nombre)
+            if FrameClass is None:
+                FrameClass = self.frame_classes[nombre] = self.frame_loaders[nombre]()
             frame = FrameClass(self.container, self)
             self.frames[nombre] = frame
             frame.grid(row=0, column=0, sticky="nsew")
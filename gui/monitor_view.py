@@ -1,11 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+import os
 import threading
 import queue
 import time
-from core.monitor import PacketCaptor, get_network_interfaces
-from scapy.layers.inet import IP, TCP, UDP
-from scapy.layers.l2 import ARP
+from array import array
+from collections import deque
+from core.interfaces import obtener_registro
+from core.monitor import PacketCaptor, get_network_interfaces, validar_filtro_bpf, SNAPLEN_CABECERAS
+from core.multicaptura import SesionCaptura
+from core.diseccion import EtapaDiseccion
+from core.cola import ColaAcotada, POLITICA_DESCARTAR_NUEVO, POLITICA_DESCARTAR_ANTIGUO, POLITICA_BLOQUEAR
+from core.paquetes import decodificar
+from core.almacen import PacketStore
+from core.volcado import EscritorRotativo
+from core.indice_pcap import IndicePcap
+from core.pcapng import EscritorPcapNg, LectorPcapNg, es_pcapng, PREFIJO_SIMULADO
+from core.clasificador import clasificar, clasificar_lote
+from core.tabla_resumen import TablaResumen, formatear_estadisticas
+from core.filtro import FiltroVisualizacion
+from core.metricas import MetricasPipeline, formatear_instantanea, ETAPA_DISECCION, ETAPA_VISUALIZACION
+from gui.lista_virtual import ListaVirtual, EVENTO_SELECCION
+from gui.despertador import Despertador
 
 class MonitorViewFrame(tk.Frame):
     """
@@ -16,6 +32,47 @@ class MonitorViewFrame(tk.Frame):
     iniciar/detener la captura y ver los paquetes en una lista, con detalles
     para cada paquete seleccionado.
     """
+    # Número máximo de paquetes que el capturador agrupa en cada entrega.
+    CAPTURE_BATCH_SIZE = 256
+    # Número de paquetes diseccionados que se conservan en memoria.
+    DISSECTION_CACHE_SIZE = 256
+    # Máximo de paquetes que pueden esperar en la cola hacia la GUI.
+    QUEUE_CAPACITY = 50000
+    # Políticas de desbordamiento de la cola, con su texto en la interfaz.
+    OVERFLOW_POLICIES = {
+        "Descartar nuevos": POLITICA_DESCARTAR_NUEVO,
+        "Descartar antiguos": POLITICA_DESCARTAR_ANTIGUO,
+        "Bloquear captura": POLITICA_BLOQUEAR,
+    }
+    # Modos de captura (snaplen): trama completa o solo las cabeceras.
+    SNAPLEN_MODES = {
+        "Paquete completo": None,
+        f"Solo cabeceras ({SNAPLEN_CABECERAS} B)": SNAPLEN_CABECERAS,
+    }
+    # Ritmo al que la lista muestra la captura. El modo educativo enseña un
+    # paquete cada EDUCATIONAL_INTERVAL_MS para poder seguirlos de uno en uno; el
+    # de alto rendimiento vacía la cola por tandas de THROUGHPUT_CHUNK_SIZE, con
+    # THROUGHPUT_TIME_BUDGET_MS de trabajo como máximo en cada ciclo de Tk.
+    DISPLAY_MODES = {
+        "Educativo (1 paquete cada 400 ms)": False,
+        "Alto rendimiento (por lotes)": True,
+    }
+    EDUCATIONAL_INTERVAL_MS = 400
+    THROUGHPUT_TIME_BUDGET_MS = 8
+    THROUGHPUT_CHUNK_SIZE = 16
+    # Evento con el que la cola despierta al bucle de Tk al recibir paquetes.
+    QUEUE_EVENT = "<<PaquetesEnCola>>"
+    # Cada cuánto (ms) se actualiza la pestaña de diagnóstico durante la captura.
+    DIAGNOSTICS_INTERVAL_MS = 1000
+    # Importación de pcap: paquetes por lote del hilo lector, lotes que pueden
+    # esperar a la GUI y tiempo máximo (ms) que cada ciclo dedica a insertar filas.
+    IMPORT_CHUNK_SIZE = 500
+    IMPORT_MAX_PENDING_CHUNKS = 8
+    IMPORT_TIME_BUDGET_MS = 30
+    # Volcado continuo a disco: tamaño máximo de cada archivo y archivos que se conservan.
+    SPILL_MAX_FILE_MB = 100
+    SPILL_MAX_FILES = 10
+
     def __init__(self, parent, controller):
         """
         Inicializa el frame del Monitor de Red.
@@ -80,6 +137,19 @@ class MonitorViewFrame(tk.Frame):
                 "- pdst: Dirección IP de destino.\n"
                 "\nConsulta el glosario para ver todos los campos posibles."
             ),
+            "Cómo filtrar la lista de paquetes": (
+                "Escribe un filtro encima de la lista y pulsa Enter o 'Aplicar'.\n\n"
+                "Campos: ip.src, ip.dst, ip.addr, arp.src, arp.dst, tcp.srcport, tcp.dstport,\n"
+                "tcp.port, udp.srcport, udp.dstport, udp.port, frame.len, frame.time_epoch, info.\n"
+                "Operadores: == != > < >= <=, 'in {...}' y 'contains' (solo en info).\n"
+                "Combina condiciones con and, or, not y paréntesis. Solo 'tcp', 'udp', 'arp'\n"
+                "o 'ip' seleccionan los paquetes de ese protocolo.\n\n"
+                "Ejemplos:\n"
+                "- ip.src == 10.0.0.5 and tcp.dport in {80, 443}\n"
+                "- ip.addr == 192.168.1.0/24 and not arp\n"
+                "- info contains \"SYN\"\n\n"
+                "Los paquetes que llegan después se filtran automáticamente. 'Limpiar' vuelve a mostrarlos todos."
+            ),
             "Glosario de términos": (
                 "Campos comunes al inspeccionar un paquete:\n\n"
                 "IP: version, ihl, tos, len, id, flags, frag, ttl, proto, chksum, src, dst\n"
@@ -121,12 +191,42 @@ class MonitorViewFrame(tk.Frame):
 
         # --- Variables de estado ---
         self.captor = None  # Instancia de PacketCaptor para el hilo de captura.
-        self.captured_packets = []  # Lista para almacenar los objetos de paquete completos.
-        self.packet_queue = queue.Queue()  # Cola para comunicar paquetes entre hilos.
+        # Paquetes capturados o importados, guardados en disco con los últimos
+        # diseccionados en memoria.
+        self.captured_packets = PacketStore(capacidad_cache=self.DISSECTION_CACHE_SIZE)
+        self.packet_comments = {}  # Comentarios pcapng de cada paquete importado, por su ID en la lista.
+        self.summary_table = TablaResumen()  # Columnas de la lista en arrays de NumPy, fila a fila.
+        self.display_filter = None  # FiltroVisualizacion activo, si lo hay.
+        self.display_filter_var = tk.StringVar()
+        # Filas de la tabla de resúmenes que cumplen el filtro, en orden, o None
+        # si se muestran todas. La lista virtual pide sus filas a través de aquí.
+        self.visible_rows = None
+        # Índice del pcap importado: si existe, los paquetes se leen del archivo
+        # bajo demanda y `captured_packets` queda vacía.
+        self.packet_index = None
+        self.indexed_rows = 0  # Filas del índice ya mostradas en la lista.
+        # Cuando la cola pasa de vacía a tener paquetes, el despertador genera
+        # QUEUE_EVENT sin bloquear al hilo de captura (ver gui.despertador).
+        self.queue_waker = Despertador(self, self.QUEUE_EVENT)
+        self.packet_queue = ColaAcotada(self.QUEUE_CAPACITY, aviso=self.queue_waker.avisar)  # Cola acotada para comunicar lotes de paquetes entre hilos.
+        self.pending_packets = deque()  # Paquetes ya extraídos de la cola, pendientes de mostrarse.
+        self.selected_interfaces = []  # Interfaces elegidas para una captura simultánea (si hay más de una).
+        self.dissection_stage = None  # EtapaDiseccion activa si se usa la disección en paralelo.
+        self.parallel_dissection_var = tk.BooleanVar(value=False)
+        self.spill_var = tk.BooleanVar(value=False)  # Guardar la captura en disco mientras llega.
+        self.spill_writer = None  # EscritorRotativo activo durante la captura, si se pidió.
         self.update_job = None  # ID del trabajo 'after' para poder cancelarlo.
+        self.metricas = MetricasPipeline()  # Contadores y latencias del pipeline de captura.
+        self.diagnostics_job = None  # ID del trabajo 'after' que refresca el diagnóstico.
+        self.import_thread = None  # Hilo que lee el pcap durante una importación.
+        self.import_queue = None  # Lotes (paquete, resumen, comentarios) leídos y pendientes de mostrar.
+        self.import_pending = deque()  # Filas del lote actual aún no insertadas.
+        self.import_cancel_event = threading.Event()
+        self.import_job = None  # ID del trabajo 'after' que inserta las filas importadas.
 
         # --- Layout Principal con Paneles Redimensionables ---
         self._crear_layout_redimensionable()
+        self.bind(self.QUEUE_EVENT, self._al_llegar_paquetes)
 
     def _crear_layout_redimensionable(self):
         """
@@ -174,20 +274,71 @@ class MonitorViewFrame(tk.Frame):
         self.iface_var = tk.StringVar()
         self.iface_combo = ttk.Combobox(if_frame, textvariable=self.iface_var, state="readonly", width=25)
         self.iface_combo.pack(side="left", expand=True, fill="x", padx=(5, 0))
+        self.iface_combo.bind("<<ComboboxSelected>>", lambda e: self.selected_interfaces.clear())
+        self.btn_multi_iface = tk.Button(if_frame, text="Varias…", command=self._seleccionar_varias_interfaces, relief="ridge", bd=1)
+        self.btn_multi_iface.pack(side="left", padx=(4, 0))
+
+        # Filtro BPF opcional: lo aplica el kernel/Npcap antes de que el paquete llegue a Python.
+        bpf_frame = tk.Frame(container, bg=container.cget("bg"))
+        bpf_frame.pack(fill="x", pady=(0, 2), padx=8)
+        tk.Label(bpf_frame, text="Filtro BPF:", bg=container.cget("bg")).pack(side="left")
+        self.bpf_var = tk.StringVar()
+        self.bpf_entry = tk.Entry(bpf_frame, textvariable=self.bpf_var, width=25)
+        self.bpf_entry.pack(side="left", expand=True, fill="x", padx=(5, 0))
+        tk.Label(container, text="ej.: host 192.168.1.10 and tcp port 80", font=("Arial", 8), fg="#7f8c8d", bg=container.cget("bg"), anchor="w").pack(fill="x", padx=8)
+
+        snap_frame = tk.Frame(container, bg=container.cget("bg"))
+        snap_frame.pack(fill="x", pady=(4, 0), padx=8)
+        tk.Label(snap_frame, text="Capturar:", bg=container.cget("bg")).pack(side="left")
+        self.snaplen_var = tk.StringVar(value="Paquete completo")
+        self.snaplen_combo = ttk.Combobox(snap_frame, textvariable=self.snaplen_var, state="readonly",
+                                          values=list(self.SNAPLEN_MODES), width=22)
+        self.snaplen_combo.pack(side="left", expand=True, fill="x", padx=(5, 0))
+
+        # Ritmo de la lista; se puede cambiar también durante la captura.
+        mode_frame = tk.Frame(container, bg=container.cget("bg"))
+        mode_frame.pack(fill="x", pady=(4, 0), padx=8)
+        tk.Label(mode_frame, text="Mostrar:", bg=container.cget("bg")).pack(side="left")
+        self.display_mode_var = tk.StringVar(value=next(iter(self.DISPLAY_MODES)))
+        ttk.Combobox(mode_frame, textvariable=self.display_mode_var, state="readonly",
+                     values=list(self.DISPLAY_MODES), width=22).pack(side="left", expand=True, fill="x", padx=(5, 0))
 
         self.btn_start = tk.Button(container, text="Iniciar Captura", command=self.iniciar_captura, bg="#27ae60", fg="white", relief="ridge", bd=1, font=("Arial", 10, "bold"))
         self.btn_start.pack(fill="x", padx=8, pady=(8,2))
         self.btn_stop = tk.Button(container, text="Detener Captura", command=self.detener_captura, state="disabled", bg="#f0f0f0", fg="#a0a0a0", relief="ridge", bd=1, font=("Arial", 10, "bold"))
         self.btn_stop.pack(fill="x", padx=8, pady=(0,8))
+        tk.Checkbutton(container, text="Disección en paralelo (multiproceso)", variable=self.parallel_dissection_var,
+                       bg=container.cget("bg"), anchor="w").pack(fill="x", padx=8, pady=(0, 2))
+        tk.Checkbutton(container, variable=self.spill_var, bg=container.cget("bg"), anchor="w",
+                       text=f"Guardar en disco al capturar ({self.SPILL_MAX_FILES} × {self.SPILL_MAX_FILE_MB} MB)"
+                       ).pack(fill="x", padx=8, pady=(0, 8))
+
+        # Política de la cola acotada entre la captura y la GUI, y sus contadores.
+        policy_frame = tk.Frame(container, bg=container.cget("bg"))
+        policy_frame.pack(fill="x", padx=8, pady=(0, 2))
+        tk.Label(policy_frame, text="Si la cola se llena:", bg=container.cget("bg")).pack(side="left")
+        self.overflow_policy_var = tk.StringVar(value="Descartar nuevos")
+        self.overflow_policy_combo = ttk.Combobox(policy_frame, textvariable=self.overflow_policy_var, state="readonly",
+                                                  values=list(self.OVERFLOW_POLICIES), width=18)
+        self.overflow_policy_combo.pack(side="left", expand=True, fill="x", padx=(5, 0))
+        self.queue_stats_var = tk.StringVar(value="Cola: 0 encolados · 0 descartados · máx. 0")
+        tk.Label(container, textvariable=self.queue_stats_var, font=("Arial", 8), fg="#7f8c8d",
+                 bg=container.cget("bg"), anchor="w").pack(fill="x", padx=8, pady=(0, 8))
 
         btn_export = tk.Button(
             container, text="Exportar paquetes", command=self._exportar_paquetes, relief="ridge", bd=1
         )
         btn_export.pack(fill="x", padx=8, pady=(0, 4))
-        btn_import = tk.Button(
+        self.btn_import = tk.Button(
             container, text="Importar paquetes", command=self._importar_paquetes, relief="ridge", bd=1
         )
-        btn_import.pack(fill="x", padx=8, pady=(0, 10))
+        self.btn_import.pack(fill="x", padx=8, pady=(0, 10))
+        # Progreso de la importación; sus widgets solo se muestran mientras dura.
+        self.import_frame = tk.Frame(container, bg=container.cget("bg"))
+        self.import_frame.pack(fill="x", padx=8)
+        self.import_progress = ttk.Progressbar(self.import_frame, mode="determinate", maximum=100)
+        self.btn_cancel_import = tk.Button(self.import_frame, text="Cancelar importación",
+                                           command=self._cancelar_importacion, relief="ridge", bd=1)
 
         # --- Separador y sección de guías rápidas ---
         ttk.Separator(container, orient="horizontal").pack(fill="x", pady=(2, 6))
@@ -205,60 +356,290 @@ class MonitorViewFrame(tk.Frame):
         self._cargar_interfaces()
         return container
 
+    def _limpiar_paquetes(self):
+        """Vacía la lista de paquetes, sus detalles y el índice del pcap importado, si lo hay."""
+        self.packet_list.limpiar()
+        self.captured_packets.clear()
+        self.packet_comments.clear()
+        self.summary_table.clear()
+        self.visible_rows = array("Q") if self.display_filter is not None else None
+        if self.packet_index is not None:
+            self.packet_index.close()
+            self.packet_index = None
+        self.indexed_rows = 0
+        self.filter_status_var.set("")
+        self.details_text.config(state="normal")
+        self.details_text.delete("1.0", tk.END)
+        self.details_text.config(state="disabled")
+
+    def _num_paquetes(self):
+        """Devuelve el número de paquetes mostrados en la lista."""
+        return self.indexed_rows if self.packet_index is not None else len(self.captured_packets)
+
+    def _obtener_paquete(self, pkt_id):
+        """
+        Devuelve el paquete diseccionado de una fila de la lista.
+
+        Args:
+            pkt_id (int): El número de la fila (empezando en 1).
+
+        Returns:
+            scapy.packet.Packet: El paquete, leído del almacén o, si la lista
+                                 viene de un pcap indexado, del archivo.
+
+        Raises:
+            IndexError: Si no hay ningún paquete con ese número.
+        """
+        if self.packet_index is not None:
+            if not 1 <= pkt_id <= self.indexed_rows:
+                raise IndexError(pkt_id)
+            return self.packet_index[pkt_id - 1].decodificar()
+        return self.captured_packets.decodificado(pkt_id - 1)
+
+    def _iterar_paquetes(self):
+        """Recorre los paquetes de la lista en orden, leyéndolos bajo demanda si están indexados."""
+        if self.packet_index is not None:
+            return (self.packet_index[i] for i in range(self.indexed_rows))
+        return iter(self.captured_packets)
+
     def _exportar_paquetes(self):
-        """Exporta los paquetes capturados a un archivo .pcap."""
+        """
+        Exporta los paquetes capturados a un archivo .pcap o .pcapng.
+
+        En formato pcapng se guardan además la descripción de cada interfaz y
+        los comentarios de los paquetes que se importaron con ellos.
+        """
         from tkinter import filedialog
         import scapy.utils
-        if not self.captured_packets:
+        if not self._num_paquetes():
             messagebox.showinfo("Exportar paquetes", "No hay paquetes capturados para exportar.")
             return
-        file_path = filedialog.asksaveasfilename(defaultextension=".pcap", filetypes=[("PCAP files", "*.pcap"), ("Todos", "*.*")])
+        file_path = filedialog.asksaveasfilename(defaultextension=".pcap", filetypes=[
+            ("PCAP files", "*.pcap"), ("PCAPNG files", "*.pcapng"), ("Todos", "*.*")])
         if file_path:
             try:
-                scapy.utils.wrpcap(file_path, self.captured_packets)
+                if file_path.lower().endswith(".pcapng"):
+                    descripciones = {i.name: i.description for i in obtener_registro().obtener_interfaces()}
+                    with EscritorPcapNg(file_path, descripciones=descripciones) as escritor:
+                        for pkt_id, packet in enumerate(self._iterar_paquetes(), start=1):
+                            escritor.escribir(packet, self.packet_comments.get(pkt_id, ()),
+                                              interfaz=getattr(packet, 'sniffed_on', None) or self.iface_var.get())
+                else:
+                    # Las tramas en crudo se diseccionan una a una mientras se escriben,
+                    # sin construir todos los paquetes en memoria a la vez.
+                    scapy.utils.wrpcap(file_path, (decodificar(p) for p in self._iterar_paquetes()))
                 messagebox.showinfo("Exportar paquetes", f"Paquetes exportados correctamente a:\n{file_path}")
             except Exception as e:
                 messagebox.showerror("Error al exportar", f"No se pudo exportar:\n{e}")
 
     def _importar_paquetes(self):
-        """Importa paquetes desde un archivo .pcap y los muestra en la lista."""
+        """
+        Importa paquetes desde un archivo .pcap o .pcapng y los muestra en la lista.
+
+        Los pcap se indexan con `IndicePcap` (un solo recorrido, con el índice
+        guardado junto al archivo), así que las tramas no se copian a memoria:
+        al seleccionar una fila se lee su paquete directamente del archivo. Los
+        pcapng se leen en streaming con `LectorPcapNg` para conservar los
+        comentarios, guardando solo la trama en crudo. En ambos casos un hilo
+        separado calcula el resumen de cada paquete y la GUI inserta las filas
+        por tandas con un tiempo máximo por ciclo (`IMPORT_TIME_BUDGET_MS`),
+        de modo que sigue respondiendo y la importación se puede cancelar.
+        """
         from tkinter import filedialog
-        import scapy.utils
-        file_path = filedialog.askopenfilename(filetypes=[("PCAP files", "*.pcap"), ("Todos", "*.*")])
-        if file_path:
-            try:
-                pkts = list(scapy.utils.rdpcap(file_path))
-                if not pkts:
-                    messagebox.showinfo("Importar paquetes", "El archivo no contiene paquetes.")
+        if self.captor or self.import_thread:
+            messagebox.showinfo("Importar paquetes", "Detén la captura o la importación en curso antes de importar.")
+            return
+        file_path = filedialog.askopenfilename(filetypes=[("Capturas", "*.pcap *.pcapng"), ("Todos", "*.*")])
+        if not file_path:
+            return
+        # Los paquetes que quedaran de una captura anterior no son de este archivo.
+        if self.update_job:
+            self.after_cancel(self.update_job)
+            self.update_job = None
+        self.packet_queue.clear()
+        self.pending_packets.clear()
+        self._limpiar_paquetes()
+
+        # La cola acotada frena al hilo lector si la GUI no inserta al mismo ritmo.
+        self.import_queue = queue.Queue(maxsize=self.IMPORT_MAX_PENDING_CHUNKS)
+        self.import_pending.clear()
+        self.import_cancel_event = threading.Event()
+        self.import_thread = threading.Thread(target=self._leer_pcap, daemon=True,
+                                              args=(file_path, self.import_queue, self.import_cancel_event))
+        self.import_thread.start()
+
+        self.import_progress.configure(value=0)
+        self.import_progress.pack(fill="x", pady=(0, 4))
+        self.btn_cancel_import.pack(fill="x", pady=(0, 10))
+        self.btn_import.config(state="disabled")
+        self.btn_start.config(state="disabled")
+        self.import_job = self.after(20, self._procesar_importacion)
+
+    def _leer_pcap(self, file_path, cola, cancelar):
+        """
+        Hilo lector de la importación: lee el pcap paquete a paquete.
+
+        Envía a `cola` mensajes (tipo, datos, progreso): ("indice",
+        IndicePcap, 0.0) al empezar si el archivo es un pcap indexable,
+        ("lote", lista de tuplas (PaqueteCrudo, ResumenPaquete, comentarios),
+        fracción leída del archivo), ("fin", None, 1.0) o ("error", excepción,
+        None). Con índice, el paquete de cada tupla es None: se lee del índice.
+
+        El hilo lee con su propio `IndicePcap`, que cierra siempre al terminar,
+        y envía a la GUI otra instancia del mismo archivo (que carga el índice
+        ya guardado), de la que la GUI es dueña en cuanto la recoge. Así el
+        lector nunca usa un índice que la GUI haya cerrado. Si se cancela, la
+        GUI deja de leer la cola y el lector cierra el índice que no llegó a
+        recoger.
+
+        Args:
+            file_path (str): Ruta del archivo pcap.
+            cola (queue.Queue): Cola acotada hacia la GUI.
+            cancelar (threading.Event): Se activa si el usuario cancela.
+        """
+        def enviar(mensaje):
+            # Espera a que haya hueco, pero sin quedarse bloqueado si se cancela.
+            while not cancelar.is_set():
+                try:
+                    cola.put(mensaje, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        indice = None
+        try:
+            tamano = os.path.getsize(file_path) or 1
+            lote = []
+            if es_pcapng(file_path):
+                with LectorPcapNg(file_path) as reader:
+                    for registro in reader:
+                        if cancelar.is_set():
+                            return
+                        lote.append((registro.paquete, clasificar(registro.paquete.decodificar()), registro.comentarios))
+                        if len(lote) >= self.IMPORT_CHUNK_SIZE:
+                            if not enviar(("lote", lote, min(reader.f.tell() / tamano, 1.0))):
+                                return
+                            lote = []
+            else:
+                indice = IndicePcap(file_path)
+                indice_gui = IndicePcap(file_path)
+                if not enviar(("indice", indice_gui, 0.0)):
+                    indice_gui.close()
                     return
-                self.packet_list.delete(*self.packet_list.get_children())
-                self.captured_packets = pkts
-                for i, packet in enumerate(pkts, 1):
-                    proto, src, dst, info = "N/A", "N/A", "N/A", packet.summary()
-                    from scapy.layers.inet import IP, TCP, UDP
-                    from scapy.layers.l2 import ARP
-                    if packet.haslayer(IP):
-                        src = packet[IP].src
-                        dst = packet[IP].dst
-                        if packet.haslayer(TCP):
-                            proto = "TCP"
-                        elif packet.haslayer(UDP):
-                            proto = "UDP"
-                        else:
-                            proto = "IP"
-                    elif packet.haslayer(ARP):
-                        proto = "ARP"
-                        src = packet[ARP].psrc
-                        dst = packet[ARP].pdst
-                    pkt_time = "--:--:--"
-                    values = (i, pkt_time, src, dst, proto, len(packet), info)
-                    self.packet_list.insert('', 'end', values=values, iid=str(i))
-                self.details_text.config(state="normal")
-                self.details_text.delete("1.0", tk.END)
-                self.details_text.config(state="disabled")
-                messagebox.showinfo("Importar paquetes", f"Se importaron {len(pkts)} paquetes.")
-            except Exception as e:
-                messagebox.showerror("Error al importar", f"No se pudo importar:\n{e}")
+                total = len(indice) or 1
+                for i in range(len(indice)):
+                    if cancelar.is_set():
+                        return
+                    lote.append((None, clasificar(indice[i].decodificar()), None))
+                    if len(lote) >= self.IMPORT_CHUNK_SIZE:
+                        if not enviar(("lote", lote, (i + 1) / total)):
+                            return
+                        lote = []
+            if lote and not enviar(("lote", lote, 1.0)):
+                return
+            enviar(("fin", None, 1.0))
+        except Exception as e:
+            enviar(("error", e, None))
+        finally:
+            if indice is not None:
+                indice.close()
+            if cancelar.is_set():
+                # La GUI ya no recoge mensajes: cerrar el índice si quedó en la cola.
+                while True:
+                    try:
+                        tipo, datos, _ = cola.get_nowait()
+                    except queue.Empty:
+                        break
+                    if tipo == "indice":
+                        datos.close()
+
+    def _procesar_importacion(self):
+        """
+        Inserta en la lista las filas importadas durante, como mucho, `IMPORT_TIME_BUDGET_MS`.
+
+        Se ejecuta en el hilo de la GUI y se reprograma hasta que el hilo
+        lector envía el mensaje de fin (o de error).
+        """
+        limite = time.perf_counter() + self.IMPORT_TIME_BUDGET_MS / 1000
+        primer_id = len(self.summary_table) + 1
+        resumenes = []  # Filas de este ciclo; se añaden a la lista de una vez.
+        final = None
+        while time.perf_counter() < limite:
+            if not self.import_pending:
+                try:
+                    tipo, datos, progreso = self.import_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if tipo in ("fin", "error"):
+                    final = (tipo, datos)
+                    break
+                if tipo == "indice":
+                    self.packet_index = datos
+                    continue
+                self.import_pending.extend(datos)
+                self.import_progress.configure(value=progreso * 100)
+            packet, resumen, comentarios = self.import_pending.popleft()
+            if packet is None:
+                self.indexed_rows += 1
+                pkt_id = self.indexed_rows
+            else:
+                self.captured_packets.append(packet)
+                pkt_id = len(self.captured_packets)
+            if comentarios:
+                self.packet_comments[pkt_id] = comentarios
+            self.summary_table.agregar(resumen, (packet and packet.sniffed_on) or "-")
+            resumenes.append(resumen)
+        self._insertar_filas(primer_id, resumenes)
+        if final is not None:
+            tipo, datos = final
+            self._finalizar_importacion(error=datos if tipo == "error" else None)
+            return
+        # Si quedan filas, volver enseguida; si no, esperar a que el lector envíe más.
+        self.import_job = self.after(1 if self.import_pending else 20, self._procesar_importacion)
+
+    def _cancelar_importacion(self):
+        """Detiene la importación en curso; los paquetes ya mostrados se conservan."""
+        self.import_cancel_event.set()
+        # El lector puede haber terminado ya con el índice en la cola sin recoger;
+        # si sigue en marcha, vacía él la cola al salir (ver `_leer_pcap`).
+        while True:
+            try:
+                tipo, datos, _ = self.import_queue.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == "indice":
+                datos.close()
+        self._finalizar_importacion(cancelada=True)
+
+    def _finalizar_importacion(self, error=None, cancelada=False):
+        """
+        Restaura los controles al terminar, cancelar o fallar una importación.
+
+        Args:
+            error (Exception, optional): El error del hilo lector, si lo hubo.
+            cancelada (bool): Si la importación la canceló el usuario.
+        """
+        if self.import_job:
+            self.after_cancel(self.import_job)
+            self.import_job = None
+        self.import_thread = None
+        self.import_pending.clear()
+        self.import_progress.pack_forget()
+        self.btn_cancel_import.pack_forget()
+        self.btn_import.config(state="normal")
+        self.btn_start.config(state="normal")
+        total = self._num_paquetes()
+        self._mostrar_diagnostico()
+        if error is not None:
+            messagebox.showerror("Error al importar", f"No se pudo importar:\n{error}")
+        elif cancelada:
+            messagebox.showinfo("Importar paquetes", f"Importación cancelada. Se importaron {total} paquetes.")
+        elif not total:
+            messagebox.showinfo("Importar paquetes", "El archivo no contiene paquetes.")
+        else:
+            messagebox.showinfo("Importar paquetes", f"Se importaron {total} paquetes.")
+
     def _mostrar_info_educativa_en_pestana(self, titulo):
         """Muestra la guía rápida como una pestaña en el notebook inferior derecho, con botón de cerrar y scroll si es necesario."""
         if not hasattr(self, 'notebook'):
@@ -294,41 +675,57 @@ class MonitorViewFrame(tk.Frame):
 
     def _crear_panel_lista_paquetes(self):
         """
-        Crea el panel superior derecho que contiene la lista de paquetes (Treeview).
+        Crea el panel superior derecho que contiene la lista de paquetes.
+
+        La lista es una `ListaVirtual`: solo las filas visibles existen como
+        items de Tk, y sus valores se leen de la tabla de resúmenes al
+        desplazarse, de modo que admite capturas de millones de paquetes.
 
         Returns:
-            tk.Frame: El frame que contiene el Treeview y sus scrollbars.
+            tk.Frame: El frame que contiene la barra de filtro y la lista.
         """
         list_panel = tk.Frame(self, bg=self.cget("bg"))
         list_panel.grid_rowconfigure(1, weight=1)
         list_panel.grid_columnconfigure(0, weight=1)
 
 
-        # --- Lista de Paquetes (Treeview) ---
-        cols = ('#', 'Time', 'Source', 'Destination', 'Protocol', 'Length', 'Info')
-        self.packet_list = ttk.Treeview(list_panel, columns=cols, show='headings')
+        # --- Filtro de visualización ---
+        filter_bar = tk.Frame(list_panel, bg=self.cget("bg"))
+        filter_bar.grid(row=0, column=0, columnspan=2, sticky='ew', pady=(0, 2))
+        tk.Label(filter_bar, text="Filtro:", bg=self.cget("bg")).pack(side="left")
+        self.filter_entry = tk.Entry(filter_bar, textvariable=self.display_filter_var, bg="white")
+        self.filter_entry.pack(side="left", expand=True, fill="x", padx=(5, 5))
+        self.filter_entry.bind("<Return>", self._aplicar_filtro_visualizacion)
+        tk.Button(filter_bar, text="Aplicar", command=self._aplicar_filtro_visualizacion, relief="ridge", bd=1).pack(side="left")
+        tk.Button(filter_bar, text="Limpiar", command=self._quitar_filtro_visualizacion, relief="ridge", bd=1).pack(side="left", padx=(2, 0))
+        self.filter_status_var = tk.StringVar()
+        tk.Label(filter_bar, textvariable=self.filter_status_var, font=("Arial", 8), fg="#7f8c8d",
+                 bg=self.cget("bg")).pack(side="left", padx=(6, 0))
+
+        # --- Lista de Paquetes (Treeview virtual) ---
+        cols = ('#', 'Time', 'Interface', 'Source', 'Destination', 'Protocol', 'Length', 'Info')
+        self.packet_list = ListaVirtual(list_panel, cols, self._fila_lista, bg=self.cget("bg"))
+        # Paquetes importados con comentarios pcapng: los de ataques simulados
+        # se resaltan igual que en el simulador.
+        self.packet_list.tag_configure('attack', background='#ffdddd')
+        self.packet_list.tag_configure('annotated', background='#fff5d6')
         for col in cols:
             self.packet_list.heading(col, text=col)
         # Configuración de columnas
         self.packet_list.column("#", width=50, anchor="center")
         self.packet_list.column("Time", width=80, anchor="center")
+        self.packet_list.column("Interface", width=80, anchor="center")
         self.packet_list.column("Source", width=120)
         self.packet_list.column("Destination", width=120)
         self.packet_list.column("Protocol", width=70, anchor="center")
         self.packet_list.column("Length", width=60, anchor="center")
         self.packet_list.column("Info", width=300)
 
-        # Scrollbars para la lista
-        vsb = ttk.Scrollbar(list_panel, orient="vertical", command=self.packet_list.yview)
-        hsb = ttk.Scrollbar(list_panel, orient="horizontal", command=self.packet_list.xview)
-        self.packet_list.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
         # Vincular el evento de selección a la función para mostrar detalles
-        self.packet_list.bind("<<TreeviewSelect>>", self._mostrar_detalles_paquete)
+        self.packet_list.bind(EVENTO_SELECCION, self._mostrar_detalles_paquete)
 
-        self.packet_list.grid(row=1, column=0, sticky='nswe')
-        vsb.grid(row=1, column=1, sticky='ns')
-        hsb.grid(row=2, column=0, sticky='ew')
+        # La lista virtual incluye sus propias barras de desplazamiento.
+        self.packet_list.grid(row=1, column=0, columnspan=2, sticky='nswe')
         # Expandir correctamente
         list_panel.grid_rowconfigure(1, weight=1)
         list_panel.grid_columnconfigure(0, weight=1)
@@ -354,6 +751,14 @@ class MonitorViewFrame(tk.Frame):
         self.details_text.grid(row=0, column=0, sticky='nswe')
         self.notebook.add(details_frame, text='Detalles del Paquete')
 
+        # Pestaña de Diagnóstico: rendimiento de cada etapa del pipeline de captura.
+        diagnostics_frame = tk.Frame(self.notebook, bg="#1e1e1e")
+        diagnostics_frame.rowconfigure(0, weight=1)
+        diagnostics_frame.columnconfigure(0, weight=1)
+        self.diagnostics_text = scrolledtext.ScrolledText(diagnostics_frame, state="disabled", bg="#1e1e1e", fg="#d4d4d4", font=("Consolas", 10))
+        self.diagnostics_text.grid(row=0, column=0, sticky='nswe')
+        self.notebook.add(diagnostics_frame, text='Diagnóstico')
+
         return notebook_panel
 
     def _cargar_interfaces(self):
@@ -364,6 +769,10 @@ class MonitorViewFrame(tk.Frame):
         esta operación se realiza en un hilo separado. Una vez obtenidas,
         la actualización del ComboBox se programa para ejecutarse en el hilo
         principal de la GUI usando `self.after`.
+
+        La lista sale del registro compartido de interfaces, que normalmente
+        ya la tiene en caché. La vista se suscribe además al registro para
+        actualizar el ComboBox cuando aparezcan o desaparezcan interfaces.
         """
         self.iface_combo['values'] = ["Cargando..."]
         self.iface_var.set("Cargando...")
@@ -371,18 +780,84 @@ class MonitorViewFrame(tk.Frame):
             try:
                 interfaces = get_network_interfaces()
                 if interfaces:
-                    def update_gui():
-                        placeholder = "Seleccione una interfaz de red"
-                        full_list = [placeholder] + interfaces
-                        self.iface_combo.configure(values=full_list)
-                        self.iface_var.set(placeholder)
-                    self.after(0, update_gui)
+                    self.after(0, self._actualizar_lista_interfaces, interfaces)
                 else:
                     self.after(0, lambda: self.iface_combo.configure(values=["No hay interfaces"]))
             except Exception as e:
                 self.after(0, lambda: self.iface_combo.configure(values=["Error al cargar"]))
                 messagebox.showerror("Error de Interfaz", f"No se pudieron cargar las interfaces de red:\n{e}")
         threading.Thread(target=fetch, daemon=True).start()
+        registro = obtener_registro()
+        registro.suscribir(self._al_cambiar_interfaces)
+        self.bind("<Destroy>", lambda e: e.widget is self and registro.cancelar_suscripcion(self._al_cambiar_interfaces), add="+")
+
+    def _al_cambiar_interfaces(self, interfaces, anadidas, eliminadas):
+        """
+        Callback del registro de interfaces cuando cambia el conjunto de interfaces.
+
+        Se ejecuta en el hilo del registro, así que solo programa la
+        actualización del ComboBox en el hilo de la GUI.
+
+        Args:
+            interfaces (list[InfoInterfaz]): Todas las interfaces actuales.
+            anadidas (list[str]): Nombres de las interfaces nuevas.
+            eliminadas (list[str]): Nombres de las interfaces que ya no existen.
+        """
+        self.after(0, self._actualizar_lista_interfaces, [i.name for i in interfaces])
+
+    def _actualizar_lista_interfaces(self, interfaces):
+        """
+        Rellena el ComboBox de interfaces conservando la selección si sigue existiendo.
+
+        Durante una captura no se cambia la selección, solo la lista.
+
+        Args:
+            interfaces (list[str]): Nombres de las interfaces disponibles.
+        """
+        placeholder = "Seleccione una interfaz de red"
+        self.iface_combo.configure(values=[placeholder] + interfaces)
+        if self.captor is not None:
+            return
+        if any(i not in interfaces for i in self.selected_interfaces):
+            self.selected_interfaces.clear()
+            self.iface_var.set(placeholder)
+        elif not self.selected_interfaces and self.iface_var.get() not in interfaces:
+            self.iface_var.set(placeholder)
+
+    def _seleccionar_varias_interfaces(self):
+        """
+        Abre un diálogo para elegir varias interfaces y capturarlas a la vez.
+
+        Las interfaces marcadas se guardan en `selected_interfaces`. Si se eligen
+        dos o más, el ComboBox muestra un resumen y la captura usará una
+        `SesionCaptura` en lugar de un único `PacketCaptor`.
+        """
+        placeholder = "Seleccione una interfaz de red"
+        interfaces = [i for i in self.iface_combo['values'] if i != placeholder and "Cargando" not in i
+                      and "Error" not in i and i != "No hay interfaces"]
+        if not interfaces:
+            messagebox.showinfo("Varias interfaces", "Todavía no hay interfaces disponibles.")
+            return
+        dialog = tk.Toplevel(self)
+        dialog.title("Capturar en varias interfaces")
+        dialog.transient(self)
+        dialog.grab_set()
+        tk.Label(dialog, text="Marca las interfaces que quieres capturar a la vez:").pack(anchor="w", padx=10, pady=(10, 5))
+        variables = {}
+        for nombre in interfaces:
+            var = tk.BooleanVar(value=nombre in self.selected_interfaces)
+            tk.Checkbutton(dialog, text=nombre, variable=var, anchor="w").pack(fill="x", padx=16)
+            variables[nombre] = var
+
+        def aceptar():
+            self.selected_interfaces = [n for n, v in variables.items() if v.get()]
+            if len(self.selected_interfaces) > 1:
+                self.iface_var.set(f"{len(self.selected_interfaces)} interfaces: " + ", ".join(self.selected_interfaces))
+            elif self.selected_interfaces:
+                self.iface_var.set(self.selected_interfaces[0])
+            dialog.destroy()
+
+        tk.Button(dialog, text="Aceptar", command=aceptar, relief="ridge", bd=1).pack(pady=10)
 
     def iniciar_captura(self):
         """
@@ -395,131 +870,439 @@ class MonitorViewFrame(tk.Frame):
         """
         placeholder = "Seleccione una interfaz de red"
         iface = self.iface_var.get()
-        if not iface or iface == placeholder or "Cargando" in iface or "Error" in iface:
+        multi = len(self.selected_interfaces) > 1
+        if not multi and (not iface or iface == placeholder or "Cargando" in iface or "Error" in iface):
             messagebox.showerror("Error", "Por favor, selecciona una interfaz de red válida.")
             return
 
-        # Limpiar vista anterior
-        self.packet_list.delete(*self.packet_list.get_children())
-        self.captured_packets.clear()
-        self.details_text.config(state="normal")
-        self.details_text.delete("1.0", tk.END)
-        self.details_text.config(state="disabled")
+        bpf_filter = self.bpf_var.get().strip()
+        try:
+            validar_filtro_bpf(bpf_filter)
+        except ValueError as e:
+            messagebox.showerror("Filtro BPF inválido", f"La expresión de filtro no es válida:\n{e}")
+            return
 
-        # Limpiar la cola de cualquier paquete residual
-        while not self.packet_queue.empty():
+        # Volcado opcional a disco: los paquetes se escriben en archivos pcap
+        # rotativos a medida que llegan, antes de pasar por la cola de la GUI.
+        sinks = []
+        if self.spill_var.get():
+            from tkinter import filedialog
+            directorio = filedialog.askdirectory(title="Carpeta donde guardar la captura")
+            if not directorio:
+                return
             try:
-                self.packet_queue.get_nowait()
-            except queue.Empty:
-                continue
+                self.spill_writer = EscritorRotativo(directorio, max_bytes=self.SPILL_MAX_FILE_MB * 1024 * 1024,
+                                                     max_archivos=self.SPILL_MAX_FILES)
+            except OSError as e:
+                messagebox.showerror("Guardar en disco", f"No se puede escribir en la carpeta elegida:\n{e}")
+                return
+            sinks.append(self.spill_writer)
+
+        # Limpiar vista anterior
+        self._limpiar_paquetes()
 
-        self.captor = PacketCaptor(interface=iface, packet_callback=self._agregar_paquete)
+        # Nueva cola acotada con la política elegida (descarta cualquier paquete residual).
+        self.packet_queue = ColaAcotada(self.QUEUE_CAPACITY, self.OVERFLOW_POLICIES[self.overflow_policy_var.get()],
+                                        aviso=self.queue_waker.avisar)
+        self.pending_packets.clear()
+        self._actualizar_estadisticas_cola()
+        self.metricas.reset()
+        self.metricas.fuente_cola = self.packet_queue.estadisticas
+
+        # Con la disección en paralelo, las tramas en crudo pasan primero por un
+        # pool de procesos que devuelve los resúmenes ya calculados, en orden.
+        callback = self._agregar_lote
+        snaplen = self.SNAPLEN_MODES[self.snaplen_var.get()]
+        if self.parallel_dissection_var.get():
+            self.dissection_stage = EtapaDiseccion(self._agregar_lote_resumido)
+            callback = self.dissection_stage.enviar
+        if multi:
+            # Un hilo por interfaz; la sesión mezcla los paquetes por marca de tiempo.
+            self.captor = SesionCaptura(self.selected_interfaces, packet_callback=callback,
+                                        bpf_filter=bpf_filter, batch_size=self.CAPTURE_BATCH_SIZE, raw=True,
+                                        snaplen=snaplen, metrics=self.metricas, sinks=sinks)
+            self.metricas.fuente_kernel = self.captor.estadisticas_kernel
+        else:
+            self.captor = PacketCaptor(interface=iface, packet_callback=callback, bpf_filter=bpf_filter,
+                                       batch_size=self.CAPTURE_BATCH_SIZE, raw=True, snaplen=snaplen,
+                                       metrics=self.metricas, sinks=sinks)
+            self.metricas.fuente_kernel = self.captor.estadisticas
         self.captor.start()
 
         self.btn_start.config(state="disabled")
         self.btn_stop.config(state="normal", bg="#c0392b", fg="white")
         self.iface_combo.config(state="disabled")
+        self.overflow_policy_combo.config(state="disabled")
+        self.snaplen_combo.config(state="disabled")
+        self.btn_multi_iface.config(state="disabled")
+        self.bpf_entry.config(state="disabled")
         
-        # Iniciar el bucle de procesamiento de la cola
-        self._process_packet_queue()
+        # La cola se procesa cuando avisa de que han llegado paquetes; el
+        # diagnóstico se refresca periódicamente.
+        self._actualizar_diagnostico()
 
     def detener_captura(self):
         """
         Detiene la captura de paquetes.
 
-        Señaliza al hilo de `PacketCaptor` para que se detenga, cancela el
-        trabajo de actualización de la GUI (`update_job`) y restaura el estado
-        de los botones.
+        Detiene el `PacketCaptor` (que espera, con un tiempo acotado, a que su
+        hilo termine), termina de mostrar los paquetes que siguen en la cola
+        y restaura el estado de los botones.
         """
         if self.captor:
             self.captor.stop()
             self.captor = None
-        
-        if self.update_job:
-            self.after_cancel(self.update_job)
-            self.update_job = None
+
+        if self.spill_writer:
+            # El captor ya ha entregado su último lote: se puede cerrar el archivo.
+            self.spill_writer.close()
+            self.spill_writer = None
+
+        if self.dissection_stage:
+            # Cerrar el pool en segundo plano: espera a los trozos pendientes.
+            threading.Thread(target=self.dissection_stage.close, daemon=True).start()
+            self.dissection_stage = None
+
+        # `stop()` ya ha entregado el último lote: mostrar lo que quede en la cola.
+        # El bucle de la GUI deja de reprogramarse solo cuando la cola se vacía.
+        self._al_llegar_paquetes()
+        if self.diagnostics_job:
+            self.after_cancel(self.diagnostics_job)
+            self.diagnostics_job = None
 
         self.btn_start.config(state="normal")
         self.btn_stop.config(state="disabled", bg="#f0f0f0", fg="#a0a0a0")
         self.iface_combo.config(state="readonly")
+        self.overflow_policy_combo.config(state="readonly")
+        self.snaplen_combo.config(state="readonly")
+        self.btn_multi_iface.config(state="normal")
+        self.bpf_entry.config(state="normal")
 
-    def _agregar_paquete(self, packet):
+    def _agregar_lote(self, packets):
         """
-        Callback ejecutado por el hilo de captura para cada paquete.
+        Callback ejecutado por el hilo de captura para cada lote de paquetes.
 
         Este método se ejecuta en el hilo de `PacketCaptor`, NO en el hilo de la GUI.
-        Su única responsabilidad es poner el paquete capturado en una `queue.Queue`
-        thread-safe, para que el hilo de la GUI pueda procesarlo más tarde.
+        Su única responsabilidad es poner el lote completo en una `queue.Queue`
+        thread-safe con una sola operación, para que el hilo de la GUI pueda
+        procesarlo más tarde.
 
         Args:
-            packet (scapy.packet.Packet): El paquete capturado.
+            packets (list[scapy.packet.Packet]): Los paquetes capturados.
+        """
+        self.packet_queue.put(packets)
+
+    def _agregar_lote_resumido(self, items):
         """
-        self.packet_queue.put(packet)
+        Callback de la etapa de disección en paralelo.
+
+        Se ejecuta en el hilo recolector de `EtapaDiseccion`. Recibe tuplas
+        (paquete, resumen) con el resumen ya calculado por un proceso
+        trabajador y las encola igual que un lote normal.
+
+        Args:
+            items (list[tuple]): Tuplas (PaqueteCrudo, ResumenPaquete).
+        """
+        self.metricas.registrar_lote(ETAPA_DISECCION, [packet for packet, _ in items])
+        self.packet_queue.put(items)
+
+    def _al_llegar_paquetes(self, event=None):
+        """
+        Empieza a vaciar la cola si el bucle de procesamiento está parado.
+
+        No depende de que haya una captura activa: el último lote parcial se
+        entrega al detenerla, y la disección en paralelo puede entregar sus
+        últimos paquetes después.
+        """
+        if self.update_job is None and (self.pending_packets or not self.packet_queue.empty()):
+            self._process_packet_queue()
+
+    def _programar_siguiente_ciclo(self, por_lotes):
+        """
+        Reprograma `_process_packet_queue` solo si quedan paquetes por mostrar.
+
+        Args:
+            por_lotes (bool): Si está activo el modo de alto rendimiento.
+        """
+        if not self.pending_packets and self.packet_queue.empty():
+            self.update_job = None  # Esperar al siguiente aviso de la cola.
+        elif por_lotes:
+            # Volver enseguida, dejando a Tk atender sus eventos entre ciclos.
+            self.update_job = self.after(1, self._process_packet_queue)
+        else:
+            # Una pausa más larga (400ms) hace que cada paquete sea visible
+            # antes de que aparezca el siguiente, facilitando el análisis.
+            self.update_job = self.after(self.EDUCATIONAL_INTERVAL_MS, self._process_packet_queue)
 
     def _process_packet_queue(self):
         """
-        Procesa la cola de paquetes y actualiza la GUI a un ritmo controlado.
+        Procesa la cola de paquetes y actualiza la GUI al ritmo del modo elegido.
+
+        Este método se ejecuta en el hilo principal de la GUI y se reprograma a
+        sí mismo con `self.after`. En el modo educativo inserta un solo paquete
+        por ciclo, de modo que aparecen uno a uno y son fáciles de seguir. En el
+        de alto rendimiento vacía la cola durante como mucho
+        `THROUGHPUT_TIME_BUDGET_MS` por ciclo, insertando las filas por tandas
+        y desplazando la lista una sola vez, para que la GUI siga fluida aunque
+        lleguen miles de paquetes por segundo.
 
-        Este método se ejecuta en el hilo principal de la GUI. Extrae paquetes de la
-        cola y los inserta en la lista. Al procesar solo un paquete y luego
-        reprogramarse a sí mismo con `self.after`, se asegura que la GUI permanezca
-        fluida y receptiva, y que los paquetes aparezcan uno por uno.
+        Solo se reprograma mientras quedan paquetes; cuando la cola se vacía
+        deja de ejecutarse hasta que la cola vuelve a avisar (`_al_llegar_paquetes`).
         """
+        # Con la captura detenida, lo que queda en la cola se muestra de una vez.
+        por_lotes = self.DISPLAY_MODES[self.display_mode_var.get()] or self.captor is None
         try:
-            # Procesa solo UN paquete por ciclo para que aparezcan de uno en uno.
-            # Esto hace que la captura sea fácil de seguir para el aprendizaje.
-            for _ in range(1): 
-                packet = self.packet_queue.get_nowait()
-                self._insertar_paquete_en_gui(packet)
+            if por_lotes:
+                self._vaciar_cola_por_lotes()
+            else:
+                # Los paquetes llegan en lotes, así que solo se consulta la cola
+                # cuando se han mostrado todos los del lote anterior.
+                if not self.pending_packets:
+                    self.pending_packets.extend(self.packet_queue.get_nowait())
+                if self._insertar_lote_en_gui([self.pending_packets.popleft()]):
+                    self.packet_list.ver_final() # Auto-scroll
         except queue.Empty:
             pass  # La cola está vacía, no hay nada que hacer
         finally:
-            # Vuelve a llamar a esta función después de una pausa más larga (en ms).
-            # Un valor como 300-500ms permite que el usuario note cada paquete.
-            self.update_job = self.after(400, self._process_packet_queue)
+            self._actualizar_estadisticas_cola()
+            self._programar_siguiente_ciclo(por_lotes)
+
+    def _vaciar_cola_por_lotes(self):
+        """
+        Inserta paquetes de la cola por tandas hasta agotar el tiempo del ciclo o la cola.
+
+        Cada tanda se inserta de una vez (`_insertar_lote_en_gui`) y, si se ha
+        añadido alguna fila, la lista se desplaza al final una sola vez.
+        """
+        limite = time.perf_counter() + self.THROUGHPUT_TIME_BUDGET_MS / 1000
+        mostradas = 0
+        while time.perf_counter() < limite:
+            if not self.pending_packets:
+                try:
+                    self.pending_packets.extend(self.packet_queue.get_nowait())
+                except queue.Empty:
+                    break
+            tanda = min(len(self.pending_packets), self.THROUGHPUT_CHUNK_SIZE)
+            mostradas += self._insertar_lote_en_gui([self.pending_packets.popleft() for _ in range(tanda)])
+        if mostradas:
+            self.packet_list.ver_final() # Auto-scroll
+
+    def _actualizar_estadisticas_cola(self):
+        """Muestra en el panel de controles los contadores de la cola acotada."""
+        stats = self.packet_queue.estadisticas()
+        self.queue_stats_var.set(
+            f"Cola: {stats['ocupacion']}/{stats['capacidad']} · {stats['encolados']} encolados · "
+            f"{stats['descartados']} descartados · máx. {stats['maximo']}"
+        )
+
+    def _actualizar_diagnostico(self):
+        """
+        Refresca la pestaña de diagnóstico con una instantánea de las métricas.
+
+        Se reprograma cada `DIAGNOSTICS_INTERVAL_MS` mientras dura la captura,
+        de modo que las tasas por segundo se calculan sobre ese intervalo.
+        """
+        self._mostrar_diagnostico(formatear_instantanea(self.metricas.instantanea()))
+        # Los contadores de la cola también cambian mientras la lista está parada (ej. descartes).
+        self._actualizar_estadisticas_cola()
+        self.diagnostics_job = self.after(self.DIAGNOSTICS_INTERVAL_MS, self._actualizar_diagnostico)
 
-    def _insertar_paquete_en_gui(self, packet):
+    def _mostrar_diagnostico(self, texto=""):
         """
-        Inserta un único paquete en el Treeview de la GUI.
+        Escribe la pestaña de diagnóstico: el texto dado y las estadísticas de la lista.
 
-        Este método se ejecuta en el hilo principal. Extrae la información resumida
-        del paquete y la añade como una nueva fila en el widget `packet_list`.
+        Las estadísticas por protocolo y origen se calculan de forma
+        vectorizada sobre la tabla de resúmenes.
 
         Args:
-            packet (scapy.packet.Packet): El paquete a mostrar.
-        """
-        self.captured_packets.append(packet)
-        pkt_id = len(self.captured_packets)
-
-        proto, src, dst, info = "N/A", "N/A", "N/A", packet.summary()
-        if packet.haslayer(IP):
-            src = packet[IP].src
-            dst = packet[IP].dst
-            if packet.haslayer(TCP):
-                proto = "TCP"
-            elif packet.haslayer(UDP):
-                proto = "UDP"
-            else:
-                proto = "IP"
-        elif packet.haslayer(ARP):
-            proto = "ARP"
-            src = packet[ARP].psrc
-            dst = packet[ARP].pdst
+            texto (str): Texto previo (ej. las métricas del pipeline).
+        """
+        if len(self.summary_table):
+            texto = (texto + "\n\n" if texto else "") + formatear_estadisticas(self.summary_table.estadisticas())
+        self.diagnostics_text.config(state="normal")
+        self.diagnostics_text.delete("1.0", tk.END)
+        self.diagnostics_text.insert(tk.END, texto)
+        self.diagnostics_text.config(state="disabled")
+
+    def _insertar_lote_en_gui(self, items):
+        """
+        Inserta varios paquetes consecutivos en la lista de la GUI.
+
+        Este método se ejecuta en el hilo principal. Guarda los paquetes en el
+        almacén, calcula su resumen si hace falta y los añade de una vez a la
+        tabla de resúmenes y a la lista.
+
+        Args:
+            items (list): Paquetes (scapy.packet.Packet o PaqueteCrudo), o tuplas
+                          (paquete, resumen) con el resumen ya calculado por la
+                          disección en paralelo, que así no se disecciona aquí.
+
+        Returns:
+            int: Número de filas añadidas a la lista (las que cumplen el filtro).
+        """
+        primer_id = len(self.summary_table) + 1
+        iface_captura = self.iface_var.get()
+        resumenes, interfaces, pendientes = [], [], []
+        base = len(self.captured_packets)
+        for item in items:
+            packet, resumen = item if isinstance(item, tuple) else (item, None)
+            self.captured_packets.append(packet)
+            if resumen is None:
+                pendientes.append(len(resumenes))
+            resumenes.append(resumen)
+            interfaces.append(getattr(packet, 'sniffed_on', None) or iface_captura)
+
+        if pendientes:
+            # Las tramas en crudo se diseccionan aquí y quedan en la caché LRU del
+            # almacén por si el usuario selecciona el paquete; en disco solo van los bytes.
+            # Se clasifican todas de una vez y el tiempo se reparte entre ellas.
+            inicio = time.perf_counter()
+            nuevos = clasificar_lote([self.captured_packets.decodificado(base + i) for i in pendientes])
+            duracion = (time.perf_counter() - inicio) / len(nuevos)
+            for i, resumen in zip(pendientes, nuevos):
+                resumenes[i] = resumen
+                self.metricas.registrar_duracion(ETAPA_DISECCION, duracion)
+            self.metricas.registrar(ETAPA_DISECCION, len(nuevos), sum(r.length for r in nuevos))
+
+        inicio = time.perf_counter()
+        self.summary_table.agregar_lote(resumenes, interfaces)
+        mostradas = self._insertar_filas(primer_id, resumenes)
+        self._registrar_visualizacion(resumenes, inicio)
+        return mostradas
 
-        pkt_time = time.strftime('%H:%M:%S', time.localtime(packet.time))
-        values = (pkt_id, pkt_time, src, dst, proto, len(packet), info)
+    def _insertar_filas(self, primer_id, resumenes):
+        """
+        Añade a la lista las filas de paquetes consecutivos que cumplen el filtro de visualización.
+
+        Los paquetes ya deben estar en la tabla de resúmenes. Los paquetes
+        nuevos se comprueban con el predicado compilado del filtro, sin volver
+        a filtrar toda la lista, y la lista crece de una sola vez.
+
+        Args:
+            primer_id (int): Número del primer paquete (empezando en 1).
+            resumenes (list[ResumenPaquete]): Los campos de las filas, en orden.
+
+        Returns:
+            int: Número de filas añadidas.
+        """
+        if self.display_filter is None:
+            nuevas = len(resumenes)
+        else:
+            coincide = self.display_filter.coincide
+            filas = [primer_id - 1 + i for i, resumen in enumerate(resumenes) if coincide(resumen)]
+            self.visible_rows.extend(filas)
+            nuevas = len(filas)
+        if nuevas:
+            self.packet_list.agregar(nuevas)
+        return nuevas
+
+    def _fila_lista(self, posicion):
+        """
+        Proveedor de la lista virtual: construye la fila que se muestra en una posición.
 
-        self.packet_list.insert('', 'end', values=values, iid=str(pkt_id))
-        self.packet_list.yview_moveto(1) # Auto-scroll
+        Args:
+            posicion (int): Posición en la lista (empezando en 0).
+
+        Returns:
+            tuple: (iid, valores, tags) de la fila; el iid es el número del paquete.
+        """
+        fila = posicion if self.visible_rows is None else self.visible_rows[posicion]
+        resumen = self.summary_table.fila(fila)
+        pkt_id = fila + 1
+        tags = ()
+        comentarios = self.packet_comments.get(pkt_id)
+        if comentarios:
+            # Los paquetes que el simulador marcó como ataque vuelven a resaltarse.
+            tags = ('attack',) if any(c.startswith(PREFIJO_SIMULADO) for c in comentarios) else ('annotated',)
+        pkt_time = time.strftime('%H:%M:%S', time.localtime(resumen.time))
+        values = (pkt_id, pkt_time, self.summary_table.interfaz(fila), resumen.src, resumen.dst,
+                  resumen.proto, resumen.length, resumen.info)
+        return str(pkt_id), values, tags
+
+    def _aplicar_filtro_visualizacion(self, event=None):
+        """
+        Compila el filtro escrito por el usuario y vuelve a construir la lista.
+
+        Las filas que lo cumplen se calculan de una vez, de forma vectorizada,
+        sobre la tabla de resúmenes. Si la expresión no es válida se muestra el
+        error y la lista no cambia.
+        """
+        expresion = self.display_filter_var.get().strip()
+        if not expresion:
+            self._quitar_filtro_visualizacion()
+            return
+        try:
+            filtro = FiltroVisualizacion(expresion)
+        except ValueError as e:
+            self.filter_entry.config(bg="#ffdddd")
+            self.filter_status_var.set(f"Filtro no válido: {e}")
+            return
+        self.filter_entry.config(bg="#ddffdd")
+        self.display_filter = filtro
+        self._reconstruir_lista(filtro.filtrar(self.summary_table))
+
+    def _quitar_filtro_visualizacion(self):
+        """Elimina el filtro de visualización y vuelve a mostrar todos los paquetes."""
+        self.display_filter_var.set("")
+        self.filter_entry.config(bg="white")
+        if self.display_filter is None:
+            return
+        self.display_filter = None
+        self._reconstruir_lista()
+
+    def _reconstruir_lista(self, filas=None):
+        """
+        Sustituye el contenido de la lista por las filas indicadas de la tabla de resúmenes.
+
+        Como la lista es virtual, solo se guardan los índices: Tk no recibe
+        ninguna fila nueva hasta que se muestra.
+
+        Args:
+            filas (numpy.ndarray, optional): Índices de fila de la tabla
+                                             (empezando en 0). Por defecto, todas.
+        """
+        inicio = time.perf_counter()
+        if filas is None:
+            self.visible_rows = None
+            total = len(self.summary_table)
+        else:
+            self.visible_rows = array("Q", filas.astype("uint64").tobytes())
+            total = len(self.visible_rows)
+        self.packet_list.establecer_total(total)
+        if self.display_filter is not None:
+            self.filter_status_var.set(f"Mostrando {total} de {len(self.summary_table)} paquetes "
+                                       f"({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+        else:
+            self.filter_status_var.set("")
+
+    def _registrar_visualizacion(self, resumenes, inicio):
+        """
+        Anota en las métricas los paquetes recién mostrados en la lista.
+
+        El tiempo de la tanda se reparte a partes iguales entre sus paquetes.
+
+        Args:
+            resumenes (list[ResumenPaquete]): Los resúmenes de los paquetes.
+            inicio (float): `time.perf_counter()` al empezar a insertarlos.
+        """
+        if not resumenes:
+            return
+        duracion = (time.perf_counter() - inicio) / len(resumenes)
+        ahora = time.time()
+        self.metricas.registrar(ETAPA_VISUALIZACION, len(resumenes), sum(r.length for r in resumenes))
+        for resumen in resumenes:
+            self.metricas.registrar_duracion(ETAPA_VISUALIZACION, duracion)
+            self.metricas.latencia.registrar(ahora - resumen.time)
 
     def _mostrar_detalles_paquete(self, event):
         """
         Muestra los detalles del paquete seleccionado en el panel de detalles.
 
-        Este es el manejador de eventos para la selección de un item en el Treeview.
-        Recupera el objeto de paquete completo de la lista `captured_packets` y
-        utiliza `packet.show(dump=True)` para obtener una representación detallada
-        en formato de texto, que luego se muestra en el panel inferior.
+        Este es el manejador de eventos para la selección de una fila de la lista.
+        Recupera el paquete del almacén `captured_packets` o del pcap importado
+        (diseccionándolo bajo demanda) y utiliza `packet.show(dump=True)` para
+        obtener una representación detallada en formato de texto, que luego se
+        muestra en el panel inferior.
         """
         try:
             # Asegurarse de que hay una selección
@@ -528,10 +1311,13 @@ class MonitorViewFrame(tk.Frame):
             selected_item = self.packet_list.selection()[0]
             packet_id = int(selected_item)
             # El ID del Treeview es 1-based, el índice de la lista es 0-based
-            packet = self.captured_packets[packet_id - 1]
+            packet = self._obtener_paquete(packet_id)
 
             # Usar el método show de Scapy con dump=True para obtener los detalles como string
             details = packet.show(dump=True)
+            comentarios = self.packet_comments.get(packet_id)
+            if comentarios:
+                details = "".join(f"Comentario: {c}\n" for c in comentarios) + "\n" + details
 
             self.details_text.config(state="normal")
             self.details_text.delete("1.0", tk.END)
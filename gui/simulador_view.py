@@ -8,17 +8,26 @@ interactiva y compleja de la aplicación. Permite a los usuarios:
 - Iniciar y detener una captura de red en vivo en una interfaz seleccionada.
 - Ver los paquetes de ataque resaltados visualmente para un fácil reconocimiento.
 - Consultar un panel de logs para seguir el progreso de la simulación.
+- Exportar la sesión a pcapng con los paquetes de ataque anotados.
 - Leer guías rápidas sobre cómo identificar estos patrones en Wireshark.
 """
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import sys
 import threading
 import queue
 import time
+from collections import deque
 from core.simulador import simular_ataque, FAKE_ATTACKER_IP
-from core.monitor import PacketCaptor, get_network_interfaces
-from scapy.layers.inet import IP, TCP, UDP
+from core.interfaces import obtener_registro
+from core.monitor import PacketCaptor, get_network_interfaces, validar_filtro_bpf
+from core.almacen import PacketStore
+from core.cola import ColaAcotada, POLITICA_DESCARTAR_ANTIGUO, POLITICA_BLOQUEAR
+from core.pcapng import EscritorPcapNg, PREFIJO_SIMULADO
+from core.clasificador import clasificar_lote
+from core.tabla_resumen import TablaResumen
+from gui.lista_virtual import ListaVirtual, EVENTO_SELECCION
+from gui.despertador import Despertador
 from scapy.layers.l2 import ARP
 
 class SimuladorViewFrame(tk.Frame):
@@ -29,6 +38,38 @@ class SimuladorViewFrame(tk.Frame):
     paquetes de ataque simulados, mostrándolos en una única interfaz para
     fines educativos.
     """
+    # Número máximo de paquetes que el capturador agrupa en cada entrega.
+    CAPTURE_BATCH_SIZE = 256
+    # Número de paquetes diseccionados que se conservan en memoria.
+    DISSECTION_CACHE_SIZE = 256
+    # Máximo de paquetes de la captura en vivo que pueden esperar a mostrarse.
+    QUEUE_CAPACITY = 50000
+    # Ritmo al que la lista muestra la captura en vivo: un paquete cada
+    # EDUCATIONAL_INTERVAL_MS, o tandas de THROUGHPUT_CHUNK_SIZE paquetes con
+    # THROUGHPUT_TIME_BUDGET_MS de trabajo como máximo en cada ciclo de Tk.
+    DISPLAY_MODES = {
+        "Educativo (1 paquete cada 400 ms)": False,
+        "Alto rendimiento (por lotes)": True,
+    }
+    EDUCATIONAL_INTERVAL_MS = 400
+    THROUGHPUT_TIME_BUDGET_MS = 8
+    THROUGHPUT_CHUNK_SIZE = 16
+    # Evento con el que la cola despierta al bucle de Tk al recibir paquetes.
+    QUEUE_EVENT = "<<PaquetesEnCola>>"
+    # Canal entre el hilo del simulador y la GUI: mensajes que pueden esperar,
+    # segundos que el simulador espera como máximo si el canal está lleno y
+    # mensajes que la GUI atiende en cada ciclo.
+    SIMULATION_CHANNEL_CAPACITY = 2000
+    SIMULATION_MAX_BLOCK_S = 5.0
+    SIMULATION_BATCH_SIZE = 200
+    # Evento con el que el canal despierta al bucle de Tk.
+    SIMULATION_EVENT = "<<SalidaSimulacion>>"
+    # Líneas que conserva el panel de log; las más antiguas se van borrando.
+    LOG_MAX_LINES = 1000
+    # Nombre y descripción de la interfaz con la que se exportan los paquetes simulados.
+    SIMULATED_INTERFACE = "simulador"
+    SIMULATED_INTERFACE_DESCRIPTION = "Paquetes generados por el simulador de ataques (no se enviaron a la red)"
+
     def __init__(self, parent, controller):
         """
         Inicializa el frame del Simulador de Ataques.
@@ -43,16 +84,36 @@ class SimuladorViewFrame(tk.Frame):
 
         # --- Variables de estado ---
         self.captor = None  # Instancia de PacketCaptor para la captura en vivo.
-        self.captured_packets = []  # Almacena todos los paquetes (reales y simulados).
-        self.packet_queue = queue.Queue()  # Cola para paquetes de la captura en vivo.
+        # Todos los paquetes (reales en crudo y simulados), guardados en disco
+        # con los últimos diseccionados en memoria.
+        self.captured_packets = PacketStore(capacidad_cache=self.DISSECTION_CACHE_SIZE)
+        self.packet_annotations = {}  # Ataque al que pertenece cada paquete simulado, por su ID en la lista.
+        self.summary_table = TablaResumen()  # Columnas de la lista, de las que la lista virtual lee sus filas.
+        self.current_attack = None  # Nombre del último ataque lanzado.
+        # Cuando la cola pasa de vacía a tener paquetes, el despertador genera
+        # QUEUE_EVENT sin bloquear al hilo de captura (ver gui.despertador).
+        self.queue_waker = Despertador(self, self.QUEUE_EVENT)
+        # Cola acotada para lotes de la captura en vivo: si la GUI se retrasa,
+        # se descartan los paquetes más antiguos en lugar de agotar la memoria.
+        self.packet_queue = ColaAcotada(self.QUEUE_CAPACITY, POLITICA_DESCARTAR_ANTIGUO, aviso=self.queue_waker.avisar)
+        self.pending_packets = deque()  # Paquetes extraídos de la cola, pendientes de mostrarse.
         self.update_job = None  # ID del trabajo 'after' para el bucle de la GUI.
+        # Salida del hilo del simulador: mensajes ("paquete", paquete), ("log",
+        # texto) y ("fin", None). Si la GUI se retrasa, el simulador espera en
+        # lugar de perder paquetes; el fin se encola siempre.
+        self.simulation_waker = Despertador(self, self.SIMULATION_EVENT)
+        self.simulation_channel = ColaAcotada(self.SIMULATION_CHANNEL_CAPACITY, POLITICA_BLOQUEAR,
+                                              max_block_time=self.SIMULATION_MAX_BLOCK_S, aviso=self.simulation_waker.avisar)
+        self.simulation_job = None  # ID del trabajo 'after' que vacía el canal del simulador.
         self.attack_thread = None  # Hilo para ejecutar la simulación de ataque.
         self.stop_attack_event = threading.Event()  # Evento para detener el ataque.
         self.attack_buttons = []  # Lista para gestionar el estado de los botones de ataque.
         # Usar la IP local del usuario para una simulación más realista.
         self.target_ip_for_simulation = self.controller.local_ip if self.controller.local_ip else "127.0.0.1"
         self.iface_var = tk.StringVar()  # Variable para el ComboBox de interfaces.
+        self.bpf_var = tk.StringVar()  # Filtro BPF opcional para la captura en vivo.
         self.autoscroll_var = tk.BooleanVar(value=True)  # Variable para el Checkbutton de auto-scroll.
+        self.display_mode_var = tk.StringVar(value=next(iter(self.DISPLAY_MODES)))  # Ritmo de la captura en vivo.
 
         # --- Diccionario con la información detallada de cada ataque ---
         self.attack_info = {
@@ -106,6 +167,8 @@ class SimuladorViewFrame(tk.Frame):
 
         # Construir la interfaz gráfica de esta vista.
         self._crear_layout_redimensionable()
+        self.bind(self.QUEUE_EVENT, self._al_llegar_paquetes)
+        self.bind(self.SIMULATION_EVENT, self._al_recibir_simulacion)
 
     def _crear_layout_redimensionable(self):
         """
@@ -176,13 +239,27 @@ class SimuladorViewFrame(tk.Frame):
         self.iface_combo = ttk.Combobox(if_frame, textvariable=self.iface_var, state="readonly")
         self.iface_combo.pack(side="left", expand=True, fill="x")
 
+        bpf_frame = tk.Frame(container, bg=container.cget("bg"))
+        bpf_frame.pack(fill="x", pady=(0, 3), padx=8)
+        tk.Label(bpf_frame, text="Filtro BPF:", bg=container.cget("bg")).pack(side="left")
+        self.bpf_entry = tk.Entry(bpf_frame, textvariable=self.bpf_var)
+        self.bpf_entry.pack(side="left", expand=True, fill="x")
+
         self.btn_start_capture = tk.Button(container, text="Iniciar Captura Real", command=self.iniciar_captura_real, bg="#27ae60", fg="white", relief="ridge", bd=1, font=("Arial", 10, "bold"))
         self.btn_start_capture.pack(fill="x", pady=2, padx=8)
         self.btn_stop_capture = tk.Button(container, text="Detener Captura Real", command=self.detener_captura_real, state="disabled", bg="#f0f0f0", fg="#a0a0a0", relief="ridge", bd=1, font=("Arial", 10, "bold"))
         self.btn_stop_capture.pack(fill="x", pady=2, padx=8)
 
         autoscroll_check = tk.Checkbutton(container, text="Auto-scroll en vivo", variable=self.autoscroll_var, bg=container.cget("bg"), anchor="w")
-        autoscroll_check.pack(fill="x", padx=12, pady=(2, 6))
+        autoscroll_check.pack(fill="x", padx=12, pady=(2, 2))
+        mode_frame = tk.Frame(container, bg=container.cget("bg"))
+        mode_frame.pack(fill="x", pady=(0, 6), padx=8)
+        tk.Label(mode_frame, text="Mostrar:", bg=container.cget("bg")).pack(side="left")
+        ttk.Combobox(mode_frame, textvariable=self.display_mode_var, state="readonly",
+                     values=list(self.DISPLAY_MODES)).pack(side="left", expand=True, fill="x")
+
+        btn_export = tk.Button(container, text="Exportar sesión (pcapng)", command=self._exportar_sesion, relief="ridge", bd=1)
+        btn_export.pack(fill="x", pady=2, padx=8)
 
         ttk.Separator(container, orient="horizontal").pack(fill="x", pady=(10, 8))
 
@@ -200,17 +277,18 @@ class SimuladorViewFrame(tk.Frame):
 
     def _crear_panel_lista_paquetes(self):
         """
-        Crea el panel que contiene la lista de paquetes (Treeview).
+        Crea el panel que contiene la lista de paquetes.
 
-        Define las columnas, configura un tag 'attack' para resaltar filas,
-        y añade las scrollbars.
+        Define las columnas y configura un tag 'attack' para resaltar filas.
+        La lista es una `ListaVirtual` (con sus propias scrollbars) que solo
+        crea items de Tk para las filas visibles.
         """
         list_panel = tk.Frame(self, bg=self.cget("bg"))
         list_panel.grid_rowconfigure(0, weight=1)
         list_panel.grid_columnconfigure(0, weight=1)
 
         cols = ('#', 'Time', 'Source', 'Destination', 'Protocol', 'Length', 'Info')
-        self.packet_list = ttk.Treeview(list_panel, columns=cols, show='headings')
+        self.packet_list = ListaVirtual(list_panel, cols, self._fila_lista, bg=self.cget("bg"))
         # Configura un 'tag' especial para los paquetes de ataque. Cuando un item
         # se inserta con este tag, tendrá el fondo coloreado.
         self.packet_list.tag_configure('attack', background='#ffdddd')
@@ -225,17 +303,17 @@ class SimuladorViewFrame(tk.Frame):
         self.packet_list.column("Length", width=60, anchor="center")
         self.packet_list.column("Info", width=300)
 
-        # Scrollbars
-        vsb = ttk.Scrollbar(list_panel, orient="vertical", command=self.packet_list.yview)
-        hsb = ttk.Scrollbar(list_panel, orient="horizontal", command=self.packet_list.xview)
-        self.packet_list.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
-        self.packet_list.bind("<<TreeviewSelect>>", self._mostrar_detalles_paquete)
+        self.packet_list.bind(EVENTO_SELECCION, self._mostrar_detalles_paquete)
         self.packet_list.grid(row=0, column=0, sticky='nswe')
-        vsb.grid(row=0, column=1, sticky='ns')
-        hsb.grid(row=1, column=0, sticky='ew')
         return list_panel
 
+    def _limpiar_paquetes(self):
+        """Vacía la lista de paquetes junto con el almacén, la tabla de resúmenes y las anotaciones."""
+        self.packet_list.limpiar()
+        self.captured_packets.clear()
+        self.summary_table.clear()
+        self.packet_annotations.clear()
+
     def _crear_panel_detalles_log(self):
         """
         Crea el panel inferior derecho que contiene un Notebook con pestañas.
@@ -314,9 +392,15 @@ class SimuladorViewFrame(tk.Frame):
             messagebox.showerror("Error de Interfaz", "Por favor, selecciona una interfaz de red válida para la captura.")
             return
 
+        bpf_filter = self.bpf_var.get().strip()
+        try:
+            validar_filtro_bpf(bpf_filter)
+        except ValueError as e:
+            messagebox.showerror("Filtro BPF inválido", f"La expresión de filtro no es válida:\n{e}")
+            return
+
         # Limpiar la vista de cualquier captura o simulación anterior.
-        self.packet_list.delete(*self.packet_list.get_children())
-        self.captured_packets.clear()
+        self._limpiar_paquetes()
         self.details_text.config(state="normal")
         self.details_text.delete("1.0", tk.END)
         self.details_text.config(state="disabled")
@@ -325,28 +409,29 @@ class SimuladorViewFrame(tk.Frame):
         self.log_text.config(state="disabled")
 
         # Limpiar la cola de cualquier paquete residual de una ejecución anterior.
-        while not self.packet_queue.empty():
-            try: self.packet_queue.get_nowait()
-            except queue.Empty: continue
+        self.packet_queue.clear()
+        self.pending_packets.clear()
 
-        self.captor = PacketCaptor(interface=iface, packet_callback=self._agregar_paquete)
+        self.captor = PacketCaptor(interface=iface, packet_callback=self._agregar_lote, bpf_filter=bpf_filter,
+                                   batch_size=self.CAPTURE_BATCH_SIZE, raw=True)
         self.captor.start()
-        self._log_to_gui(f"Captura real iniciada en {iface}\n")
+        if bpf_filter:
+            self._log_to_gui(f"Captura real iniciada en {iface} (filtro: {bpf_filter})\n")
+        else:
+            self._log_to_gui(f"Captura real iniciada en {iface}\n")
 
         self.btn_start_capture.config(state="disabled")
         self.btn_stop_capture.config(state="normal", bg="#c0392b", fg="white")
         self.iface_combo.config(state="disabled")
-        
-        # Asegurarse de que el bucle de procesamiento de la cola esté corriendo.
-        if not self.update_job:
-            self._process_packet_queue()
+        self.bpf_entry.config(state="disabled")
+        # La cola avisa al bucle de Tk (`_al_llegar_paquetes`) cuando llegan paquetes.
 
     def detener_captura_real(self):
         """
         Detiene la captura de paquetes en vivo.
 
-        - Señaliza al hilo de `PacketCaptor` para que se detenga.
-        - Cancela el bucle de actualización de la GUI (`update_job`).
+        - Detiene el `PacketCaptor` y espera (con un tiempo acotado) a su hilo.
+        - Termina de mostrar los paquetes que siguen en la cola.
         - Restaura el estado de los botones.
         """
         if self.captor:
@@ -354,14 +439,14 @@ class SimuladorViewFrame(tk.Frame):
             self.captor = None
             self._log_to_gui("Captura real detenida.\n")
 
-        # Detener el bucle de actualización de la GUI
-        if self.update_job:
-            self.after_cancel(self.update_job)
-            self.update_job = None
+        # `stop()` ya ha entregado el último lote: mostrar lo que quede en la cola.
+        # El bucle de la GUI deja de reprogramarse solo cuando la cola se vacía.
+        self._al_llegar_paquetes()
 
         self.btn_start_capture.config(state="normal")
         self.btn_stop_capture.config(state="disabled", bg="#f0f0f0", fg="#a0a0a0")
         self.iface_combo.config(state="readonly")
+        self.bpf_entry.config(state="normal")
 
     def _cargar_interfaces(self):
         """
@@ -371,6 +456,10 @@ class SimuladorViewFrame(tk.Frame):
         esta operación se realiza en un hilo separado. Una vez obtenidas,
         la actualización del ComboBox se programa para ejecutarse en el hilo
         principal de la GUI usando `self.after`.
+
+        La lista sale del registro compartido de interfaces, que normalmente
+        ya la tiene en caché. La vista se suscribe además al registro para
+        actualizar el ComboBox cuando aparezcan o desaparezcan interfaces.
         """
         self.iface_combo['values'] = ["Cargando..."]
         self.iface_var.set("Cargando...")
@@ -378,124 +467,240 @@ class SimuladorViewFrame(tk.Frame):
             try:
                 interfaces = get_network_interfaces()
                 if interfaces:
-                    def update_gui():
-                        placeholder = "Seleccione una interfaz de red"
-                        full_list = [placeholder] + interfaces
-                        self.iface_combo.configure(values=full_list)
-                        self.iface_var.set(placeholder)
-                    self.after(0, update_gui)
+                    self.after(0, self._actualizar_lista_interfaces, interfaces)
                 else:
                     self.after(0, lambda: self.iface_combo.configure(values=["No hay interfaces"]))
             except Exception as e:
                 self.after(0, lambda: self.iface_combo.configure(values=["Error al cargar"]))
         threading.Thread(target=fetch, daemon=True).start()
+        registro = obtener_registro()
+        registro.suscribir(self._al_cambiar_interfaces)
+        self.bind("<Destroy>", lambda e: e.widget is self and registro.cancelar_suscripcion(self._al_cambiar_interfaces), add="+")
+
+    def _al_cambiar_interfaces(self, interfaces, anadidas, eliminadas):
+        """
+        Callback del registro de interfaces cuando cambia el conjunto de interfaces.
+
+        Se ejecuta en el hilo del registro, así que solo programa la
+        actualización del ComboBox en el hilo de la GUI.
+
+        Args:
+            interfaces (list[InfoInterfaz]): Todas las interfaces actuales.
+            anadidas (list[str]): Nombres de las interfaces nuevas.
+            eliminadas (list[str]): Nombres de las interfaces que ya no existen.
+        """
+        self.after(0, self._actualizar_lista_interfaces, [i.name for i in interfaces])
+
+    def _actualizar_lista_interfaces(self, interfaces):
+        """
+        Rellena el ComboBox de interfaces conservando la selección si sigue existiendo.
 
-    def _agregar_paquete(self, packet):
+        Durante una captura no se cambia la selección, solo la lista.
+
+        Args:
+            interfaces (list[str]): Nombres de las interfaces disponibles.
+        """
+        placeholder = "Seleccione una interfaz de red"
+        self.iface_combo.configure(values=[placeholder] + interfaces)
+        if self.captor is not None:
+            return
+        if self.iface_var.get() not in interfaces:
+            self.iface_var.set(placeholder)
+
+    def _agregar_lote(self, packets):
         """
-        Callback para paquetes de la captura en vivo.
+        Callback para los lotes de paquetes de la captura en vivo.
 
         Este método se ejecuta en el hilo de `PacketCaptor`, NO en el hilo de la GUI.
-        Su única responsabilidad es poner el paquete capturado en la `queue.Queue`
-        thread-safe para que el hilo de la GUI lo procese más tarde.
+        Su única responsabilidad es poner el lote completo en la `queue.Queue`
+        thread-safe (una sola operación por lote) para que el hilo de la GUI lo
+        procese más tarde.
+        """
+        self.packet_queue.put(packets)
+
+    def _al_llegar_paquetes(self, event=None):
+        """
+        Empieza a vaciar la cola si el bucle de procesamiento está parado.
+
+        No depende de que haya una captura activa: el último lote parcial se
+        entrega al detenerla, y la disección en paralelo puede entregar sus
+        últimos paquetes después.
         """
-        self.packet_queue.put(packet)
+        if self.update_job is None and (self.pending_packets or not self.packet_queue.empty()):
+            self._process_packet_queue()
+
+    def _programar_siguiente_ciclo(self, por_lotes):
+        """
+        Reprograma `_process_packet_queue` solo si quedan paquetes por mostrar.
+
+        Args:
+            por_lotes (bool): Si está activo el modo de alto rendimiento.
+        """
+        if not self.pending_packets and self.packet_queue.empty():
+            self.update_job = None  # Esperar al siguiente aviso de la cola.
+        elif por_lotes:
+            # Volver enseguida, dejando a Tk atender sus eventos entre ciclos.
+            self.update_job = self.after(1, self._process_packet_queue)
+        else:
+            # Una pausa más larga (400ms) hace que cada paquete sea visible
+            # antes de que aparezca el siguiente, facilitando el análisis.
+            self.update_job = self.after(self.EDUCATIONAL_INTERVAL_MS, self._process_packet_queue)
 
     def _process_packet_queue(self):
         """
         Procesa la cola de paquetes de la captura en vivo y actualiza la GUI.
 
-        Este método se ejecuta en el hilo principal de la GUI. Extrae paquetes de la
-        cola y los inserta en la lista. Al procesar solo un paquete y luego
-        reprogramarse a sí mismo con `self.after`, se asegura que la GUI permanezca
-        fluida y receptiva, y que los paquetes aparezcan uno por uno, facilitando
-        el análisis visual.
+        Este método se ejecuta en el hilo principal de la GUI y se reprograma a
+        sí mismo con `self.after`. En el modo educativo procesa un solo paquete
+        por ciclo, de modo que aparecen uno por uno, facilitando el análisis
+        visual. En el de alto rendimiento vacía la cola por tandas durante como
+        mucho `THROUGHPUT_TIME_BUDGET_MS` y desplaza la lista una vez por ciclo.
+
+        Solo se reprograma mientras quedan paquetes; cuando la cola se vacía
+        deja de ejecutarse hasta que la cola vuelve a avisar (`_al_llegar_paquetes`).
         """
+        # Con la captura detenida, lo que queda en la cola se muestra de una vez.
+        por_lotes = self.DISPLAY_MODES[self.display_mode_var.get()] or self.captor is None
         try:
-            # Para que la captura sea fácil de seguir, procesamos solo UN paquete
-            # por cada ciclo de actualización.
-            for _ in range(1):
-                packet = self.packet_queue.get_nowait()
-                self._insertar_paquete_en_gui(packet)
+            if por_lotes:
+                self._vaciar_cola_por_lotes()
+            else:
+                # La cola entrega lotes, así que solo se consulta cuando el
+                # lote anterior se ha mostrado entero.
+                if not self.pending_packets:
+                    self.pending_packets.extend(self.packet_queue.get_nowait())
+                self._insertar_lote_en_gui([self.pending_packets.popleft()])
         except queue.Empty:
             pass
         finally:
-            # Una pausa más larga (400ms) hace que cada paquete sea visible
-            # antes de que aparezca el siguiente, facilitando el análisis.
-            self.update_job = self.after(400, self._process_packet_queue)
+            self._programar_siguiente_ciclo(por_lotes)
+
+    def _vaciar_cola_por_lotes(self):
+        """Inserta paquetes de la cola por tandas hasta agotar el tiempo del ciclo o la cola."""
+        limite = time.perf_counter() + self.THROUGHPUT_TIME_BUDGET_MS / 1000
+        con_filas, ultimo_ataque = False, None
+        while time.perf_counter() < limite:
+            if not self.pending_packets:
+                try:
+                    self.pending_packets.extend(self.packet_queue.get_nowait())
+                except queue.Empty:
+                    break
+            tanda = min(len(self.pending_packets), self.THROUGHPUT_CHUNK_SIZE)
+            ataque = self._agregar_paquetes([self.pending_packets.popleft() for _ in range(tanda)])
+            con_filas = True
+            if ataque is not None:
+                ultimo_ataque = ataque
+        if con_filas:
+            self._desplazar_lista(ultimo_ataque)
+
+    def _es_ataque(self, packet, resumen):
+        """
+        Determina si un paquete es parte de una simulación, basándose en las IPs/MACs falsas.
 
-    def _insertar_paquete_en_gui(self, packet):
-        """
-        Inserta un único paquete (real o simulado) en el Treeview de la GUI.
+        Args:
+            packet (scapy.packet.Packet): El paquete diseccionado.
+            resumen (ResumenPaquete): Su resumen, del que se toman protocolo y direcciones.
 
-        Este método se ejecuta siempre en el hilo principal de la GUI.
-        - Extrae la información resumida del paquete.
-        - Determina si es un paquete de ataque basándose en las IPs/MACs falsas.
-        - Inserta el paquete en el Treeview, aplicando el tag 'attack' si corresponde.
-        - Gestiona el auto-scroll.
+        Returns:
+            bool: True si lo ha generado el simulador contra el objetivo actual.
         """
-        self.captured_packets.append(packet)
-        pkt_id = len(self.captured_packets)
-        tags = ()
-        proto, src, dst, info = "N/A", "N/A", "N/A", packet.summary()
-
-        # --- Lógica para identificar si el paquete es parte de una simulación ---
         # Se usan las constantes importadas de core.simulador para la comprobación.
-        is_attack = False
-        
-        # IP-based attacks from our fake source
-        if packet.haslayer(IP) and packet[IP].src == FAKE_ATTACKER_IP and packet[IP].dst == self.target_ip_for_simulation:
-            # Escaneo SYN, Flood UDP o DDoS
-            if packet.haslayer(TCP) or packet.haslayer(UDP):
-                is_attack = True
+        # IP-based attacks from our fake source: Escaneo SYN, Flood UDP o DDoS
+        if resumen.proto in ("TCP", "UDP"):
+            return resumen.src == FAKE_ATTACKER_IP and resumen.dst == self.target_ip_for_simulation
         # ARP-based attack
-        elif packet.haslayer(ARP) and packet[ARP].op == 2 and packet[ARP].pdst == self.target_ip_for_simulation:
-            # El ataque ARP Spoof simula venir de una IP de gateway común
-            is_attack = True
-
-        if is_attack:
-            # Si es un ataque, se le asigna el tag que le dará el fondo rojo.
-            tags = ('attack',)
-
-        # --- Parseo de información del paquete para la GUI ---
-        if packet.haslayer(IP):
-            src = packet[IP].src
-            dst = packet[IP].dst
-            if packet.haslayer(TCP): proto = "TCP"
-            elif packet.haslayer(UDP): proto = "UDP"
-            else: proto = "IP"
-        elif packet.haslayer(ARP):
-            proto = "ARP"
-            src = packet[ARP].psrc
-            dst = packet[ARP].pdst
-
-        pkt_time = time.strftime('%H:%M:%S', time.localtime(packet.time))
-        values = (pkt_id, pkt_time, src, dst, proto, len(packet), info)
-        
-        item_id = str(pkt_id)
-        self.packet_list.insert('', 'end', values=values, iid=item_id, tags=tags)
-
-        if is_attack:
+        # El ataque ARP Spoof simula venir de una IP de gateway común
+        return resumen.proto == "ARP" and resumen.dst == self.target_ip_for_simulation and packet[ARP].op == 2
+
+    def _agregar_paquetes(self, packets):
+        """
+        Añade varios paquetes (reales o simulados) al almacén, a la tabla y a la lista.
+
+        Los paquetes de ataque se anotan con la simulación a la que pertenecen:
+        la lista los muestra con el tag 'attack' y se conserva al exportar.
+
+        Args:
+            packets (list): Paquetes de Scapy o tramas en crudo (`PaqueteCrudo`).
+
+        Returns:
+            int or None: La posición en la lista del último paquete de ataque, si hay alguno.
+        """
+        primero = len(self.captured_packets)
+        # Las tramas en crudo se diseccionan aquí y quedan en la caché LRU del
+        # almacén por si el usuario selecciona el paquete; en disco solo van los bytes.
+        decodificados = []
+        for packet in packets:
+            self.captured_packets.append(packet)
+            decodificados.append(self.captured_packets.decodificado(len(self.captured_packets) - 1))
+        resumenes = clasificar_lote(decodificados)
+        ultimo_ataque = None
+        for posicion, (packet, resumen) in enumerate(zip(decodificados, resumenes), start=primero):
+            if self._es_ataque(packet, resumen):
+                self.packet_annotations[posicion + 1] = self.current_attack
+                ultimo_ataque = posicion
+        self.summary_table.agregar_lote(resumenes)
+        self.packet_list.agregar(len(resumenes))
+        return ultimo_ataque
+
+    def _desplazar_lista(self, ultimo_ataque):
+        """
+        Gestiona el auto-scroll tras añadir filas.
+
+        Args:
+            ultimo_ataque (int or None): Posición del último paquete de ataque añadido.
+        """
+        if ultimo_ataque is not None:
             # Si es un paquete de ataque, siempre lo enfocamos para que no se pierda.
-            self.packet_list.see(item_id)
+            self.packet_list.ver(ultimo_ataque)
         elif self.autoscroll_var.get():
             # Para el tráfico normal, solo hacemos auto-scroll si la opción está activada.
-            self.packet_list.yview_moveto(1)
+            self.packet_list.ver_final()
+
+    def _insertar_lote_en_gui(self, packets):
+        """
+        Inserta uno o varios paquetes (reales o simulados) en la lista de la GUI.
+
+        Este método se ejecuta siempre en el hilo principal de la GUI. Añade
+        las filas de una vez y desplaza la lista una sola vez.
+
+        Args:
+            packets (list): Paquetes de Scapy o tramas en crudo (`PaqueteCrudo`).
+        """
+        self._desplazar_lista(self._agregar_paquetes(packets))
+
+    def _fila_lista(self, posicion):
+        """
+        Proveedor de la lista virtual: construye la fila que se muestra en una posición.
+
+        Args:
+            posicion (int): Posición en la lista (empezando en 0).
+
+        Returns:
+            tuple: (iid, valores, tags) de la fila; el iid es el número del paquete.
+        """
+        pkt_id = posicion + 1
+        resumen = self.summary_table.fila(posicion)
+        tags = ('attack',) if pkt_id in self.packet_annotations else ()
+        pkt_time = time.strftime('%H:%M:%S', time.localtime(resumen.time))
+        values = (pkt_id, pkt_time, resumen.src, resumen.dst, resumen.proto, resumen.length, resumen.info)
+        return str(pkt_id), values, tags
 
     def _mostrar_detalles_paquete(self, event):
         """
         Muestra los detalles del paquete seleccionado en el panel de detalles.
 
-        Este es el manejador de eventos para la selección de un item en el Treeview.
-        Recupera el objeto de paquete completo de la lista `captured_packets` y
-        utiliza `packet.show(dump=True)` para obtener una representación detallada
-        en formato de texto, que luego se muestra en el panel inferior.
+        Este es el manejador de eventos para la selección de una fila de la lista.
+        Recupera el paquete del almacén `captured_packets` (diseccionándolo bajo
+        demanda si no está en su caché) y utiliza `packet.show(dump=True)` para
+        obtener una representación detallada en formato de texto, que luego se
+        muestra en el panel inferior.
         """
         try:
             if not self.packet_list.selection():
                 return
             selected_item = self.packet_list.selection()[0]
             packet_id = int(selected_item)
-            packet = self.captured_packets[packet_id - 1]
+            packet = self.captured_packets.decodificado(packet_id - 1)
 
             details = packet.show(dump=True)
 
@@ -507,19 +712,92 @@ class SimuladorViewFrame(tk.Frame):
         except (IndexError, ValueError):
             pass
 
+    def _exportar_sesion(self):
+        """
+        Exporta los paquetes de la lista a un archivo pcapng.
+
+        Cada paquete de ataque lleva un comentario con el ataque que lo generó
+        (ej. "simulated: Escaneo SYN") y se asocia a una interfaz propia,
+        `SIMULATED_INTERFACE`, con su descripción; el tráfico real se asocia a
+        la interfaz de la captura. Los paquetes se escriben uno a uno, sin
+        construir la sesión entera en memoria. Al importar el archivo en el
+        Monitor de Red, los paquetes anotados se vuelven a resaltar.
+        """
+        if not self.captured_packets:
+            messagebox.showinfo("Exportar sesión", "No hay paquetes para exportar.")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".pcapng", filetypes=[("PCAPNG files", "*.pcapng"), ("Todos", "*.*")])
+        if not file_path:
+            return
+        descripciones = {i.name: i.description for i in obtener_registro().obtener_interfaces()}
+        descripciones[self.SIMULATED_INTERFACE] = self.SIMULATED_INTERFACE_DESCRIPTION
+        iface = self.iface_var.get()
+        try:
+            with EscritorPcapNg(file_path, descripciones=descripciones) as escritor:
+                for pkt_id, packet in enumerate(self.captured_packets, start=1):
+                    ataque = self.packet_annotations.get(pkt_id)
+                    if ataque:
+                        escritor.escribir(packet, [PREFIJO_SIMULADO + ataque], interfaz=self.SIMULATED_INTERFACE)
+                    else:
+                        escritor.escribir(packet, interfaz=getattr(packet, 'sniffed_on', None) or iface)
+            messagebox.showinfo("Exportar sesión", f"Sesión exportada correctamente a:\n{file_path}")
+        except Exception as e:
+            messagebox.showerror("Error al exportar", f"No se pudo exportar:\n{e}")
+
     def _log_to_gui(self, message):
         """
-        Añade un mensaje al panel de log de la simulación de forma segura.
+        Añade un mensaje al panel de log de la simulación.
+
+        Solo debe llamarse desde el hilo de la GUI; el hilo del simulador envía
+        sus mensajes por `simulation_channel`. El panel funciona como un anillo:
+        conserva las últimas `LOG_MAX_LINES` líneas y borra las más antiguas.
 
         Args:
-            message (str): El mensaje a registrar.
+            message (str): El mensaje (o varios, separados por saltos de línea).
         """
         self.notebook.select(1)
         self.log_text.configure(state="normal")
         self.log_text.insert(tk.END, message)
+        # "end-1c" está en la línea vacía que sigue al último salto de línea.
+        sobrantes = int(self.log_text.index("end-1c").split(".")[0]) - 1 - self.LOG_MAX_LINES
+        if sobrantes > 0:
+            self.log_text.delete("1.0", f"{sobrantes + 1}.0")
         self.log_text.configure(state="disabled")
         self.log_text.see(tk.END)
 
+    def _al_recibir_simulacion(self, event=None):
+        """Empieza a vaciar el canal del simulador si no se está vaciando ya."""
+        if self.simulation_job is None:
+            self._procesar_salida_simulacion()
+
+    def _procesar_salida_simulacion(self):
+        """
+        Atiende hasta `SIMULATION_BATCH_SIZE` mensajes del simulador en el hilo de la GUI.
+
+        Los paquetes de la tanda se insertan en la lista de una vez y las
+        líneas de log se escriben con una sola operación sobre el panel. Se
+        reprograma mientras queden mensajes en el canal.
+        """
+        paquetes, lineas, terminado = [], [], False
+        for _ in range(self.SIMULATION_BATCH_SIZE):
+            try:
+                tipo, datos = self.simulation_channel.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == "paquete":
+                paquetes.append(datos)
+            elif tipo == "log":
+                lineas.append(datos)
+            else:
+                terminado = True
+        if paquetes:
+            self._insertar_lote_en_gui(paquetes)
+        if lineas:
+            self._log_to_gui("".join(lineas))
+        if terminado:
+            self._reset_attack_buttons()
+        self.simulation_job = None if self.simulation_channel.empty() else self.after(1, self._procesar_salida_simulacion)
+
     def _detener_ataque_actual(self):
         """
         Señaliza al hilo de simulación de ataque para que se detenga.
@@ -562,27 +840,30 @@ class SimuladorViewFrame(tk.Frame):
         self.log_text.config(state="disabled")
 
         self._log_to_gui(f"--- Iniciando simulación: {tipo_ataque} ---\n")
+        self.current_attack = tipo_ataque
 
-        # --- Callback para paquetes simulados ---
-        # A diferencia de la captura real, los paquetes simulados no usan una cola.
-        # Se "inyectan" directamente en el hilo de la GUI usando `self.after(0, ...)`.
-        # Esto asegura que se muestren inmediatamente y en el orden correcto,
-        # sin interferir con la cola de paquetes de la captura real.
-        def direct_insert_callback(packet):
-            self.after(0, self._insertar_paquete_en_gui, packet)
-        callback = direct_insert_callback
+        # --- Salida del hilo del simulador ---
+        # Los paquetes simulados y los mensajes de log no tocan la GUI desde el
+        # hilo del ataque: van por un único canal acotado, separado de la cola
+        # de la captura real, que el hilo de la GUI vacía por tandas y en orden.
+        canal = self.simulation_channel
+        canal.clear()
 
         # Si no hay una captura real activa, limpiamos la lista para que solo
         # se vean los paquetes del ataque. Si hay una captura activa, los
         # paquetes de ataque se mezclarán con el tráfico real.
         if not self.captor:
-            self.packet_list.delete(*self.packet_list.get_children())
-            self.captured_packets.clear()
+            self._limpiar_paquetes()
 
         def attack_wrapper():
-            """Ejecuta el ataque y luego resetea los botones de la GUI."""
-            simular_ataque(tipo_ataque, self.target_ip_for_simulation, callback, self.stop_attack_event, self._log_to_gui)
-            self.after(0, self._reset_attack_buttons)
+            """Ejecuta el ataque y luego avisa a la GUI para que resetee los botones."""
+            try:
+                simular_ataque(tipo_ataque, self.target_ip_for_simulation, lambda p: canal.put(("paquete", p)),
+                               self.stop_attack_event, lambda m: canal.put(("log", m)))
+            finally:
+                # El fin no se puede perder aunque el canal siga lleno: sin él
+                # los botones de ataque no se vuelven a habilitar.
+                canal.put(("fin", None), forzar=True)
 
         self.attack_thread = threading.Thread(target=attack_wrapper, daemon=True)
         self.attack_thread.start()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Pruebas de `core.cola.ColaAcotada`.
+
+Uso:
+    python -m unittest discover -s tests -t .
+"""
+
+import threading
+import time
+import unittest
+from core.cola import ColaAcotada, POLITICA_BLOQUEAR, POLITICA_DESCARTAR_ANTIGUO
+
+class PruebasAvisoCola(unittest.TestCase):
+    """Avisos al consumidor cuando la cola pasa de vacía a tener elementos."""
+
+    def setUp(self):
+        self.avisos = 0
+
+    def _avisar(self):
+        self.avisos += 1
+
+    def test_avisa_solo_al_dejar_de_estar_vacia(self):
+        cola = ColaAcotada(10, aviso=self._avisar)
+        cola.put([1, 2])
+        cola.put([3])
+        self.assertEqual(self.avisos, 1)
+        cola.get_nowait()
+        cola.get_nowait()
+        cola.put(4)
+        self.assertEqual(self.avisos, 2)
+
+    def test_avisa_si_se_vacia_durante_la_espera_del_productor(self):
+        cola = ColaAcotada(2, POLITICA_BLOQUEAR, max_block_time=5.0, aviso=self._avisar)
+        cola.put([1, 2])
+        productor = threading.Thread(target=cola.put, args=([3],))
+        productor.start()
+        # Esperar a que el productor esté bloqueado por falta de hueco.
+        time.sleep(0.2)
+        self.assertTrue(productor.is_alive())
+        # El consumidor vacía la cola y deja de consultarla hasta el próximo aviso.
+        self.assertEqual(cola.get_nowait(), [1, 2])
+        productor.join(2.0)
+        self.assertFalse(productor.is_alive())
+        self.assertEqual(cola.qsize(), 1)
+        self.assertEqual(self.avisos, 2)
+
+    def test_avisa_si_el_descarte_vacia_la_cola(self):
+        cola = ColaAcotada(2, POLITICA_DESCARTAR_ANTIGUO, aviso=self._avisar)
+        cola.put([1, 2])
+        cola.put([3, 4])
+        self.assertEqual(cola.get_nowait(), [3, 4])
+        self.assertEqual(cola.descartados, 2)
+        self.assertEqual(self.avisos, 2)
+
+class PruebasPoliticas(unittest.TestCase):
+    """Comportamiento de la cola llena."""
+
+    def test_bloquear_descarta_tras_la_espera_maxima(self):
+        cola = ColaAcotada(1, POLITICA_BLOQUEAR, max_block_time=0.05)
+        cola.put(1)
+        cola.put(2)
+        self.assertEqual(cola.qsize(), 1)
+        self.assertEqual(cola.descartados, 1)
+
+    def test_forzar_no_espera_ni_descarta(self):
+        cola = ColaAcotada(1, POLITICA_BLOQUEAR, max_block_time=5.0)
+        cola.put(1)
+        inicio = time.monotonic()
+        cola.put("fin", forzar=True)
+        self.assertLess(time.monotonic() - inicio, 1.0)
+        self.assertEqual(cola.descartados, 0)
+        self.assertEqual([cola.get_nowait(), cola.get_nowait()], [1, "fin"])
+
+if __name__ == "__main__":
+    unittest.main()